@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from app.routes import feature1, feature2, feature3
+from app.services import upstream
 
 app = FastAPI(title="Resume Analysis Microservice")
 
@@ -8,6 +9,17 @@ app.include_router(feature1.router, prefix="/feature1", tags=["Feature 1"])
 app.include_router(feature2.router, prefix="/feature2", tags=["Feature 2"])
 app.include_router(feature3.router, prefix="/feature3", tags=["Feature 3"])
 
+
+@app.on_event("shutdown")
+async def close_upstream_pool():
+    await upstream.pool.aclose()
+
+
 @app.get("/")
 def root():
     return {"message": "Resume Analysis Microservice Running"}
+
+
+@app.get("/diagnostics")
+def diagnostics():
+    return {"upstream": upstream.pool.stats()}
@@ -6,5 +6,5 @@ router = APIRouter()
 
 @router.post("/score")
 async def get_score(file: UploadFile = File(...)):
-    score = await score_resume(file)
-    return {"feature": "Feature3", "score": score}
+    result = await score_resume(file)
+    return {"feature": "Feature3", **result}
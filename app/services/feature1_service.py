@@ -1,13 +1,37 @@
-import shutil
 import os
 
+from starlette.concurrency import run_in_threadpool
+
+from app.services import upstream
+
+UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "uploads")
+
+
+def save_upload(filename: str, content: bytes) -> None:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    # Written next to the target and renamed, so a reader never sees half a file
+    tmp_path = file_path + ".part"
+    try:
+        with open(tmp_path, "wb") as out:
+            out.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
 async def process_resume(file):
-    upload_folder = "uploads"
-    os.makedirs(upload_folder, exist_ok=True)
-    file_path = os.path.join(upload_folder, file.filename)
-    
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-    
-    # Dummy processing logic
-    return {"filename": file.filename, "status": "processed"}
+    filename, content, sha256 = await upstream.read_upload(file)
+    parsed = await upstream.pool.parse(filename, content, sha256)
+    # Only uploads resume-nlp could parse are kept; the write runs in the threadpool, not on the event loop
+    await run_in_threadpool(save_upload, filename, content)
+    return {
+        "filename": file.filename,
+        "status": "processed",
+        "size": len(content),
+        "sha256": sha256,
+        "skills": parsed.get("skills", []),
+        "projects": parsed.get("projects", []),
+    }
@@ -1,3 +1,7 @@
+from app.services import upstream
+
+
 async def extract_skills(file):
-    # Dummy skill extraction
-    return ["Python", "ML", "FastAPI"]
+    filename, content, sha256 = await upstream.read_upload(file)
+    parsed = await upstream.pool.parse(filename, content, sha256)
+    return parsed.get("skills", [])
@@ -1,3 +1,8 @@
+from app.services import upstream
+
+
 async def score_resume(file):
-    # Dummy scoring
-    return 85  # Score out of 100
+    filename, content, sha256 = await upstream.read_upload(file)
+    analysis = await upstream.pool.analyze(filename, content, sha256)
+    # Score out of 100: the placement probability as a percentage
+    return {"score": round(analysis["placement_probability"] * 100), **analysis}
@@ -0,0 +1,189 @@
+"""Calls to the ML services, over one shared keep-alive connection pool.
+
+Every upstream request goes through a single `httpx.AsyncClient`, so
+connections to resume-nlp, collaborative-filter and placement-predict are
+reused across requests instead of being opened per call. Once a resume's
+skills are known, the recommendation and placement calls run concurrently.
+
+Identical uploads that arrive while one is still being handled (same sha256
+and extension) are coalesced: the first request makes the upstream calls and
+the others await its result.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+logger = logging.getLogger("app")
+
+
+def service_url(env: str, default: str) -> str:
+    # Same rule as the Node gateway: bare host:port values get an http:// prefix
+    raw = os.getenv(env) or default
+    return raw if raw.startswith(("http://", "https://")) else f"http://{raw}"
+
+
+NLP_SERVICE_URL = service_url("NLP_SERVICE_URL", "http://localhost:8001")
+CF_SERVICE_URL = service_url("CF_SERVICE_URL", "http://localhost:8002")
+PLACEMENT_SERVICE_URL = service_url("PLACEMENT_SERVICE_URL", "http://localhost:8003")
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "5"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+RECOMMENDATION_TOP_N = int(os.getenv("RECOMMENDATION_TOP_N", "5"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+
+
+async def read_upload(file) -> Tuple[str, bytes, str]:
+    """(filename, content, sha256) of an upload, refusing anything over MAX_UPLOAD_BYTES."""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"file exceeds {MAX_UPLOAD_BYTES} bytes")
+    digest = hashlib.sha256()
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        chunk = await file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"file exceeds {MAX_UPLOAD_BYTES} bytes")
+        digest.update(chunk)
+        chunks.append(chunk)
+    return os.path.basename(file.filename or "upload"), b"".join(chunks), digest.hexdigest()
+
+
+class Coalescer:
+    """One call per key at a time; callers arriving while it runs share its result."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(call())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._done(key, f))
+            self.started += 1
+        else:
+            self.joined += 1
+        # Shielded: a caller that disconnects must not cancel the call others are waiting on
+        return await asyncio.shield(fut)
+
+    def _done(self, key: str, fut: asyncio.Future) -> None:
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        # Mark the error retrieved even if every waiter went away first
+        if not fut.cancelled():
+            fut.exception()
+
+
+class UpstreamPool:
+    """The ML services behind one shared AsyncClient. `mounts` routes base URLs to
+    custom transports (tests mount the upstream apps with httpx.ASGITransport)."""
+
+    def __init__(
+        self,
+        nlp_url: str = NLP_SERVICE_URL,
+        cf_url: str = CF_SERVICE_URL,
+        placement_url: str = PLACEMENT_SERVICE_URL,
+        mounts: Optional[Mapping[str, httpx.AsyncBaseTransport]] = None,
+    ):
+        self.nlp_url = nlp_url.rstrip("/")
+        self.cf_url = cf_url.rstrip("/")
+        self.placement_url = placement_url.rstrip("/")
+        self._mounts = dict(mounts or {})
+        self._client: Optional[httpx.AsyncClient] = None
+        self.parses = Coalescer()
+        self.analyses = Coalescer()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=UPSTREAM_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=UPSTREAM_MAX_CONNECTIONS, max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+                ),
+                mounts=self._mounts or None,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _post(self, service: str, url: str, **kwargs) -> Any:
+        try:
+            resp = await self.client.post(url, **kwargs)
+        except httpx.TimeoutException:
+            raise HTTPException(status_code=504, detail=f"{service} timed out")
+        except httpx.HTTPError as exc:
+            logger.warning("%s unreachable: %s", service, exc)
+            raise HTTPException(status_code=502, detail=f"{service} unavailable")
+        if resp.status_code >= 500:
+            raise HTTPException(status_code=502, detail=f"{service} returned {resp.status_code}")
+        if resp.status_code >= 400:
+            # Client errors (too large, unsupported type, ...) are the caller's to fix
+            try:
+                detail = resp.json().get("detail", resp.text)
+            except ValueError:
+                detail = resp.text
+            raise HTTPException(status_code=resp.status_code, detail=detail)
+        return resp.json()
+
+    async def parse(self, filename: str, content: bytes, sha256: str) -> dict:
+        """resume-nlp /parse, coalesced with identical uploads in flight."""
+        key = f"{sha256}:{os.path.splitext(filename)[1].lower()}"
+        return await self.parses.run(key, lambda: self._post(
+            "resume-nlp", f"{self.nlp_url}/parse",
+            files={"file": (filename, content)}, timeout=PARSE_TIMEOUT_SECONDS,
+        ))
+
+    async def recommendations(self, skills: List[str], top_n: int = RECOMMENDATION_TOP_N) -> List[str]:
+        data = await self._post(
+            "collaborative-filter", f"{self.cf_url}/recommendations", params={"top_n": top_n}, json={"skills": skills},
+        )
+        return data.get("recommendations", [])
+
+    async def placement(self, skills: List[str]) -> float:
+        data = await self._post("placement-predict", f"{self.placement_url}/predict-placement", json={"skills": skills})
+        return float(data.get("placement_probability", 0.0))
+
+    async def analyze(self, filename: str, content: bytes, sha256: str) -> dict:
+        """Parse, then recommendations and placement concurrently; coalesced like parse."""
+        key = f"{sha256}:{os.path.splitext(filename)[1].lower()}"
+        return await self.analyses.run(key, lambda: self._analyze(filename, content, sha256))
+
+    async def _analyze(self, filename: str, content: bytes, sha256: str) -> dict:
+        parsed = await self.parse(filename, content, sha256)
+        skills = parsed.get("skills", [])
+        recommendations, probability = await asyncio.gather(self.recommendations(skills), self.placement(skills))
+        return {
+            "skills": skills,
+            "recommendations": recommendations,
+            "placement_probability": probability,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "parse": {"upstream_calls": self.parses.started, "coalesced": self.parses.joined, "in_flight": len(self.parses)},
+            "analyze": {
+                "upstream_calls": self.analyses.started, "coalesced": self.analyses.joined, "in_flight": len(self.analyses),
+            },
+        }
+
+
+pool = UpstreamPool()
@@ -0,0 +1,161 @@
+"""Gateway calls against stand-in upstream apps mounted with httpx.ASGITransport."""
+import asyncio
+import hashlib
+import os
+import sys
+import time
+
+import httpx
+from fastapi import Body, FastAPI, File, HTTPException, UploadFile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, REPO_ROOT)
+
+from app.main import app  # noqa: E402
+from app.services import feature1_service, upstream  # noqa: E402
+
+UPSTREAM_DELAY = 0.2
+
+
+class StandIns:
+    """Fake resume-nlp, collaborative-filter and placement-predict that count their calls."""
+
+    def __init__(self):
+        self.calls = {"parse": 0, "recommendations": 0, "placement": 0}
+        self.release = asyncio.Event()
+        nlp, cf, placement = FastAPI(), FastAPI(), FastAPI()
+
+        @nlp.post("/parse")
+        async def parse(file: UploadFile = File(...)):
+            self.calls["parse"] += 1
+            text = (await file.read()).decode()
+            if text == "broken":
+                raise HTTPException(status_code=500, detail="boom")
+            if not file.filename.endswith(".txt"):
+                raise HTTPException(status_code=415, detail="unsupported file type")
+            # Held open until the test lets it finish, so duplicates overlap
+            await self.release.wait()
+            return {"skills": text.split(","), "projects": []}
+
+        @cf.post("/recommendations")
+        async def recommendations(top_n: int = 5, payload: dict = Body(...)):
+            self.calls["recommendations"] += 1
+            await asyncio.sleep(UPSTREAM_DELAY)
+            return {"recommendations": [f"{s} Developer" for s in payload["skills"]][:top_n]}
+
+        @placement.post("/predict-placement")
+        async def predict(payload: dict = Body(...)):
+            self.calls["placement"] += 1
+            await asyncio.sleep(UPSTREAM_DELAY)
+            return {"placement_probability": round(0.25 * len(payload["skills"]), 2)}
+
+        self.pool = upstream.UpstreamPool(
+            "http://nlp", "http://cf", "http://placement",
+            mounts={
+                "http://nlp": httpx.ASGITransport(app=nlp),
+                "http://cf": httpx.ASGITransport(app=cf),
+                "http://placement": httpx.ASGITransport(app=placement),
+            },
+        )
+
+
+def run_gateway(monkeypatch, scenario):
+    async def main():
+        fakes = StandIns()
+        monkeypatch.setattr(upstream, "pool", fakes.pool)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            try:
+                return await scenario(client, fakes)
+            finally:
+                await fakes.pool.aclose()
+
+    return asyncio.run(main())
+
+
+def upload(content: bytes, name: str = "resume.txt"):
+    return {"file": (name, content, "text/plain")}
+
+
+def test_identical_uploads_in_flight_share_one_parse(monkeypatch):
+    async def scenario(client, fakes):
+        requests = [client.post("/feature2/skills", files=upload(b"Python,SQL")) for _ in range(5)]
+        requests.append(client.post("/feature2/skills", files=upload(b"Go")))
+        pending = asyncio.gather(*requests)
+        while fakes.calls["parse"] < 2:
+            await asyncio.sleep(0.01)
+        fakes.release.set()
+        responses = await pending
+        assert [r.status_code for r in responses] == [200] * 6
+        assert [r.json()["skills"] for r in responses] == [["Python", "SQL"]] * 5 + [["Go"]]
+        assert fakes.calls["parse"] == 2
+        assert fakes.pool.stats()["parse"] == {"upstream_calls": 2, "coalesced": 4, "in_flight": 0}
+
+        # Once it has finished the next identical upload is parsed again
+        again = await client.post("/feature2/skills", files=upload(b"Python,SQL"))
+        assert again.json()["skills"] == ["Python", "SQL"] and fakes.calls["parse"] == 3
+
+    run_gateway(monkeypatch, scenario)
+
+
+def test_upload_stores_the_file_and_returns_the_parse(monkeypatch, tmp_path):
+    monkeypatch.setattr(feature1_service, "UPLOAD_FOLDER", str(tmp_path))
+
+    async def scenario(client, fakes):
+        fakes.release.set()
+        response = await client.post("/feature1/upload", files=upload(b"Python,SQL"))
+        assert response.json() == {
+            "feature": "Feature1",
+            "result": {
+                "filename": "resume.txt",
+                "status": "processed",
+                "size": 10,
+                "sha256": hashlib.sha256(b"Python,SQL").hexdigest(),
+                "skills": ["Python", "SQL"],
+                "projects": [],
+            },
+        }
+        assert (tmp_path / "resume.txt").read_bytes() == b"Python,SQL" and fakes.calls["parse"] == 1
+        # Shares the parse coalescer with /feature2/skills
+        assert fakes.pool.stats()["parse"]["upstream_calls"] == 1
+        unsupported = await client.post("/feature1/upload", files=upload(b"x", name="resume.exe"))
+        assert unsupported.status_code == 415
+        monkeypatch.setattr(upstream, "MAX_UPLOAD_BYTES", 4)
+        too_large = await client.post("/feature1/upload", files=upload(b"Python,SQL", name="big.txt"))
+        assert too_large.status_code == 413 and not (tmp_path / "big.txt").exists()
+        assert os.listdir(tmp_path) == ["resume.txt"]
+
+    run_gateway(monkeypatch, scenario)
+
+
+def test_score_fans_out_concurrently_once_skills_are_known(monkeypatch):
+    async def scenario(client, fakes):
+        fakes.release.set()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/feature3/score", files=upload(b"Python,SQL")) for _ in range(3)))
+        elapsed = time.perf_counter() - started
+        body = responses[0].json()
+        assert body == {
+            "feature": "Feature3",
+            "score": 50,
+            "skills": ["Python", "SQL"],
+            "recommendations": ["Python Developer", "SQL Developer"],
+            "placement_probability": 0.5,
+        }
+        assert all(r.json() == body for r in responses)
+        # One parse, one recommendation and one prediction call for all three, side by side
+        assert fakes.calls == {"parse": 1, "recommendations": 1, "placement": 1}
+        assert elapsed < 2 * UPSTREAM_DELAY
+
+    run_gateway(monkeypatch, scenario)
+
+
+def test_upstream_errors_are_mapped(monkeypatch):
+    async def scenario(client, fakes):
+        fakes.release.set()
+        broken = await client.post("/feature2/skills", files=upload(b"broken"))
+        assert broken.status_code == 502 and broken.json()["detail"] == "resume-nlp returned 500"
+        unsupported = await client.post("/feature2/skills", files=upload(b"x", name="resume.exe"))
+        assert unsupported.status_code == 415 and unsupported.json()["detail"] == "unsupported file type"
+
+    run_gateway(monkeypatch, scenario)
@@ -15,3 +15,23 @@ export const getJobRecommendations = async (skills: string[], topN: number) => {
   );
   return response.data.recommendations as string[];
 };
+
+export type StudentSkills = { student_id: number | string; skills: string[] };
+
+export type StudentRecommendations = {
+  student_id: number | string;
+  recommendations: string[];
+};
+
+// One request for a whole cohort instead of one /recommendations call per student
+export const getBatchJobRecommendations = async (
+  students: StudentSkills[],
+  topN: number
+) => {
+  const response = await axios.post(
+    `${CF_BASE_URL}/recommendations/batch?top_n=${topN}`,
+    { students },
+    { timeout: 120000 }
+  );
+  return response.data.results as StudentRecommendations[];
+};
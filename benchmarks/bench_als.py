@@ -0,0 +1,113 @@
+"""Benchmark: ALS training time and top-K query latency on synthetic interactions.
+
+Run from the repo root:
+
+    python benchmarks/bench_als.py [--sizes 10000x2000x200000,100000x20000x2000000] [--items 1000000]
+
+Each size is students x jobs x interactions. Students belong to one of a few
+hundred taste groups and mostly interact with their group's jobs, so a model
+that learned something ranks held-out group jobs highly ("hit@10": share of
+top-10 items from the student's own group). Query latency is measured on the
+trained item factors and, for the approximate index, on `--items` random
+factor rows: exact matrix-vector top-K vs the IVF index, with its recall@10
+against the exact answer.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ml-service", "collaborative-filter"))
+
+from als_model import AlsModel, IvfIndex, _top, train  # noqa: E402
+
+GROUPS = 200
+
+
+def synth_interactions(n_students, n_jobs, nnz, rng):
+    groups = rng.integers(0, GROUPS, n_students)
+    job_groups = rng.integers(0, GROUPS, n_jobs)
+    by_group = [np.flatnonzero(job_groups == g) for g in range(GROUPS)]
+    per = max(1, nnz // n_students)
+    rows = np.repeat(np.arange(n_students), per)
+    cols = np.empty(len(rows), dtype=np.int64)
+    # 80% of a student's interactions fall in their group, the rest anywhere
+    own = rng.random(len(rows)) < 0.8
+    for g in range(GROUPS):
+        pool = by_group[g] if len(by_group[g]) else np.arange(n_jobs)
+        mask = own & (groups[rows] == g)
+        cols[mask] = pool[rng.integers(0, len(pool), mask.sum())]
+    cols[~own] = rng.integers(0, n_jobs, (~own).sum())
+    scores = rng.integers(1, 4, len(rows)).astype(np.float32)
+    matrix = sparse.csr_matrix((scores, (rows, cols)), shape=(n_students, n_jobs))
+    matrix.sum_duplicates()
+    return matrix, groups, job_groups
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return statistics.median(samples), pick(0.95)
+
+
+def time_queries(search, queries):
+    ms = []
+    for q in queries:
+        t0 = time.perf_counter()
+        search(q)
+        ms.append((time.perf_counter() - t0) * 1000.0)
+    return percentiles(ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000x2000x200000,100000x20000x2000000")
+    parser.add_argument("--items", type=int, default=1_000_000, help="rows in the approximate-index benchmark")
+    parser.add_argument("--factors", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'students':>9} {'jobs':>7} {'nnz':>9} {'train s':>8} {'s/iter':>7} {'hit@10':>7} {'top10 p50 ms':>13} {'p95':>7}")
+    for size in args.sizes.split(","):
+        n_students, n_jobs, nnz = (int(x) for x in size.split("x"))
+        matrix, groups, job_groups = synth_interactions(n_students, n_jobs, nnz, rng)
+        t0 = time.perf_counter()
+        users, items = train(matrix, factors=args.factors, iterations=args.iterations, threads=args.threads)
+        elapsed = time.perf_counter() - t0
+        model = AlsModel(users, items, np.arange(n_students), [str(j) for j in range(n_jobs)])
+        sample = rng.choice(n_students, size=min(args.queries, n_students), replace=False)
+        hits = [np.mean(job_groups[model.top_k(users[u], 10)[0]] == groups[u]) for u in sample]
+        p50, p95 = time_queries(lambda u: model.top_k(users[u], 10), sample)
+        print(
+            f"{n_students:>9} {n_jobs:>7} {matrix.nnz:>9} {elapsed:>8.2f} {elapsed / args.iterations:>7.3f}"
+            f" {np.mean(hits):>7.3f} {p50:>13.3f} {p95:>7.3f}"
+        )
+
+    # Approximate index on a large synthetic item table with clustered factors
+    n = args.items
+    centers = rng.standard_normal((1024, args.factors)).astype(np.float32)
+    factors = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, args.factors)).astype(np.float32)
+    queries = [centers[rng.integers(0, len(centers))] + 0.3 * rng.standard_normal(args.factors).astype(np.float32) for _ in range(args.queries)]
+    t0 = time.perf_counter()
+    ivf = IvfIndex(factors)
+    build = time.perf_counter() - t0
+    e50, e95 = time_queries(lambda q: _top(factors @ q, 10), queries)
+    a50, a95 = time_queries(lambda q: ivf.search(q, 10, args.nprobe), queries)
+    recall = np.mean([len(set(ivf.search(q, 10, args.nprobe)[0]) & set(_top(factors @ q, 10))) / 10 for q in queries])
+    print()
+    print(f"{'items':>9} {'ivf build s':>12} {'exact p50 ms':>13} {'p95':>7} {'ivf p50 ms':>11} {'p95':>7} {'recall@10':>10}")
+    print(f"{n:>9} {build:>12.2f} {e50:>13.3f} {e95:>7.3f} {a50:>11.3f} {a95:>7.3f} {recall:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
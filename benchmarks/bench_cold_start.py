@@ -0,0 +1,148 @@
+"""Benchmark: resume-nlp cold start (import, readiness, first request) and steady-state RSS.
+
+Run from the repo root:
+
+    python benchmarks/bench_cold_start.py [--requests 50] [--warmup "" "corpus,pypdf" all]
+    python benchmarks/bench_cold_start.py --service-dir /path/to/older/checkout/ml-service/resume-nlp
+
+Every scenario runs in a fresh interpreter. For each RESUME_NLP_WARMUP value it
+measures the module import time and RSS, the time from startup until /ready
+returns 200, the first /parse of a small PDF, and the median over the
+following requests along with RSS after them. Checkouts without /ready are
+treated as ready once startup returns.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLP_DIR = os.path.join(ROOT, "ml-service", "resume-nlp")
+
+RESUME_LINES = [
+    "Jane Doe",
+    "Skills",
+    "Python, Docker, Kubernetes, SQL, React",
+    "Projects",
+    "Placement Portal - Flask app for campus drives",
+    "Education",
+    "B.Tech Computer Science, 2024",
+]
+
+
+def minimal_pdf(lines) -> bytes:
+    """One-page PDF with the given text lines (Helvetica, no external deps)."""
+    ops = ["BT", "/F1 11 Tf", "14 TL", "72 720 Td"]
+    for line in lines:
+        ops.append("(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T*")
+    ops.append("ET")
+    stream = "\n".join(ops).encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def child(requests: int) -> dict:
+    """Runs inside the fresh interpreter, cwd = service dir."""
+    sys.path.insert(0, os.getcwd())
+    result = {"rss_start_mb": round(rss_mb(), 1)}
+    t0 = time.perf_counter()
+    import main  # noqa: F401
+    result["import_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+    result["rss_import_mb"] = round(rss_mb(), 1)
+
+    from fastapi.testclient import TestClient
+    pdf = minimal_pdf(RESUME_LINES)
+    t0 = time.perf_counter()
+    with TestClient(main.app) as client:
+        while True:
+            resp = client.get("/ready")
+            if resp.status_code != 503:
+                break
+            time.sleep(0.001)
+        result["ready_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+
+        def parse() -> float:
+            t = time.perf_counter()
+            body = client.post("/parse", files={"file": ("resume.pdf", pdf, "application/pdf")}).json()
+            elapsed = (time.perf_counter() - t) * 1000.0
+            if "Python" not in body.get("skills", []):
+                raise SystemExit(f"unexpected parse result: {body}")
+            return elapsed
+
+        result["first_request_ms"] = round(parse(), 1)
+        result["rss_first_request_mb"] = round(rss_mb(), 1)
+        steady = [parse() for _ in range(requests)]
+        result["steady_p50_ms"] = round(statistics.median(steady), 2)
+        result["rss_steady_mb"] = round(rss_mb(), 1)
+    return result
+
+
+def run_scenario(service_dir: str, warmup: str, requests: int) -> dict:
+    env = {
+        **os.environ,
+        "RESUME_NLP_WARMUP": warmup,
+        "LOG_LEVEL": "WARNING",
+        "PARSE_CACHE_MAX_BYTES": "0",  # every request parses
+        "CORPUS_WATCH_INTERVAL_SECONDS": "0",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-W", "ignore", os.path.abspath(__file__), "--child", "--requests", str(requests)],
+        cwd=service_dir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"scenario warmup={warmup!r} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=50)
+    ap.add_argument("--warmup", nargs="*", default=["", "corpus,pypdf", "all"])
+    ap.add_argument("--service-dir", default=NLP_DIR)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.requests)))
+        return
+
+    cols = ["import_ms", "rss_import_mb", "ready_ms", "first_request_ms", "rss_first_request_mb", "steady_p50_ms", "rss_steady_mb"]
+    print(f"{'warmup':<14}" + "".join(f"{c:>22}" for c in cols))
+    for warmup in args.warmup:
+        r = run_scenario(args.service_dir, warmup, args.requests)
+        print(f"{(warmup or '(lazy)'):<14}" + "".join(f"{r[c]:>22}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark: resume-nlp fuzzy skill pass (fuzzy_matcher.py) on top of the exact automaton.
+
+Run from the repo root:
+
+    python benchmarks/bench_fuzzy_skills.py [--corpus-size 50000] [--resumes 30] [--cutoff 90]
+
+Uses the shipped corpus padded with syllable-built names (as in
+bench_skill_matcher.py) and synthetic resumes from benchmarks/synth.py. Per resume size it reports
+the median time of the exact pass and of the fuzzy pass, cold (empty memo,
+every query goes to the trigram index) and warm (memo filled by earlier
+resumes, the steady state of a running service). A share (--damage) of the
+skills of 7+ characters named in each resume get one OCR-style typo; recall
+is the share of those the fuzzy pass recovers. Every damaged word is new to
+the memo, so warm times grow with --damage.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT, "ml-service", "resume-nlp"))
+sys.path.insert(0, BENCH_DIR)
+
+import synth  # noqa: E402
+from bench_skill_matcher import load_base_corpus, synth_corpus  # noqa: E402
+from fuzzy_matcher import FuzzySkillIndex  # noqa: E402
+from skill_matcher import SkillMatcher  # noqa: E402
+
+OCR_SWAPS = {"l": "1", "i": "l", "o": "0", "m": "rn", "rn": "m", "e": "c", "s": "5"}
+
+
+def typo(rng: random.Random, word: str) -> str:
+    for src in rng.sample(sorted(OCR_SWAPS), len(OCR_SWAPS)):
+        at = word.find(src, 1)
+        if at > 0:
+            return word[:at] + OCR_SWAPS[src] + word[at + len(src):]
+    return word[:-1]
+
+
+def damaged_resume(rng: random.Random, corpus, matcher: SkillMatcher, size: str, damage: float):
+    """Resume text plus the (lowercased) skills whose spelling was damaged."""
+    text = synth.resume_text(rng, corpus, size)
+    present = [s for _, s in matcher.match(text) if len(s) >= 7]
+    damaged = rng.sample(present, int(len(present) * damage))
+    for skill in damaged:
+        text = text.replace(skill, typo(rng, skill))
+    return text, [s.lower() for s in damaged]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus-size", type=int, default=50_000)
+    ap.add_argument("--resumes", type=int, default=30)
+    ap.add_argument("--cutoff", type=float, default=90.0)
+    ap.add_argument("--damage", type=float, default=0.33, help="share of skills (7+ chars) given a typo")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = synth_corpus(load_base_corpus(), args.corpus_size, rng)
+    t0 = time.perf_counter()
+    matcher = SkillMatcher(corpus, {"c", "go", "r"})
+    t1 = time.perf_counter()
+    index = FuzzySkillIndex(corpus, cutoff=args.cutoff)
+    t2 = time.perf_counter()
+    print(f"corpus={len(corpus)} automaton_build_ms={(t1 - t0) * 1000:.0f} fuzzy_build_ms={(t2 - t1) * 1000:.0f} fuzzy_keys={len(index)}")
+    print(f"{'size':<8}{'exact ms':>10}{'fuzzy cold ms':>15}{'fuzzy warm ms':>15}{'hits/resume':>13}{'typo recall':>13}")
+
+    for size in synth.RESUME_SIZES:
+        resumes = [damaged_resume(rng, corpus, matcher, size, args.damage) for _ in range(args.resumes)]
+        exact, cold, warm, hits = [], [], [], []
+        recovered = damaged_total = 0
+        for text, damaged in resumes:
+            claimed = []
+            s = time.perf_counter()
+            matcher.match(text, 0, claimed)
+            exact.append(time.perf_counter() - s)
+            index._memo.clear()
+            s = time.perf_counter()
+            found = index.match(text, 0, claimed)
+            cold.append(time.perf_counter() - s)
+            hits.append(len(found))
+            names = {skill.lower() for _, skill, _, _ in found}
+            recovered += sum(1 for skill in damaged if skill in names)
+            damaged_total += len(damaged)
+        # Warm: the memo holds every query of the other resumes, not this one's own
+        for k, (text, _) in enumerate(resumes):
+            index._memo.clear()
+            for other, _ in resumes[:k] + resumes[k + 1:]:
+                index.match(text=other, claimed=())
+            claimed = []
+            matcher.match(text, 0, claimed)
+            s = time.perf_counter()
+            index.match(text, 0, claimed)
+            warm.append(time.perf_counter() - s)
+        print(
+            f"{size:<8}{statistics.median(exact) * 1000:>10.2f}{statistics.median(cold) * 1000:>15.2f}"
+            f"{statistics.median(warm) * 1000:>15.2f}{statistics.mean(hits):>13.1f}"
+            f"{(f'{recovered / damaged_total:.0%}' if damaged_total else '-'):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Benchmark: collaborative-filter /recommendations, full scan vs. inverted index vs. TF-IDF.
+
+Run from the repo root:
+
+    python benchmarks/bench_recommendations.py [--sizes 1000,100000,1000000] [--queries 50]
+
+Builds synthetic catalogs (Zipf-distributed skills, 3-10 tags per job), checks
+that the overlap index returns the same recommendations as the scan and
+reports per-request latency percentiles for overlap and TF-IDF scoring, plus
+the per-user cost of scoring a batch of users in one sparse product. Queries
+are encoded to skill ids once, as the service does per request; "index MB"
+is the Python heap the overlap index (names, vocabulary, id arrays) allocates.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "ml-service", "collaborative-filter"))
+sys.path.insert(0, os.path.join(ROOT, "ml-service", "shared"))
+
+from catalog_index import CatalogIndex, encode_catalog  # noqa: E402
+from tfidf_index import TfidfIndex  # noqa: E402
+
+VOCAB_SIZE = 5_000
+
+
+def zipf_picker(rng, n, s=1.1):
+    weights = [1.0 / (i + 1) ** s for i in range(n)]
+    vocab = [f"skill{i}" for i in range(n)]
+    return lambda k: rng.choices(vocab, weights=weights, k=k)
+
+
+def synth_catalog(size, rng):
+    pick = zipf_picker(rng, VOCAB_SIZE)
+    return {f"Job {i}": pick(rng.randint(3, 10)) for i in range(size)}
+
+
+def synth_queries(count, rng):
+    pick = zipf_picker(rng, VOCAB_SIZE)
+    return [{s.lower() for s in pick(rng.randint(3, 15))} for _ in range(count)]
+
+
+def scan_recommend(catalog, skillset, top_n):
+    """The pre-index implementation of recommend_jobs."""
+    scored = []
+    for job, tags in catalog.items():
+        tagset = {t.lower() for t in tags}
+        overlap = len(skillset & tagset)
+        if overlap >= 2:
+            scored.append((job, overlap, len(tagset)))
+    scored.sort(key=lambda x: (x[1], x[1] / x[2] if x[2] else 0), reverse=True)
+    return [j for j, _, _ in scored[:top_n]]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]
+    return statistics.median(samples), pick(0.95), pick(0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--scan-queries", type=int, default=5, help="queries timed for the full scan")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=256, help="users per TF-IDF batch call")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    queries = synth_queries(args.queries, rng)
+    batch = synth_queries(args.batch, rng)
+    print(
+        f"{'jobs':>9} {'build s':>8} {'index MB':>9} {'scan p50 ms':>12} {'index p50 ms':>13} {'p95':>8} {'p99':>8}"
+        f" {'tfidf build s':>14} {'tfidf p50 ms':>13} {'p95':>8} {'p99':>8} {'batch ms/user':>14}"
+    )
+    for size in (int(x) for x in args.sizes.split(",")):
+        catalog = synth_catalog(size, rng)
+        t0 = time.perf_counter()
+        jobs, vocab, tags = encode_catalog(catalog)
+        index = CatalogIndex(jobs, vocab, tags)
+        build = time.perf_counter() - t0
+        # Built again under tracemalloc (slower) to measure what the index keeps alive
+        tracemalloc.start()
+        kept = CatalogIndex.from_catalog(catalog)
+        index_mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        del kept
+        encoded = [vocab.encode(q) for q in queries]
+
+        scan_ms = []
+        for q, ids in zip(queries[: args.scan_queries], encoded):
+            t0 = time.perf_counter()
+            expected = scan_recommend(catalog, q, args.top_n)
+            scan_ms.append((time.perf_counter() - t0) * 1000.0)
+            if index.top_n(ids, args.top_n) != expected:
+                raise SystemExit(f"recommendation mismatch at catalog size {size}")
+
+        index_ms = []
+        for q in queries:
+            t0 = time.perf_counter()
+            index.top_n(vocab.encode(q), args.top_n)
+            index_ms.append((time.perf_counter() - t0) * 1000.0)
+        p50, p95, p99 = percentiles(index_ms)
+
+        t0 = time.perf_counter()
+        tfidf = TfidfIndex(jobs, vocab, tags)
+        tfidf_build = time.perf_counter() - t0
+        tfidf_ms = []
+        for q in queries:
+            t0 = time.perf_counter()
+            tfidf.top_n(vocab.encode(q), args.top_n)
+            tfidf_ms.append((time.perf_counter() - t0) * 1000.0)
+        t50, t95, t99 = percentiles(tfidf_ms)
+        t0 = time.perf_counter()
+        tfidf.top_n_batch([vocab.encode(q) for q in batch], args.top_n)
+        per_user = (time.perf_counter() - t0) * 1000.0 / len(batch)
+
+        print(
+            f"{size:>9} {build:>8.2f} {index_mb:>9.1f} {statistics.median(scan_ms):>12.2f} {p50:>13.3f} {p95:>8.3f} {p99:>8.3f}"
+            f" {tfidf_build:>14.2f} {t50:>13.3f} {t95:>8.3f} {t99:>8.3f} {per_user:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""Benchmark: resume-nlp project extraction, inline per-call regexes vs. ResumeSectionParser.
+
+Run from the repo root:
+
+    python benchmarks/bench_section_parser.py [--resumes 300] [--repeat 5]
+
+It times project extraction on the golden resumes plus synthetic resumes of
+varying length, and checks that the precompiled parser returns exactly what
+the previous inline implementation (kept below as the reference) returned.
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLP_DIR = os.path.join(ROOT, "ml-service", "resume-nlp")
+sys.path.insert(0, NLP_DIR)
+
+from section_parser import ResumeSectionParser  # noqa: E402
+
+SECTIONS = ["SUMMARY", "Skills", "EXPERIENCE", "Education", "CERTIFICATIONS", "Languages", "Hobbies"]
+PROJECT_HEADINGS = ["PROJECTS", "Key Projects", "Academic Projects", "PROJECTS & ACHIEVEMENTS", "Project Work", "Mini Projects"]
+WORDS = (
+    "built designed scalable service pipeline dashboard using python react docker kafka redis api "
+    "reduced latency improved accuracy deployed students users realtime model data team weekly"
+).split()
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def sentence(rng, lo=5, hi=14):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def project_entry(rng):
+    title = " ".join(w.title() for w in rng.sample(WORDS, rng.randint(2, 4)))
+    date = f"{rng.choice(MONTHS)} 20{rng.randint(18, 24)}"
+    style = rng.randrange(5)
+    if style == 0:
+        lines = [f"{title} | {', '.join(rng.sample(WORDS, 3))} | {date} - Present"]
+    elif style == 1:
+        lines = [f"- {title}"]
+    elif style == 2:
+        lines = [f"{rng.randint(1, 9)}. {title}"]
+    elif style == 3:
+        lines = [f"{title} - {sentence(rng)}"]
+    else:
+        lines = [title, date, "GitHub: github.com/someone/" + title.replace(" ", "-").lower()]
+    for _ in range(rng.randint(1, 5)):
+        bullet = rng.choice(["- ", "• ", "  ", "* ", ""])
+        lines.append(bullet + sentence(rng))
+    return lines
+
+
+def synth_resume(rng, sections=8):
+    out = ["Jane Doe", "jane@example.com | +91 90000 00000", ""]
+    order = rng.sample(SECTIONS, min(sections, len(SECTIONS)))
+    order.insert(rng.randrange(len(order) + 1), None)  # where the projects section goes
+    for name in order:
+        if name is None:
+            out.append(rng.choice(PROJECT_HEADINGS))
+            for _ in range(rng.randint(1, 8)):
+                out.extend(project_entry(rng))
+                out.append("")
+            continue
+        out.append(name)
+        out.extend(sentence(rng) for _ in range(rng.randint(1, 10)))
+        out.append("")
+    return "\n".join(out)
+
+
+# Reference: project extraction as it was inlined in parse_text before the refactor
+def legacy_extract_projects(text_with_newlines):
+    # --- Project extraction (robust line-based) ---
+    lines_all = [ln.rstrip() for ln in text_with_newlines.splitlines()]
+    upper_all = [ln.upper() for ln in lines_all]
+
+    header_patterns = [
+        r"^PROJECTS?$",
+        r"^KEY PROJECTS$",
+        r"^PERSONAL PROJECTS$",
+        r"^ACADEMIC PROJECTS$",
+        r"^MAJOR PROJECTS$",
+        r"^MINI PROJECTS$",
+        r"^PROJECT DETAILS$",
+        r"^PROJECT EXPERIENCE$",
+        r"^SELECTED PROJECTS$",
+        r"^PROJECTS[\s&/]+(INTERNSHIPS|TRAINING|CERTIFICATIONS|ACHIEVEMENTS)$",
+        r"^PROJECTS AND (INTERNSHIPS|TRAINING)$",
+        r"^ACADEMIC PROJECTS AND INTERNSHIPS$",
+        r"^PROJECTS AND HACKATHONS$",
+        r"^PROJECTS & HACKATHONS$",
+        r"^PROJECTS AND ACHIEVEMENTS$",
+        r"^PROJECTS & ACHIEVEMENTS$",
+        r"^PROJECTS (?:AND|&) (?:AWARDS|ACCOMPLISHMENTS)$",
+    ]
+    header_res = [re.compile(p) for p in header_patterns]
+
+    def normalize_heading(s: str) -> str:
+        return re.sub(r"\s+", " ", s.strip().strip("-:•*\u2013")).upper()
+
+    start_idx = -1
+    for i, u in enumerate(upper_all):
+        norm = normalize_heading(u)
+        for rx in header_res:
+            if rx.match(norm):
+                start_idx = i + 1
+                break
+        if start_idx != -1:
+            break
+
+    # fallback: find first occurrence of the word PROJECT in any heading-like line
+    if start_idx == -1:
+        for i, line in enumerate(lines_all):
+            raw = line.strip()
+            if not raw:
+                continue
+            # Strip common decorations
+            raw_norm = re.sub(r"^[\-*•\u2022\u25CF\s]+|\s*[-_*]{2,}\s*$", "", raw)
+            up = raw_norm.upper()
+            if ("PROJECT" in up) and (len(raw_norm) <= 120):
+                start_idx = i + 1
+                break
+
+    def is_next_heading(line: str) -> bool:
+        t = line.strip()
+        if not t:
+            return False
+        # Known next section anchors
+        anchors = [
+            "EXPERIENCE", "WORK EXPERIENCE", "PROFESSIONAL EXPERIENCE", "EDUCATION", "ACADEMICS",
+            "QUALIFICATIONS", "CERTIFICATIONS", "ACHIEVEMENTS", "INTERNSHIP", "PUBLICATIONS",
+            "AWARDS", "SUMMARY", "OBJECTIVE", "PROFILE", "SKILLS", "TECHNICAL SKILLS", "LANGUAGES",
+            "HOBBIES", "INTERESTS", "CONTACT", "WORK HISTORY", "VOLUNTEERING", "EXTRACURRICULAR",
+            "CO-CURRICULAR", "COURSES", "TRAININGS"
+        ]
+        u = t.upper()
+        # Consider anchor if equals, starts with, or contains a known heading word
+        if u in anchors or any(u.startswith(a) for a in anchors) or any(a in u for a in anchors):
+            return True
+        # Common education/degree patterns often used as first line under EDUCATION in extracted text
+        degree_rx = re.compile(r"^(Bachelor|Master|B\.?E\.?|B\.?Tech|BTech|B\.?Sc|BSc|M\.?Tech|MTech|M\.?Sc|MBA|Diploma|PUC|Intermediate|XII|10th|12th)\b", re.IGNORECASE)
+        if degree_rx.match(t):
+            return True
+        # Horizontal rules / separators
+        if re.match(r"^\s*[-_=]{4,}\s*$", t):
+            return True
+        # Heuristic: line that is mostly uppercase and short looks like a heading
+        letters = [ch for ch in t if ch.isalpha()]
+        if letters:
+            upper_ratio = sum(1 for ch in letters if ch.isupper()) / len(letters)
+            if upper_ratio > 0.8 and 3 <= len(t) <= 60:
+                return True
+        return False
+
+    projects_lines: list[str] = []
+    if start_idx != -1:
+        j = start_idx
+        while j < len(lines_all) and not is_next_heading(lines_all[j]):
+            projects_lines.append(lines_all[j])
+            j += 1
+    else:
+        projects_lines = []
+
+    projects_out: list[dict] = []
+    if projects_lines:
+        # Preserve original line breaks; minimal trimming
+        lines = [ln.rstrip() for ln in projects_lines]
+        while lines and not lines[0].strip():
+            lines.pop(0)
+
+        def push(current_title: str, desc_lines: list[str]):
+            # Helpers
+            months_rx = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\b\s*\d{2,4}", re.IGNORECASE)
+            date_range_rx = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b\s*[–—\-]\s*(?:Present|\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b)", re.IGNORECASE)
+            def clean_title(t: str) -> str:
+                t = t.strip().strip("-–—:•*·•")
+                # Merge broken word case handled later
+                # Prefer left side before pipe
+                if "|" in t:
+                    t = t.split("|")[0].strip()
+                # Drop anything after 'GitHub'
+                t = re.sub(r"\bGitHub\b.*$", "", t, flags=re.IGNORECASE)
+                # Remove date ranges or single month-year tokens
+                t = date_range_rx.sub("", t)
+                t = months_rx.sub("", t)
+                # Collapse extra punctuation/spaces
+                t = re.sub(r"\s+", " ", t).strip("-–—:•* ·")
+                return t.strip()
+
+            def clean_desc_lines(lines: list[str]) -> list[str]:
+                out = []
+                for ln in lines:
+                    if ln is None:
+                        continue
+                    # Preserve leading whitespace for indentation; trim only right side
+                    s = ln.rstrip("\n\r")
+                    if not s:
+                        out.append("")
+                        continue
+                    # Skip standalone dates or github-only lines
+                    if date_range_rx.fullmatch(s) or months_rx.fullmatch(s) or re.fullmatch(r"(?i)github\b.*", s):
+                        continue
+                    # Normalize common leading markers (bullets, numbers) to a single bullet while keeping indentation
+                    s = re.sub(r"^(\s*)([\-\*•\u2022\u25CF]+)\s*", r"\1• ", s)
+                    s = re.sub(r"^(\s*)\d+[\)\.]\s+", r"\1• ", s)
+                    out.append(s)
+                return out
+
+            # Start with raw title
+            title_raw = (current_title or "").strip()
+            # If title looks too short (e.g., 'Fra'), try to merge first desc line
+            if len(title_raw) < 10 and desc_lines:
+                first = (desc_lines[0] or "").strip()
+                if first and first[0].islower():
+                    title_raw = f"{title_raw} {first}".strip()
+                    desc_lines = desc_lines[1:]
+            title = clean_title(title_raw)
+            if not title and desc_lines:
+                # Fallback: take first meaningful desc line as title
+                title = clean_title(desc_lines[0])
+                desc_lines = desc_lines[1:]
+            if not title:
+                return
+            if len(title) > 150:
+                title = title[:150] + "…"
+            # Clean description
+            desc_items = clean_desc_lines(desc_lines)
+            # Remove leading/trailing blanks
+            while desc_items and not desc_items[0]:
+                desc_items.pop(0)
+            while desc_items and not desc_items[-1]:
+                desc_items.pop()
+            desc = "\n".join(desc_items).strip()
+            if len(desc) > 4000:
+                desc = desc[:3997] + "…"
+            projects_out.append({"title": title, "description": desc})
+
+        current_title = ""
+        current_desc: list[str] = []
+        bullet_start = re.compile(r"^[\-\*•\u2022\u25CF]|^\d+[\)\.]\s+")
+        title_desc_pair = re.compile(r"^(.{3,160}?)\s*[-–—:\\u2013\|]\s*(.{4,})$")
+        months = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\b\s*\d{2,4}", re.IGNORECASE)
+        GENERIC_LABELS = {"TECH STACK","RESPONSIBILITIES","ROLE","DURATION","TOOLS","ENVIRONMENT","TEAM SIZE","CONTRIBUTIONS","KEY FEATURES","ACHIEVEMENTS","LINKS","GITHUB","URL","WEBSITE","RESULT","OUTCOME","IMPACT"}
+
+        def is_generic_label_line(s: str) -> bool:
+            u = s.strip().upper()
+            return any(u == g or u.startswith(g + ":") for g in GENERIC_LABELS)
+
+        was_blank = True
+        heading_like = re.compile(r"^[A-Z][A-Za-z0-9&/()\-]*?(?:\s+[A-Z][A-Za-z0-9&/()\-]*){2,}\s*$")
+        for raw in lines:
+            ln = raw.strip()
+            if not ln:
+                if current_title and (not current_desc or current_desc[-1] != ""):
+                    current_desc.append("")
+                was_blank = True
+                continue
+
+            m_pair = title_desc_pair.match(ln)
+            if m_pair:
+                if not current_title or was_blank:
+                    if current_title:
+                        push(current_title, current_desc)
+                    current_title = m_pair.group(1)
+                    current_desc = [m_pair.group(2)]
+                else:
+                    current_desc.append(raw)
+                was_blank = False
+                continue
+
+            looks_like_title = (
+                bullet_start.match(ln) is not None
+                or re.match(r"^(Project|PROJECT)[^:]{0,20}[:\-]", ln) is not None
+                or (not current_title and len(ln) >= 25 and len(ln.split()) >= 4)
+                or ("|" in ln and len(ln) >= 12)
+            )
+            # If separated by a blank line, treat Title Case headings as titles
+            if was_blank and heading_like.match(ln):
+                looks_like_title = True
+            if months.fullmatch(ln) or is_generic_label_line(ln) or (len(ln) < 10 and current_title):
+                looks_like_title = False
+
+            if looks_like_title and (not current_title or was_blank or bullet_start.match(ln)):
+                if current_title:
+                    push(current_title, current_desc)
+                title_line = re.sub(r"^[\-\*•\u2022\u25CF\d\)\.\s]+", "", ln).strip()
+                current_title = title_line
+                current_desc = []
+            else:
+                if current_title:
+                    current_desc.append(raw)
+            was_blank = False
+
+        if current_title:
+            push(current_title, current_desc)
+
+    # Filter out hackathon-related entries if present
+    if projects_out:
+        exclude_rx = re.compile(r"\b(hackathon|hack\-?a\-?thon|hackman|hack\s*fest|hackfest)\b", re.IGNORECASE)
+        projects_out = [
+            pr for pr in projects_out
+            if not (exclude_rx.search(pr.get("title") or "") or exclude_rx.search(pr.get("description") or ""))
+        ]
+
+    # De-duplicate by normalized title to avoid splitting/duplicates
+    if projects_out:
+        seen_titles = set()
+        unique = []
+        for pr in projects_out:
+            key = re.sub(r"\W+", "", (pr.get("title") or "").lower())
+            if key and key not in seen_titles:
+                seen_titles.add(key)
+                unique.append(pr)
+        projects_out = unique
+    return projects_out
+
+
+def load_golden():
+    texts = []
+    for p in sorted(glob.glob(os.path.join(NLP_DIR, "tests", "golden", "*.txt"))):
+        with open(p, "rb") as f:
+            texts.append(f.read().decode("utf-8").replace("\r\n", "\n"))
+    return texts
+
+
+def time_per_resume(fn, texts, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        runs.append((time.perf_counter() - t0) / len(texts) * 1e6)
+    return statistics.median(runs)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--resumes", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = load_golden() + [synth_resume(rng) for _ in range(args.resumes)]
+    parser = ResumeSectionParser()
+
+    mismatches = sum(1 for t in texts if legacy_extract_projects(t) != parser.extract_projects(t))
+    projects = sum(len(parser.extract_projects(t)) for t in texts)
+    legacy_us = time_per_resume(legacy_extract_projects, texts, args.repeat)
+    parser_us = time_per_resume(parser.extract_projects, texts, args.repeat)
+    lines = statistics.mean(t.count("\n") + 1 for t in texts)
+
+    print(f"resumes={len(texts)} avg_lines={lines:.0f} projects={projects} mismatches={mismatches}")
+    print(f"{'engine':<22}{'us/resume':>12}")
+    print(f"{'inline (before)':<22}{legacy_us:>12.1f}")
+    print(f"{'ResumeSectionParser':<22}{parser_us:>12.1f}")
+    print(f"speedup x{legacy_us / parser_us:.2f}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Benchmark / load harness for the ML services (/parse, /recommendations, /predict-placement).
+
+Run from the repo root (fully offline; inputs come from benchmarks/synth.py):
+
+    # in-process: call the service functions directly, warm-up + timed rounds
+    python benchmarks/bench_services.py --mode inprocess
+
+    # over HTTP: spawn the three services with uvicorn on free ports and drive
+    # them with N concurrent clients per scenario
+    python benchmarks/bench_services.py --mode http --concurrency 1,8,32 --requests 300
+
+    # or drive services that are already running
+    python benchmarks/bench_services.py --mode http --nlp-url http://localhost:8001 \\
+        --cf-url http://localhost:8002 --placement-url http://localhost:8003
+
+    # compare two result files (p50/p99/throughput per scenario)
+    python benchmarks/bench_services.py --compare before.json after.json
+
+Each run writes a JSON file (default benchmarks/results/services-<utc time>.json)
+with the git commit, machine details, the arguments and, per scenario,
+count, errors, throughput and latency min/mean/p50/p95/p99/max in ms.
+
+Spawned and in-process services use a synthetic skill corpus and job catalog
+(--corpus-size, --catalog-size) and have the parse cache and corpus watcher
+switched off, so every /parse does the full work. The load generator is a
+single Python process; at high concurrency on small requests it can be the
+bottleneck, which shows up as flat throughput with rising client CPU.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import synth  # noqa: E402
+
+SERVICES = {
+    "nlp": os.path.join(ROOT, "ml-service", "resume-nlp"),
+    "cf": os.path.join(ROOT, "ml-service", "collaborative-filter"),
+    "placement": os.path.join(ROOT, "ml-service", "placement-predict"),
+}
+TARGETS = ("parse", "recommendations", "predict")
+
+
+class Data:
+    def __init__(self, args, workdir: str):
+        rng = random.Random(args.seed)
+        self.corpus = synth.skill_corpus(args.corpus_size, args.seed)
+        self.corpus_path = os.path.join(workdir, "skill_corpus.txt")
+        with open(self.corpus_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.corpus) + "\n")
+        self.catalog_path = os.path.join(workdir, "job_catalog.json")
+        with open(self.catalog_path, "w", encoding="utf-8") as f:
+            json.dump(synth.job_catalog(args.catalog_size, self.corpus, args.seed), f)
+        # A few distinct files per (format, size) so no single document dominates
+        self.resumes: Dict[Tuple[str, str], List[bytes]] = {
+            (fmt, size): [synth.resume_file(rng, self.corpus, size, fmt) for _ in range(args.variants)]
+            for fmt in args.formats for size in args.sizes
+        }
+        self.students = [synth.student_payload(rng, self.corpus) for _ in range(256)]
+
+    def env(self) -> Dict[str, str]:
+        return {
+            "SKILL_CORPUS_PATH": self.corpus_path,
+            "JOB_CATALOG_PATH": self.catalog_path,
+            "PARSE_CACHE_MAX_BYTES": "0",
+            "CORPUS_WATCH_INTERVAL_SECONDS": "0",
+            "LOG_LEVEL": "WARNING",
+        }
+
+
+def summarize(name: str, mode: str, concurrency: int, latencies: Sequence[float], errors: int, wall: float) -> dict:
+    ms = sorted(x * 1000.0 for x in latencies)
+
+    def pct(p: float) -> float:
+        return round(ms[min(len(ms) - 1, int(p / 100.0 * len(ms)))], 3) if ms else 0.0
+
+    return {
+        "name": name,
+        "mode": mode,
+        "concurrency": concurrency,
+        "count": len(ms),
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(len(ms) / wall, 2) if wall > 0 else 0.0,
+        "latency_ms": {
+            "min": round(ms[0], 3) if ms else 0.0,
+            "mean": round(statistics.fmean(ms), 3) if ms else 0.0,
+            "p50": pct(50),
+            "p95": pct(95),
+            "p99": pct(99),
+            "max": round(ms[-1], 3) if ms else 0.0,
+        },
+    }
+
+
+# --- in-process -------------------------------------------------------------
+
+def load_service(key: str):
+    """Import a service's main.py under a unique module name (all three are called main)."""
+    service_dir = SERVICES[key]
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(f"bench_{key}_main", os.path.join(service_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_calls(fn: Callable[[int], object], rounds: int, warmup: int) -> Tuple[List[float], int, float]:
+    for i in range(warmup):
+        fn(i)
+    latencies, errors = [], 0
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        start = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors, time.perf_counter() - t0
+
+
+def inprocess_scenarios(args, data: Data) -> Dict[str, Callable[[int], object]]:
+    os.environ.update(data.env())
+    scenarios: Dict[str, Callable[[int], object]] = {}
+    if "parse" in args.targets:
+        nlp = load_service("nlp")
+        for (fmt, size), files in data.resumes.items():
+            scenarios[f"parse/{fmt}-{size}"] = (
+                lambda i, fmt=fmt, files=files: nlp.parse_document(f"resume.{fmt}", files[i % len(files)])
+            )
+    if "recommendations" in args.targets:
+        cf = load_service("cf")
+        for scoring in args.scoring:
+            scenarios[f"recommendations/{scoring}"] = (
+                lambda i, scoring=scoring: cf.recommend(
+                    {"skills": data.students[i % len(data.students)]["skills"]}, 5, scoring
+                )
+            )
+    if "predict" in args.targets:
+        pp = load_service("placement")
+        scenarios["predict-placement"] = lambda i: pp.predict_many([data.students[i % len(data.students)]])
+    return scenarios
+
+
+def run_inprocess(args, data: Data) -> List[dict]:
+    results = []
+    for name, fn in inprocess_scenarios(args, data).items():
+        latencies, errors, wall = time_calls(fn, args.requests, args.warmup)
+        results.append(summarize(name, "inprocess", 1, latencies, errors, wall))
+        print_row(results[-1])
+    return results
+
+
+# --- over HTTP --------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_services(keys: Sequence[str], env: Dict[str, str]) -> Dict[str, Tuple[subprocess.Popen, str]]:
+    import httpx
+    procs = {}
+    for key in keys:
+        port = free_port()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=SERVICES[key], env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        procs[key] = (proc, f"http://127.0.0.1:{port}")
+    deadline = time.monotonic() + 120
+    for key, (proc, url) in procs.items():
+        while True:
+            if proc.poll() is not None:
+                raise SystemExit(f"{key} service exited:\n{proc.stderr.read().decode(errors='replace')}")
+            try:
+                # /ready where the service has it (resume-nlp), /health otherwise
+                if httpx.get(url + "/ready", timeout=1).status_code in (200, 404):
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit(f"{key} service did not become ready at {url}")
+            time.sleep(0.1)
+    return procs
+
+
+def stop_services(procs) -> None:
+    for proc, _ in procs.values():
+        proc.terminate()
+    for proc, _ in procs.values():
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def http_scenarios(args, data: Data, urls: Dict[str, str]) -> Dict[str, Callable[[int], Tuple[str, str, dict]]]:
+    """name -> function(i) returning (method, url, httpx request kwargs)."""
+    scenarios = {}
+    if "parse" in args.targets:
+        for (fmt, size), files in data.resumes.items():
+            scenarios[f"parse/{fmt}-{size}"] = (
+                lambda i, fmt=fmt, files=files: (
+                    "POST", urls["nlp"] + "/parse", {"files": {"file": (f"resume.{fmt}", files[i % len(files)])}}
+                )
+            )
+    if "recommendations" in args.targets:
+        for scoring in args.scoring:
+            scenarios[f"recommendations/{scoring}"] = (
+                lambda i, scoring=scoring: (
+                    "POST", urls["cf"] + f"/recommendations?scoring={scoring}",
+                    {"json": {"skills": data.students[i % len(data.students)]["skills"]}},
+                )
+            )
+    if "predict" in args.targets:
+        scenarios["predict-placement"] = lambda i: (
+            "POST", urls["placement"] + "/predict-placement", {"json": data.students[i % len(data.students)]}
+        )
+    return scenarios
+
+
+async def drive(request: Callable[[int], Tuple[str, str, dict]], total: int, concurrency: int, warmup: int):
+    """Closed loop: `concurrency` clients each send their next request as soon as the last returns."""
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        for i in range(warmup):
+            method, url, kwargs = request(i)
+            await client.request(method, url, **kwargs)
+        latencies: List[float] = []
+        errors = 0
+        next_i = 0
+
+        async def worker():
+            nonlocal next_i, errors
+            while next_i < total:
+                i = next_i
+                next_i += 1
+                method, url, kwargs = request(i)
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(method, url, **kwargs)
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - t0
+
+
+def run_http(args, data: Data) -> List[dict]:
+    given = {"nlp": args.nlp_url, "cf": args.cf_url, "placement": args.placement_url}
+    needed = {"parse": "nlp", "recommendations": "cf", "predict": "placement"}
+    keys = [needed[t] for t in args.targets]
+    to_spawn = [k for k in keys if not given[k]]
+    procs = spawn_services(to_spawn, data.env()) if to_spawn else {}
+    urls = {**{k: v.rstrip("/") for k, v in given.items() if v}, **{k: url for k, (_, url) in procs.items()}}
+    results = []
+    try:
+        for name, request in http_scenarios(args, data, urls).items():
+            for concurrency in args.concurrency:
+                latencies, errors, wall = asyncio.run(drive(request, args.requests, concurrency, args.warmup))
+                results.append(summarize(name, "http", concurrency, latencies, errors, wall))
+                print_row(results[-1])
+    finally:
+        stop_services(procs)
+    return results
+
+
+# --- reporting --------------------------------------------------------------
+
+def print_row(r: dict) -> None:
+    lat = r["latency_ms"]
+    print(
+        f"{r['name']:<28}{r['mode']:>10}{r['concurrency']:>6}{r['count']:>7}{r['errors']:>5}"
+        f"{r['throughput_rps']:>11}{lat['p50']:>10}{lat['p95']:>10}{lat['p99']:>10}",
+        flush=True,
+    )
+
+
+def print_header() -> None:
+    print(f"{'scenario':<28}{'mode':>10}{'conc':>6}{'count':>7}{'err':>5}{'req/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path: str, current_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["mode"], r["concurrency"]): r for r in json.load(f)["results"]}
+    with open(current_path, "r", encoding="utf-8") as f:
+        current = json.load(f)["results"]
+
+    def delta(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100.0:+.1f}%" if old else "n/a"
+
+    print(f"{'scenario':<28}{'mode':>10}{'conc':>6}{'p50 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    for r in current:
+        old = baseline.get((r["name"], r["mode"], r["concurrency"]))
+        if old is None:
+            continue
+        cells = [
+            f"{r['latency_ms'][k]} ({delta(old['latency_ms'][k], r['latency_ms'][k])})" for k in ("p50", "p99")
+        ] + [f"{r['throughput_rps']} ({delta(old['throughput_rps'], r['throughput_rps'])})"]
+        print(f"{r['name']:<28}{r['mode']:>10}{r['concurrency']:>6}" + "".join(f"{c:>18}" for c in cells))
+
+
+def csv_list(kind: Callable = str):
+    return lambda value: [kind(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--mode", choices=["inprocess", "http", "both"], default="inprocess")
+    ap.add_argument("--targets", type=csv_list(), default=list(TARGETS), help="parse,recommendations,predict")
+    ap.add_argument("--requests", type=int, default=200, help="timed requests per scenario (and concurrency level)")
+    ap.add_argument("--warmup", type=int, default=10)
+    ap.add_argument("--concurrency", type=csv_list(int), default=[1, 8, 32])
+    ap.add_argument("--formats", type=csv_list(), default=["txt", "pdf", "docx"])
+    ap.add_argument("--sizes", type=csv_list(), default=list(synth.RESUME_SIZES))
+    ap.add_argument("--scoring", type=csv_list(), default=["overlap", "tfidf"])
+    ap.add_argument("--variants", type=int, default=5, help="distinct resumes per format/size")
+    ap.add_argument("--corpus-size", type=int, default=2000)
+    ap.add_argument("--catalog-size", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--nlp-url")
+    ap.add_argument("--cf-url")
+    ap.add_argument("--placement-url")
+    ap.add_argument("--out", help="result file (default benchmarks/results/services-<utc time>.json)")
+    ap.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        ap.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="bench-services-") as workdir:
+        data = Data(args, workdir)
+        print_header()
+        results = []
+        if args.mode in ("inprocess", "both"):
+            results += run_inprocess(args, data)
+        if args.mode in ("http", "both"):
+            results += run_http(args, data)
+
+    out = args.out or os.path.join(BENCH_DIR, "results", time.strftime("services-%Y%m%dT%H%M%SZ.json", time.gmtime()))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k != "compare"},
+        },
+        "results": results,
+    }
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
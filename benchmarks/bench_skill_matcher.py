@@ -0,0 +1,130 @@
+"""Benchmark: resume-nlp skill matching, per-skill regex loop vs. one-pass automaton.
+
+Run from the repo root:
+
+    python benchmarks/bench_skill_matcher.py [--repeat 20]
+
+For corpus sizes of 500, 5k and 50k entries it reports the per-resume latency
+of both engines and checks that they return identical skills.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLP_DIR = os.path.join(ROOT, "ml-service", "resume-nlp")
+sys.path.insert(0, NLP_DIR)
+
+from skill_matcher import SkillMatcher  # noqa: E402
+
+SHORT_SKILL_WHITELIST = {"c", "go", "r"}
+SIZES = (500, 5_000, 50_000)
+FILLER = (
+    "designed implemented maintained services for the team using modern tooling "
+    "improved latency reduced cost mentored interns led migration of legacy systems"
+).split()
+
+
+def load_base_corpus():
+    with open(os.path.join(NLP_DIR, "skill_corpus.txt"), "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def synth_corpus(base, size, rng):
+    corpus = list(base[:size])
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "zo", "vex", "dyn", "qor", "sha", "pli"]
+    while len(corpus) < size:
+        words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 3))]
+        name = " ".join(words)
+        if rng.random() < 0.3:
+            name = name.title()
+        if rng.random() < 0.1:
+            name += rng.choice([".js", "++", " SDK", "DB"])
+        corpus.append(name)
+    return corpus
+
+
+def synth_resume(corpus, rng, words=900):
+    out = ["John Doe", "\nSUMMARY", "Backend engineer."]
+    out.append("\nSKILLS")
+    out.extend(rng.choice(corpus) for _ in range(40))
+    out.append("\nEXPERIENCE")
+    for _ in range(words):
+        out.append(rng.choice(corpus) if rng.random() < 0.05 else rng.choice(FILLER))
+    return " ".join(out)
+
+
+def regex_patterns(corpus):
+    patterns = []
+    for s in sorted(corpus, key=lambda x: len(x), reverse=True):
+        sl = s.strip()
+        if not sl:
+            continue
+        if len(sl) < 2 and sl.lower() not in SHORT_SKILL_WHITELIST:
+            continue
+        pattern = re.compile(rf"(?<![A-Za-z0-9]){re.escape(sl)}(?![A-Za-z0-9])", re.IGNORECASE)
+        patterns.append((s, pattern))
+    return patterns
+
+
+def regex_match(patterns, text):
+    found_ordered = []
+    seen = set()
+    for _, pattern in patterns:
+        m = pattern.search(text)
+        if m:
+            resume_case = m.group(0)
+            key = resume_case.lower()
+            if key not in seen:
+                seen.add(key)
+                found_ordered.append((m.start(), resume_case))
+    found_ordered.sort(key=lambda x: x[0])
+    return found_ordered
+
+
+def timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = load_base_corpus()
+    print(f"{'corpus':>8} {'build regex ms':>15} {'build ac ms':>12} {'regex ms/resume':>16} {'ac ms/resume':>13} {'speedup':>8}")
+    for size in SIZES:
+        corpus = synth_corpus(base, size, rng)
+        text = synth_resume(corpus, rng)
+
+        t0 = time.perf_counter()
+        patterns = regex_patterns(corpus)
+        build_regex = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        matcher = SkillMatcher(corpus, SHORT_SKILL_WHITELIST)
+        build_ac = (time.perf_counter() - t0) * 1000.0
+
+        expected = regex_match(patterns, text)
+        actual = matcher.match(text)
+        if expected != actual:
+            raise SystemExit(f"output mismatch at corpus size {size}")
+
+        # The regex loop gets slow at 50k entries; fewer repeats keep the run short
+        regex_ms = timeit(lambda: regex_match(patterns, text), max(1, args.repeat // (size // 500)))
+        ac_ms = timeit(lambda: matcher.match(text), args.repeat)
+        print(f"{size:>8} {build_regex:>15.1f} {build_ac:>12.1f} {regex_ms:>16.2f} {ac_ms:>13.2f} {regex_ms / ac_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark: memory of multi-worker services with private vs shared (memory-mapped) indexes.
+
+Run from the repo root (Linux; reads /proc/<pid>/smaps_rollup):
+
+    python benchmarks/bench_workers.py [--workers 1,4] [--corpus 50000] [--catalog 200000]
+
+Each service is started twice per worker count with a large synthetic skill
+corpus (resume-nlp) or job catalog (collaborative-filter):
+
+- private: `uvicorn main:app --workers N`, every worker builds its own copy
+- shared: the same with SNAPSHOT_DIR set, so the structures are published
+  once to a snapshot file in SNAPSHOT_DIR and every worker maps it
+
+After warm-up requests it reports the summed RSS and PSS of the worker
+processes (PSS charges shared pages 1/N to each worker, so it is the real
+footprint), then reloads and checks that every following response comes from
+the new version (one distinct version expected; "old" means a worker kept
+serving the previous one).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synth  # noqa: E402
+
+SERVICES = {"resume-nlp": os.path.join(ROOT, "ml-service", "resume-nlp"),
+            "collaborative-filter": os.path.join(ROOT, "ml-service", "collaborative-filter")}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory(pid: int) -> tuple:
+    """(rss, pss) in bytes of one process."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1]) * 1024
+    return values["Rss:"], values["Pss:"]
+
+
+def children(pid: int) -> list:
+    out = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+    return [int(p) for p in out.split()]
+
+
+def wait_ready(url: str, path: str, timeout: float = 300.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url + path, timeout=5).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def run(service: str, workers: int, shared: bool, files: dict, rng: random.Random) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    snapshot_dir = tempfile.mkdtemp(prefix="bench-workers-")
+    env = {**os.environ, "SKILL_CORPUS_PATH": files["corpus"], "JOB_CATALOG_PATH": files["catalog"],
+           "CORPUS_WATCH_INTERVAL_SECONDS": "0", "LOG_LEVEL": "WARNING", "SNAPSHOT_DIR": snapshot_dir if shared else ""}
+    # main.py binds a fixed port, so both modes use uvicorn's launcher; SNAPSHOT_DIR alone decides sharing
+    env.pop("WEB_CONCURRENCY", None)
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=SERVICES[service], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        t0 = time.perf_counter()
+        ready = "/ready" if service == "resume-nlp" else "/health"
+        wait_ready(url, ready)
+        with httpx.Client(base_url=url, timeout=60) as client:
+            # Every worker must have loaded its structures before memory is read
+            for _ in range(40 * workers):
+                if service == "resume-nlp":
+                    text = synth.resume_text(rng, files["corpus_list"][:3000], "medium")
+                    client.post("/parse", files={"file": ("r.txt", text.encode(), "text/plain")}).raise_for_status()
+                else:
+                    skills = rng.sample(files["corpus_list"][:3000], 8)
+                    client.post("/recommendations", json={"skills": skills}).raise_for_status()
+            startup = time.perf_counter() - t0
+            pids = children(proc.pid) if workers > 1 else [proc.pid]
+            rss = pss = 0
+            for pid in pids:
+                r, p = memory(pid)
+                rss, pss = rss + r, pss + p
+
+            # Change the file and reload once: every worker must answer from the new version
+            key = "corpus_version" if service == "resume-nlp" else "catalog_version"
+            before = client.get("/diagnostics").json()[key]
+            edit(service, files)
+            client.post("/reload-corpus" if service == "resume-nlp" else "/reload-catalog").raise_for_status()
+            versions = {client.get("/diagnostics").json()[key] for _ in range(20 * workers)}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        write_inputs(files)
+    if before in versions:
+        versions = versions - {before} | {"old"}
+    return {"rss": rss, "pss": pss, "startup": startup, "versions": sorted(versions)}
+
+
+def write_inputs(files: dict) -> None:
+    with open(files["corpus"], "w", encoding="utf-8") as f:
+        f.write("\n".join(files["corpus_list"]) + "\n")
+    with open(files["catalog"], "w", encoding="utf-8") as f:
+        json.dump(files["catalog_dict"], f)
+
+
+def edit(service: str, files: dict) -> None:
+    if service == "resume-nlp":
+        with open(files["corpus"], "a", encoding="utf-8") as f:
+            f.write("benchmark skill\n")
+    else:
+        with open(files["catalog"], "w", encoding="utf-8") as f:
+            json.dump({**files["catalog_dict"], "Benchmark Engineer": ["python", "sql"]}, f)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", default="1,4")
+    ap.add_argument("--corpus", type=int, default=50000, help="skill corpus entries (resume-nlp)")
+    ap.add_argument("--catalog", type=int, default=200000, help="job catalog entries (collaborative-filter)")
+    ap.add_argument("--services", default="resume-nlp,collaborative-filter")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-workers-data-")
+    corpus = synth.skill_corpus(args.corpus, args.seed)
+    files = {"corpus": os.path.join(workdir, "corpus.txt"), "catalog": os.path.join(workdir, "catalog.json"),
+             "corpus_list": corpus, "catalog_dict": synth.job_catalog(args.catalog, corpus[:5000], args.seed)}
+    write_inputs(files)
+
+    print(f"{'service':<21} {'workers':>7} {'mode':<8} {'RSS MB':>8} {'PSS MB':>8} {'ready s':>8}  versions after reload")
+    try:
+        for service in args.services.split(","):
+            for n in (int(w) for w in args.workers.split(",")):
+                for shared in ((False,) if n == 1 else (False, True)):
+                    r = run(service, n, shared, files, random.Random(args.seed))
+                    print(
+                        f"{service:<21} {n:>7} {'shared' if shared else 'private':<8} {r['rss'] / 2**20:>8.1f}"
+                        f" {r['pss'] / 2**20:>8.1f} {r['startup']:>8.1f}  {r['versions']}"
+                    )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
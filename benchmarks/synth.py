@@ -0,0 +1,151 @@
+"""Synthetic, seeded inputs for the ML service benchmarks.
+
+Everything here is generated offline from a seed, so two runs on different
+machines (or commits) see byte-identical resumes, catalogs and corpora:
+
+- skill corpora: the real resume-nlp corpus plus generated one- and
+  multi-word skills up to the requested size
+- job catalogs: titles with 3-10 Zipf-distributed tags drawn from a corpus
+- resumes: text in sections (skills, projects, experience, education) sized
+  small / medium / large, rendered as .txt, .pdf (text layer, multi-page)
+  or .docx
+"""
+import io
+import os
+import random
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PATH = os.path.join(ROOT, "ml-service", "resume-nlp", "skill_corpus.txt")
+
+# Approximate resume length in lines of body text
+RESUME_SIZES = {"small": 40, "medium": 160, "large": 700}
+
+WORDS = (
+    "built designed scalable service pipeline dashboard reduced latency improved accuracy deployed "
+    "students users realtime model data team weekly automated reports migrated legacy monolith cloud "
+    "mentored interns led sprint reviews tested integration api throughput caching queue search"
+).split()
+SUFFIXES = ["js", "db", "ml", "ops", "kit", "flow", "stack", "hub", "lab", "cloud"]
+
+
+def base_corpus() -> List[str]:
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def skill_corpus(size: int, seed: int = 0) -> List[str]:
+    """The shipped corpus, padded with generated skills (or cut) to `size` entries."""
+    rng = random.Random(seed)
+    corpus = base_corpus()[:size]
+    seen = {s.lower() for s in corpus}
+    while len(corpus) < size:
+        stem = rng.choice(WORDS).title()
+        skill = f"{stem}{rng.choice(SUFFIXES)}{rng.randint(1, 999)}"
+        if rng.random() < 0.3:
+            skill = f"{stem} {rng.choice(WORDS)} {rng.choice(SUFFIXES)}"
+        if skill.lower() not in seen:
+            seen.add(skill.lower())
+            corpus.append(skill)
+    return corpus
+
+
+def zipf_choices(rng: random.Random, population: List[str], k: int, s: float = 1.1) -> List[str]:
+    weights = [1.0 / (i + 1) ** s for i in range(len(population))]
+    return rng.choices(population, weights=weights, k=k)
+
+
+def job_catalog(size: int, corpus: List[str], seed: int = 0) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    tags = [s.lower() for s in corpus]
+    return {f"Job {i} {rng.choice(WORDS).title()}": sorted(set(zipf_choices(rng, tags, rng.randint(3, 10)))) for i in range(size)}
+
+
+def sentence(rng: random.Random, lo: int = 6, hi: int = 16) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def resume_text(rng: random.Random, corpus: List[str], size: str = "medium") -> str:
+    body = RESUME_SIZES[size]
+    skills = zipf_choices(rng, corpus, rng.randint(8, 25))
+    lines = [f"Candidate {rng.randint(1, 99999)}", "candidate@example.com | +91 90000 00000", "", "SUMMARY", sentence(rng), ""]
+    lines += ["Technical Skills", ", ".join(dict.fromkeys(skills)), ""]
+    lines.append("PROJECTS")
+    while len(lines) < body * 0.6:
+        lines.append(f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Platform - {sentence(rng, 4, 8)}")
+        for _ in range(rng.randint(2, 4)):
+            extra = rng.choice(corpus) if rng.random() < 0.5 else ""
+            lines.append(f"- {sentence(rng)} {extra}".rstrip())
+    lines += ["", "EXPERIENCE"]
+    while len(lines) < body:
+        lines.append(f"- {sentence(rng)}")
+    lines += ["", "EDUCATION", "B.Tech Computer Science, 2024"]
+    return "\n".join(lines) + "\n"
+
+
+def _pdf_escape(line: str) -> str:
+    return line.encode("latin-1", "replace").decode("latin-1").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_pdf(lines: List[str], lines_per_page: int = 50) -> bytes:
+    """PDF with a real text layer (Helvetica), paginated, no external deps."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    n = len(pages)
+    # Objects: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(n)) + b"] /Count %d >>" % n,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, page_lines in enumerate(pages):
+        ops = ["BT", "/F1 10 Tf", "13 TL", "60 750 Td"] + [f"({_pdf_escape(l)}) Tj T*" for l in page_lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+            % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def docx_bytes(lines: List[str]) -> bytes:
+    import docx
+    doc = docx.Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def resume_file(rng: random.Random, corpus: List[str], size: str, fmt: str) -> bytes:
+    text = resume_text(rng, corpus, size)
+    if fmt == "txt":
+        return text.encode("utf-8")
+    if fmt == "pdf":
+        return text_pdf(text.splitlines())
+    if fmt == "docx":
+        return docx_bytes(text.splitlines())
+    raise ValueError(f"unknown resume format {fmt!r}")
+
+
+def student_payload(rng: random.Random, corpus: List[str]) -> dict:
+    return {
+        "skills": zipf_choices(rng, corpus, rng.randint(3, 20)),
+        "cgpa": round(rng.uniform(5.5, 9.8), 2),
+        "department": rng.choice(["CSE", "IT", "ECE", "EEE", "MECH", "CIVIL"]),
+        "projects": rng.randint(0, 6),
+        "internships": rng.randint(0, 3),
+        "aptitude_score": rng.randint(40, 100),
+        "interview_score": rng.randint(40, 100),
+    }
@@ -33,9 +33,26 @@ CREATE TABLE student_job_interactions (
 CREATE TABLE placement_predictions (
     id SERIAL PRIMARY KEY,
     student_id INT REFERENCES students(id),
-    probability FLOAT
+    probability FLOAT,
+    -- Set by the placement-predict materialization job
+    inputs_hash VARCHAR(32),
+    computed_at DOUBLE PRECISION
 );
 
+CREATE INDEX placement_predictions_student ON placement_predictions (student_id);
+
+-- Top-K recommendations precomputed by collaborative-filter/materialize.py
+CREATE TABLE student_job_recommendations (
+    student_id INT NOT NULL REFERENCES students(id),
+    scoring VARCHAR(16) NOT NULL,
+    rank INT NOT NULL,
+    job_title VARCHAR(255) NOT NULL,
+    inputs_hash VARCHAR(32) NOT NULL,
+    computed_at DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX student_job_recommendations_student ON student_job_recommendations (student_id, scoring);
+
 CREATE TABLE IF NOT EXISTS students (
   id SERIAL PRIMARY KEY,
   name VARCHAR(100),
@@ -0,0 +1,283 @@
+"""Implicit-feedback matrix factorization (ALS) over student_job_interactions.
+
+Training follows Hu, Koren & Volinsky: every observed (student, job) pair has
+preference 1 and confidence 1 + alpha * score, unobserved pairs preference 0
+and confidence 1. Each half-step solves all students (then all jobs) at once
+with a few conjugate-gradient steps (Takacs et al.), so a step is a handful
+of sparse x dense products over the interaction matrix instead of one
+factors x factors solve per row. Rows are split into chunks of about
+CHUNK_NNZ interactions, solved on a thread pool; NumPy and SciPy release the
+GIL for the heavy parts.
+
+A trained model is a directory of .npy files (item factors, student factors,
+student ids) plus items.json (job titles, the item order). `save` writes each
+model into a new version directory inside the model directory and then
+atomically replaces the small `current` pointer file naming it, as
+mmap_snapshot.SnapshotChannel does for snapshots, so a concurrent load sees
+one whole model, old or new, never a mix of files. `AlsModel.load`
+memory-maps the factor arrays, so workers share the pages and startup does
+not copy them. `top_k` scores every item with one matrix-vector product;
+`IvfIndex` is the optional approximate search for large catalogs: items are
+clustered with k-means and a query only scores the items of the `nprobe`
+clusters whose centroids score highest.
+"""
+import contextlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Interactions per solver chunk; bounds the gathered factor rows to CHUNK_NNZ x factors floats
+CHUNK_NNZ = 1 << 18
+
+_FILES = ("item_factors.npy", "user_factors.npy", "students.npy", "items.json")
+# Pointer file naming the current version directory; without it the files sit in the model directory itself
+_POINTER = "current"
+# Superseded versions kept for loads that read the pointer just before it moved
+_KEEP = 2
+
+
+def interaction_matrix(
+    triples: Sequence[Tuple[int, str, Optional[float]]], items: Sequence[str] = (),
+) -> Tuple[sparse.csr_matrix, np.ndarray, List[str]]:
+    """(students x items matrix of summed scores, sorted student ids, item titles) from
+    (student_id, job title, score) rows. Items start as `items` (catalog order); titles
+    not in it are appended. A NULL score counts as 1, negative scores as 0."""
+    item_ids: Dict[str, int] = {}
+    titles = list(items)
+    for t in titles:
+        item_ids.setdefault(t, len(item_ids))
+    rows, cols, vals = [], [], []
+    for sid, title, score in triples:
+        col = item_ids.get(title)
+        if col is None:
+            col = item_ids[title] = len(titles)
+            titles.append(title)
+        rows.append(sid)
+        cols.append(col)
+        vals.append(1.0 if score is None else max(float(score), 0.0))
+    students, user_rows = np.unique(np.asarray(rows, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.asarray(vals, dtype=np.float32), (user_rows, np.asarray(cols, dtype=np.int64))),
+        shape=(len(students), len(titles)),
+    )
+    matrix.sum_duplicates()
+    return matrix, students, titles
+
+
+def _chunks(indptr: np.ndarray) -> List[Tuple[int, int]]:
+    """Row ranges holding about CHUNK_NNZ interactions each."""
+    bounds = np.searchsorted(indptr, np.arange(0, indptr[-1], CHUNK_NNZ), side="right") - 1
+    starts = sorted(set(bounds.tolist()) | {0})
+    ends = starts[1:] + [len(indptr) - 1]
+    return [(lo, hi) for lo, hi in zip(starts, ends) if hi > lo]
+
+
+def _solve(conf: sparse.csr_matrix, x: np.ndarray, y: np.ndarray, gram: np.ndarray, cg_steps: int, pool) -> None:
+    """Update x in place: min sum c_ui (p_ui - x_u.y_i)^2 + reg |x_u|^2, gram = Y'Y + reg I."""
+
+    def run(bounds: Tuple[int, int]) -> None:
+        lo, hi = bounds
+        block = conf[lo:hi]
+        n = hi - lo
+        rows = np.repeat(np.arange(n), np.diff(block.indptr))
+        yg = y[block.indices]
+        extra = block.data - 1.0
+
+        def apply(v: np.ndarray) -> np.ndarray:
+            # (Y'Y + reg I) v + sum over observed items of (c - 1) (y_i . v) y_i
+            w = np.einsum("nf,nf->n", yg, v[rows]) * extra
+            return v @ gram + sparse.csr_matrix((w, block.indices, block.indptr), shape=block.shape) @ y
+
+        xb = x[lo:hi]
+        # Right-hand side: sum of c_ui y_i over observed items
+        r = block @ y - apply(xb)
+        p = r.copy()
+        rs = np.einsum("nf,nf->n", r, r)
+        for _ in range(cg_steps):
+            ap = apply(p)
+            denom = np.einsum("nf,nf->n", p, ap)
+            step = np.divide(rs, denom, out=np.zeros_like(rs), where=denom > 0)
+            xb += step[:, None] * p
+            r -= step[:, None] * ap
+            rs_new = np.einsum("nf,nf->n", r, r)
+            beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+            p = r + beta[:, None] * p
+            rs = rs_new
+        x[lo:hi] = xb
+
+    list(pool.map(run, _chunks(conf.indptr)))
+
+
+def train(
+    interactions: sparse.csr_matrix,
+    factors: int = 64,
+    regularization: float = 0.05,
+    alpha: float = 40.0,
+    iterations: int = 15,
+    cg_steps: int = 3,
+    threads: int = 0,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(user factors, item factors), float32, from a users x items matrix of interaction scores."""
+    rng = np.random.default_rng(seed)
+    n_users, n_items = interactions.shape
+    conf = interactions.tocsr().astype(np.float32)
+    conf.data = 1.0 + alpha * conf.data
+    conf_t = conf.T.tocsr()
+    x = (rng.standard_normal((n_users, factors)) * 0.01).astype(np.float32)
+    y = (rng.standard_normal((n_items, factors)) * 0.01).astype(np.float32)
+    reg = np.eye(factors, dtype=np.float32) * regularization
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count() or 1) as pool:
+        for _ in range(iterations):
+            _solve(conf, x, y, y.T @ y + reg, cg_steps, pool)
+            _solve(conf_t, y, x, x.T @ x + reg, cg_steps, pool)
+    return x, y
+
+
+def save(path: str, user_factors: np.ndarray, item_factors: np.ndarray, students: np.ndarray, items: Sequence[str]) -> str:
+    """Write a new model version under `path` and make it current; returns its directory."""
+    os.makedirs(path, exist_ok=True)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    # Filled under a temporary name, so no reader can follow the pointer into a partial version
+    tmp_dir = os.path.join(path, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+    try:
+        arrays = {"item_factors.npy": item_factors, "user_factors.npy": user_factors, "students.npy": students}
+        for name, values in arrays.items():
+            with open(os.path.join(tmp_dir, name), "wb") as f:
+                np.save(f, np.ascontiguousarray(values))
+        with open(os.path.join(tmp_dir, "items.json"), "w", encoding="utf-8") as f:
+            json.dump(list(items), f)
+        os.rename(tmp_dir, os.path.join(path, version))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    pointer = os.path.join(path, _POINTER)
+    tmp = f"{pointer}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, pointer)
+    _prune(path, version)
+    return os.path.join(path, version)
+
+
+def _prune(path: str, current: str) -> None:
+    versions = sorted(d for d in os.listdir(path) if d.startswith("v") and d != current)
+    for d in versions[:max(0, len(versions) - _KEEP)]:
+        shutil.rmtree(os.path.join(path, d), ignore_errors=True)
+
+
+def model_files(path: str) -> str:
+    """Directory holding the current model's files: the version the pointer names, else `path` itself."""
+    with contextlib.suppress(FileNotFoundError):
+        with open(os.path.join(path, _POINTER), "r", encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+class IvfIndex:
+    """Inverted-file index over item factors for approximate maximum inner product search."""
+
+    def __init__(self, item_factors: np.ndarray, n_lists: Optional[int] = None, iterations: int = 8, seed: int = 0):
+        n = len(item_factors)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        # k-means on a sample; every item is then assigned to its nearest centroid
+        sample = item_factors[np.sort(rng.choice(n, size=min(n, 64 * n_lists), replace=False))]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].astype(np.float32)
+        for _ in range(iterations):
+            labels = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+        labels = self._nearest(item_factors, centroids)
+        # Items reordered by cluster so a probe reads one contiguous block per cluster
+        self.order = np.argsort(labels, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=n_lists))))
+        self.factors = np.ascontiguousarray(item_factors[self.order])
+        self.centroids = centroids
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(points), dtype=np.int64)
+        c2 = np.einsum("kf,kf->k", centroids, centroids)
+        for lo in range(0, len(points), 65536):
+            block = np.asarray(points[lo:lo + 65536], dtype=np.float32)
+            out[lo:lo + len(block)] = np.argmin(c2 - 2.0 * block @ centroids.T, axis=1)
+        return out
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(item ids, scores) of the best k items among the nprobe most promising clusters."""
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        spans = [np.arange(self.offsets[c], self.offsets[c + 1]) for c in probe]
+        candidates = np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+        scores = self.factors[candidates] @ query
+        best = _top(scores, k)
+        return self.order[candidates[best]], scores[best]
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first (ties to the lower position)."""
+    if k <= 0 or not len(scores):
+        return np.empty(0, dtype=np.int64)
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.lexsort((part, -scores[part]))]
+
+
+class AlsModel:
+    def __init__(
+        self, user_factors: np.ndarray, item_factors: np.ndarray, students: np.ndarray, items: Sequence[str],
+        ann_min_items: int = 0, nprobe: int = 8,
+    ):
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.students = students
+        self.items = list(items)
+        self.nprobe = nprobe
+        self.ivf = IvfIndex(item_factors) if 0 < ann_min_items <= len(items) else None
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "AlsModel":
+        for attempt in range(3):
+            files = model_files(path)
+            try:
+                arrays = [np.load(os.path.join(files, name), mmap_mode="r") for name in _FILES[:3]]
+                with open(os.path.join(files, _FILES[3]), "r", encoding="utf-8") as f:
+                    items = json.load(f)
+                break
+            except FileNotFoundError:
+                # Pruned between reading the pointer and opening the files: a newer version is current
+                if files == path or attempt == 2:
+                    raise
+        item_factors, user_factors, students = arrays
+        if len(item_factors) != len(items) or len(user_factors) != len(students):
+            raise ValueError(f"{path}: factor rows do not match items.json / students.npy")
+        return cls(user_factors, item_factors, students, items, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def user_vector(self, student_id: int) -> Optional[np.ndarray]:
+        i = int(np.searchsorted(self.students, student_id))
+        if i < len(self.students) and self.students[i] == student_id:
+            return np.asarray(self.user_factors[i], dtype=np.float32)
+        return None
+
+    def top_k(self, user: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(item ids, scores) best first; approximate when the IVF index is built."""
+        if self.ivf is not None:
+            return self.ivf.search(user, k, self.nprobe)
+        scores = self.item_factors @ user
+        best = _top(scores, k)
+        return best, scores[best]
@@ -0,0 +1,187 @@
+"""Inverted index over the job catalog.
+
+Built once per catalog load so a recommendation request only touches jobs
+that share at least one skill with the user instead of scanning the catalog.
+
+Skills are interned into a SkillVocab (ml-service/shared/skill_vocab.py):
+each job's tags are a sorted run of uint32 skill ids in one flat TagSets, and
+the postings (skill id -> job ids) are its inversion in the same layout, so
+the index holds no per-job Python objects beyond the job name. Queries are
+id arrays from `vocab.encode`.
+
+Overlaps are counted with bitsets over all jobs instead of a per-job
+counter: each query skill's jobs are added into bit-sliced counters (plane i
+holds bit i of every job's overlap), a few big-int ANDs/XORs per skill. Jobs
+are then read off one overlap level at a time, highest first, so only the
+levels that reach the top n are ever expanded into job ids. Skills listed by
+at least 1 in DENSE_RATIO jobs keep their bitset; rarer ones are built from
+their postings per query.
+
+`to_sections` / `from_snapshot` move a built index through a shared snapshot
+file (ml-service/shared/mmap_snapshot.py): the tag sets, postings, tag
+counts and dense bitsets are used in place from the mapping, and a dense
+bitset becomes an int only while a query uses it.
+"""
+import heapq
+from array import array
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from skill_vocab import SkillVocab, TagSets, bitset, members
+
+MIN_OVERLAP = 2
+# A bitset costs n_jobs bits and a posting 32, so past this density the bitset is smaller
+DENSE_RATIO = 32
+
+
+def encode_catalog(catalog: Dict[str, List[str]], vocab: Optional[SkillVocab] = None) -> Tuple[List[str], SkillVocab, TagSets]:
+    """(job names, vocabulary, job tag sets) for a {job: [tags]} catalog."""
+    vocab = vocab if vocab is not None else SkillVocab()
+    tags = TagSets.from_sets(vocab.encode(job_tags, intern=True) for job_tags in catalog.values())
+    return list(catalog.keys()), vocab, tags
+
+
+class MappedBitsets(Mapping[int, int]):
+    """Skill id -> bitset, each stored as a fixed-width little-endian row of a buffer."""
+
+    def __init__(self, ids: Sequence[int], rows: memoryview, row_bytes: int):
+        self._rows = {s: k for k, s in enumerate(ids)}
+        self._buf = rows
+        self.row_bytes = row_bytes
+
+    def __getitem__(self, s: int) -> int:
+        k = self._rows[s]
+        return int.from_bytes(self._buf[k * self.row_bytes:(k + 1) * self.row_bytes], "little")
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._rows) * self.row_bytes
+
+
+class CatalogIndex:
+    def __init__(self, jobs: Sequence[str], vocab: SkillVocab, tags: TagSets):
+        self.jobs = jobs
+        self.vocab = vocab
+        self.tags = tags
+        # The mapped file behind from_snapshot indexes
+        self.snapshot = None
+        # Distinct tags per job, the ratio denominator
+        self.tag_counts = tags.sizes()
+        self.postings = postings = tags.invert(len(vocab))
+        n = len(jobs)
+        self.dense: Dict[int, int] = {
+            s: bitset(postings[s], n) for s in range(len(postings)) if postings.size(s) * DENSE_RATIO >= n > 0
+        }
+
+    @classmethod
+    def from_catalog(cls, catalog: Dict[str, List[str]]) -> "CatalogIndex":
+        return cls(*encode_catalog(catalog))
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the tag sets, postings and tag counts."""
+        if isinstance(self.dense, MappedBitsets):
+            dense = self.dense.nbytes
+        else:
+            dense = sum((n.bit_length() + 7) // 8 for n in self.dense.values())
+        return self.tags.nbytes + self.postings.nbytes + 4 * len(self.tag_counts) + dense
+
+    def to_sections(self) -> Dict[str, Any]:
+        """Arrays for a snapshot file; `from_snapshot` serves from them without rebuilding."""
+        row_bytes = (len(self.jobs) + 7) // 8
+        dense_ids = sorted(self.dense)
+        return {
+            "jobs": list(self.jobs),
+            "vocab": self.vocab.names,
+            "tags.offsets": array("I", self.tags.offsets), "tags.ids": array("I", self.tags.ids),
+            "postings.offsets": array("I", self.postings.offsets), "postings.ids": array("I", self.postings.ids),
+            "tag_counts": array("I", self.tag_counts),
+            "dense.ids": array("I", dense_ids),
+            "dense.rows": b"".join(self.dense[s].to_bytes(row_bytes, "little") for s in dense_ids),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, jobs: Optional[Sequence[str]] = None,
+                      vocab: Optional[SkillVocab] = None) -> "CatalogIndex":
+        """An index over the sections of a mapped snapshot (jobs and vocab may be shared with a TfidfIndex)."""
+        index = cls.__new__(cls)
+        index.snapshot = snapshot
+        index.jobs = jobs if jobs is not None else snapshot.strings("jobs")
+        index.vocab = vocab if vocab is not None else SkillVocab(snapshot.strings("vocab"))
+        index.tags = TagSets(snapshot.array("tags.offsets"), snapshot.array("tags.ids"))
+        index.postings = TagSets(snapshot.array("postings.offsets"), snapshot.array("postings.ids"))
+        index.tag_counts = snapshot.array("tag_counts")
+        index.dense = MappedBitsets(snapshot.array("dense.ids"), snapshot.buffer("dense.rows"), (len(index.jobs) + 7) // 8)
+        return index
+
+    def levels(self, skill_ids: Sequence[int]) -> Iterator[Tuple[int, int]]:
+        """(overlap, bitset of the jobs with exactly that overlap), highest first, down to MIN_OVERLAP."""
+        postings, dense, n = self.postings, self.dense, len(self.jobs)
+        planes: List[int] = []
+        added = 0
+        for s in skill_ids:
+            if s >= len(postings) or not postings.size(s):
+                continue
+            carry = dense.get(s)
+            if carry is None:
+                carry = bitset(postings[s], n)
+            added += 1
+            # Ripple-carry add of one bit per job into the counter planes
+            for i in range(len(planes)):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+                if not carry:
+                    break
+            if carry:
+                planes.append(carry)
+        if added < MIN_OVERLAP:
+            return
+        # Overlap >= 2 means some plane above the lowest is set
+        remaining = 0
+        for p in planes[1:]:
+            remaining |= p
+        everyone = (1 << n) - 1
+        # The planes can only hold counts below 2 ** len(planes)
+        for count in range(min(added, (1 << len(planes)) - 1), MIN_OVERLAP - 1, -1):
+            if not remaining:
+                return
+            mask = remaining
+            for i, p in enumerate(planes):
+                mask &= p if count >> i & 1 else everyone ^ p
+                if not mask:
+                    break
+            if mask:
+                remaining ^= mask
+                yield count, mask
+
+    def score(self, skill_ids: Sequence[int]) -> List[Tuple[int, int]]:
+        """(job id, overlap) for jobs sharing at least MIN_OVERLAP skills."""
+        return [(j, count) for count, mask in self.levels(skill_ids) for j in members(mask)]
+
+    def top_n(self, skill_ids: Sequence[int], n: int) -> List[str]:
+        """Job names ranked by overlap, then overlap / tag count, then catalog order."""
+        tag_counts = self.tag_counts
+
+        # Within one overlap level a higher ratio is a smaller tag count
+        def rank(j: int) -> Tuple[int, int]:
+            return (tag_counts[j], j)
+
+        best: List[int] = []
+        for _, mask in self.levels(skill_ids):
+            level = members(mask)
+            need = n - len(best)
+            if 0 < need < len(level):
+                best.extend(heapq.nsmallest(need, level, key=rank))
+            else:
+                best.extend(sorted(level, key=rank))
+            if 0 < n <= len(best):
+                break
+        # n <= 0 keeps list-slice semantics over the full ranking
+        return [self.jobs[j] for j in best[:n]]
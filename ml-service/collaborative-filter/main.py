@@ -1,8 +1,34 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import uvicorn
-from typing import List, Dict
-import os, json, logging
+from typing import List, Dict, Literal, Optional
+import os, sys, json, hashlib, logging, tempfile
+
+# Code shared by the ML services lives in ml-service/shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from executor_policy import ExecutionPolicy, install as install_executor_policy
+from instrumentation import Metrics
+from mmap_snapshot import SnapshotChannel
+from rec_store import RecStore, inputs_hash
+from skill_vocab import SkillVocab, members, normalize, overlap
+
+from catalog_index import CatalogIndex, encode_catalog
+
+# Optional TF-IDF scoring (NumPy/SciPy)
+try:
+    from tfidf_index import TfidfIndex
+    TFIDF_AVAILABLE = True
+except Exception:
+    TFIDF_AVAILABLE = False
+
+# Optional collaborative filtering from student_job_interactions (NumPy/SciPy)
+try:
+    import numpy as np
+    from als_model import AlsModel
+    ALS_AVAILABLE = True
+except Exception:
+    ALS_AVAILABLE = False
 
 logger = logging.getLogger("collaborative-filter")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
@@ -16,6 +42,14 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Request latency and per-stage histograms on /metrics; SERVER_TIMING=1 adds the header
+metrics = Metrics(
+    "collaborative-filter",
+    enabled=os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"),
+    server_timing=os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes"),
+)
+metrics.install(app)
+
 DEFAULT_CATALOG_PATH = os.getenv("JOB_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "job_catalog.json"))
 
 def load_catalog(path: str = DEFAULT_CATALOG_PATH) -> Dict[str, List[str]]:
@@ -31,40 +65,345 @@ def load_catalog(path: str = DEFAULT_CATALOG_PATH) -> Dict[str, List[str]]:
             "Backend Developer": ["node.js", "express", "sql", "docker"],
         }
 
-JOB_CATALOG = load_catalog()
+TFIDF_ENABLED = TFIDF_AVAILABLE and os.getenv("TFIDF_ENABLED", "1").lower() not in ("0", "false", "no")
+
+def build_indexes(catalog: Dict[str, List[str]]) -> tuple:
+    """Overlap index and (optional) TF-IDF index over one interned copy of the catalog.
+
+    Only job names and uint32 skill ids are kept; the parsed JSON can be dropped.
+    """
+    jobs, vocab, tags = encode_catalog(catalog)
+    return CatalogIndex(jobs, vocab, tags), (TfidfIndex(jobs, vocab, tags) if TFIDF_ENABLED else None)
+
+def catalog_version(catalog: Dict[str, List[str]]) -> str:
+    return hashlib.sha256(json.dumps(catalog, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+# Worker processes, as for `uvicorn --workers`. With more than one, the indexes are built
+# once into a snapshot file in SNAPSHOT_DIR that every worker maps (mmap_snapshot.py).
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or (
+    os.path.join(tempfile.gettempdir(), "collaborative-filter-snapshots") if WEB_CONCURRENCY > 1 else ""
+)
+CATALOG_CHANNEL = SnapshotChannel(SNAPSHOT_DIR, "catalog") if SNAPSHOT_DIR else None
+
+def catalog_source(path: str = DEFAULT_CATALOG_PATH) -> Optional[list]:
+    """[path, mtime_ns, size] of the catalog file, or None; tells workers whether a snapshot is current."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [path, st.st_mtime_ns, st.st_size]
+
+def publish_catalog(catalog: Dict[str, List[str]], source: Optional[list]):
+    """Build the indexes and publish them for every worker; returns the mapped snapshot."""
+    index, tfidf = build_indexes(catalog)
+    sections = {**index.to_sections(), **(tfidf.to_sections() if tfidf is not None else {})}
+    snapshot = CATALOG_CHANNEL.publish(sections, {"version": catalog_version(catalog), "source": source})
+    logger.info("Published catalog snapshot jobs=%d bytes=%d path=%s", len(index), snapshot.nbytes, snapshot.path)
+    return snapshot
+
+def indexes_from_snapshot(snapshot) -> tuple:
+    """(overlap index, TF-IDF index or None, catalog version) served from a mapped snapshot."""
+    jobs, vocab = snapshot.strings("jobs"), SkillVocab(snapshot.strings("vocab"))
+    tfidf = TfidfIndex.from_snapshot(snapshot, jobs, vocab) if TFIDF_ENABLED and "tfidf.idf" in snapshot else None
+    return CatalogIndex.from_snapshot(snapshot, jobs, vocab), tfidf, snapshot.meta["version"]
+
+def startup_indexes() -> tuple:
+    if CATALOG_CHANNEL is None:
+        catalog = load_catalog()
+        return (*build_indexes(catalog), catalog_version(catalog))
+    # The first worker to get here builds; the others map what it published
+    with CATALOG_CHANNEL.exclusive():
+        source = catalog_source()
+        snapshot = CATALOG_CHANNEL.current()
+        if snapshot is None or snapshot.meta["source"] != source:
+            snapshot = publish_catalog(load_catalog(), source)
+    return indexes_from_snapshot(snapshot)
+
+CATALOG_INDEX, TFIDF_INDEX, CATALOG_VERSION = startup_indexes()
+
+# Rankings precomputed by materialize.py, served to requests that carry a student_id
+REC_STORE_URL = os.getenv("REC_STORE_URL", "")
+REC_STORE_MAX_AGE_SECONDS = float(os.getenv("REC_STORE_MAX_AGE_SECONDS", "86400"))
+REC_STORE_TOP_K = int(os.getenv("REC_STORE_TOP_K", "20"))
+
+def open_store(url: str = REC_STORE_URL) -> Optional[RecStore]:
+    if not url:
+        return None
+    try:
+        return RecStore(url)
+    except Exception as e:
+        logger.warning("Recommendation store unavailable (%s); scoring every request live", e)
+        return None
+
+REC_STORE = open_store()
+
+def recommendation_hash(skills, scoring: str, top_k: int = REC_STORE_TOP_K, version: Optional[str] = None) -> str:
+    """Inputs digest of a stored ranking: catalog version, scoring, depth and the normalised skills."""
+    keys = sorted({normalize(s) for s in skills or () if isinstance(s, str) and s.strip()})
+    return inputs_hash(f"{version or CATALOG_VERSION}:{scoring}:{top_k}", keys)
+
+def stored_recommendations(payload: dict, top_n: int, scoring: str) -> Optional[List[str]]:
+    store, student_id = REC_STORE, payload.get("student_id")
+    if store is None or not isinstance(student_id, int) or not 0 < top_n <= REC_STORE_TOP_K:
+        return None
+    recs = store.recommendations(
+        student_id, scoring, recommendation_hash(payload.get("skills"), scoring), REC_STORE_MAX_AGE_SECONDS,
+    )
+    return None if recs is None else recs[:top_n]
+
+# Factor model trained by train_als.py; scoring=blend mixes it with the overlap score
+ALS_MODEL_DIR = os.getenv("ALS_MODEL_DIR", os.path.join(os.path.dirname(__file__), "als_factors"))
+ALS_BLEND_WEIGHT = float(os.getenv("ALS_BLEND_WEIGHT", "0.5"))
+ALS_CANDIDATES = int(os.getenv("ALS_CANDIDATES", "200"))
+ALS_ANN_MIN_ITEMS = int(os.getenv("ALS_ANN_MIN_ITEMS", "100000"))
+ALS_NPROBE = int(os.getenv("ALS_NPROBE", "8"))
+
+def load_als(index: CatalogIndex, path: str = ALS_MODEL_DIR) -> Optional[tuple]:
+    """(catalog index, model, catalog job -> model item) or None; items are matched to jobs by title."""
+    if not ALS_AVAILABLE or not os.path.isdir(path):
+        return None
+    try:
+        model = AlsModel.load(path, ann_min_items=ALS_ANN_MIN_ITEMS, nprobe=ALS_NPROBE)
+    except Exception as e:
+        logger.warning("Failed to load ALS model at %s: %s", path, e)
+        return None
+    return link_als(index, model)
+
+def link_als(index: CatalogIndex, model: "AlsModel") -> tuple:
+    """(index, model, catalog job -> model item, model item -> catalog job); -1 where there is none."""
+    item_of = {title: i for i, title in enumerate(model.items)}
+    job_items = np.fromiter((item_of.get(job, -1) for job in index.jobs), dtype=np.int64, count=len(index))
+    item_jobs = np.full(len(model), -1, dtype=np.int64)
+    matched = np.flatnonzero(job_items >= 0)
+    item_jobs[job_items[matched]] = matched
+    logger.info("Loaded ALS model items=%d students=%d matched_jobs=%d", len(model), len(model.students), len(matched))
+    return index, model, job_items, item_jobs
+
+ALS = load_als(CATALOG_INDEX)
+
+@app.middleware("http")
+async def follow_catalog_snapshot(request, call_next):
+    # One stat per request; a catalog another worker published is adopted before this request reads it
+    global CATALOG_INDEX, TFIDF_INDEX, CATALOG_VERSION, ALS
+    if CATALOG_CHANNEL is not None and CATALOG_CHANNEL.changed():
+        snapshot = CATALOG_CHANNEL.current()
+        if snapshot is not None:
+            index, tfidf, version = indexes_from_snapshot(snapshot)
+            als = ALS
+            als = link_als(index, als[1]) if als is not None else None
+            CATALOG_INDEX, TFIDF_INDEX, CATALOG_VERSION, ALS = index, tfidf, version, als
+            cf_policy.reset()
+    return await call_next(request)
+
+def blend_top_n(als: tuple, student_id, skill_ids, n: int) -> List[str]:
+    """Rank the union of the best overlap and the best factor-model candidates by
+    ALS_BLEND_WEIGHT * (dot product / best) + (1 - weight) * (overlap / best)."""
+    index, model, job_items, item_jobs = als
+    user = model.user_vector(student_id) if isinstance(student_id, int) else None
+    if user is None:
+        # Students without interactions get the content ranking
+        return index.top_n(skill_ids, n)
+    counts: Dict[int, int] = {}
+    for count, mask in index.levels(skill_ids):
+        counts.update((j, count) for j in members(mask))
+        if len(counts) >= ALS_CANDIDATES:
+            break
+    cf: Dict[int, float] = {}
+    items, item_scores = model.top_k(user, ALS_CANDIDATES)
+    for item, score in zip(item_jobs[items].tolist(), item_scores.tolist()):
+        if item >= 0:
+            cf[item] = score
+    candidates = sorted(counts.keys() | cf.keys())
+    if not candidates:
+        return []
+    # Candidates found by one side only still get the other side's score
+    for j in candidates:
+        if j not in counts:
+            counts[j] = overlap(index.tags[j], skill_ids)
+        if j not in cf:
+            i = job_items[j]
+            cf[j] = float(model.item_factors[i] @ user) if i >= 0 else 0.0
+    best_cf = max(max(cf.values()), 0.0) or 1.0
+    best_count = max(counts.values()) or 1
+    w = ALS_BLEND_WEIGHT
+    score = {j: w * max(cf[j], 0.0) / best_cf + (1.0 - w) * counts[j] / best_count for j in candidates}
+    ranked = sorted(candidates, key=lambda j: (-score[j], j))
+    return [index.jobs[j] for j in ranked[:n]]
+
+# Scoring runs under this policy instead of Starlette's shared threadpool
+# (CF_EXECUTOR=inline|thread|process, see executor_policy.py). Batches of at least
+# CF_LARGE_BATCH_STUDENTS go to their own lane of CF_LARGE_WORKERS; a full lane is a 503.
+cf_policy = ExecutionPolicy.from_env("CF")
+CF_LARGE_BATCH_STUDENTS = int(os.getenv("CF_LARGE_BATCH_STUDENTS", "1000"))
+install_executor_policy(app)
+
+@app.on_event("shutdown")
+def stop_cf_executor():
+    cf_policy.shutdown()
 
 @app.post("/recommendations")
-def recommend_jobs(payload: dict = Body(...), top_n: int = 5):
-    user_skills: List[str] = [s for s in payload.get("skills", []) if isinstance(s, str)]
-    skillset = {s.strip().lower() for s in user_skills if s.strip()}
-    if not skillset:
-        return {"recommendations": []}
+async def recommend_jobs(payload: dict = Body(...), top_n: int = 5, scoring: Literal["overlap", "tfidf", "blend"] = "overlap"):
+    # Checked here: HTTPException does not survive the trip back from a process pool
+    if scoring == "blend" and ALS is None:
+        raise HTTPException(status_code=501, detail="No ALS model is loaded on this service. Train one with train_als.py or use scoring=overlap.")
+    if scoring == "tfidf" and TFIDF_INDEX is None:
+        raise HTTPException(status_code=501, detail="TF-IDF scoring is not available on this service. Install numpy+scipy or use scoring=overlap.")
+    return await cf_policy.run(recommend, payload, top_n, scoring)
+
+def recommend(payload: dict, top_n: int, scoring: str) -> dict:
+    if scoring == "blend":
+        als = ALS
+        # The catalog index the model was linked to, so ids and job numbers agree
+        skill_ids = als[0].vocab.encode(payload.get("skills", []))
+        with metrics.stage("score_blend"):
+            recs = blend_top_n(als, payload.get("student_id"), skill_ids, top_n)
+        logger.info("Recommendations computed count=%d", len(recs))
+        return {"recommendations": recs}
 
-    scored = []
-    for job, tags in JOB_CATALOG.items():
-        tagset = {t.lower() for t in tags}
-        overlap = len(skillset & tagset)
-        if overlap >= 2:
-            scored.append((job, overlap, len(tagset)))
+    stored = stored_recommendations(payload, top_n, scoring)
+    if stored is not None:
+        return {"recommendations": stored}
 
-    scored.sort(key=lambda x: (x[1], x[1]/x[2] if x[2] else 0), reverse=True)
-    recs = [j for j, _, _ in scored[:top_n]]
+    # Ids are only valid for the index that interned them: read each global once
+    index = TFIDF_INDEX if scoring == "tfidf" else CATALOG_INDEX
+    # Normalised and looked up once; skills no job lists cannot score and are dropped here
+    skill_ids = (index or CATALOG_INDEX).vocab.encode(payload.get("skills", []))
+    if not skill_ids:
+        return {"recommendations": []}
+
+    if scoring == "tfidf":
+        # Cosine similarity of IDF-weighted skill vectors; rare shared skills rank higher
+        with metrics.stage("score_tfidf"):
+            recs = index.top_n(skill_ids, top_n)
+    else:
+        # Only jobs sharing a skill with the user are scored; ranking is by overlap (>= 2), then overlap / tag count
+        with metrics.stage("score_overlap"):
+            recs = index.top_n(skill_ids, top_n)
     logger.info("Recommendations computed count=%d", len(recs))
     return {"recommendations": recs}
 
+CF_BATCH_MAX_STUDENTS = int(os.getenv("CF_BATCH_MAX_STUDENTS", "100000"))
+CF_BATCH_CHUNK_SIZE = int(os.getenv("CF_BATCH_CHUNK_SIZE", "1024"))
+
+def score_chunk(chunk: List[dict], top_n: int, scoring: str) -> List[dict]:
+    """One vectorized pass over the catalog for a chunk of students."""
+    overlap, index = CATALOG_INDEX, TFIDF_INDEX
+    vocab = (index or overlap).vocab
+    skillsets = [vocab.encode(st.get("skills")) for st in chunk]
+    with metrics.stage(f"score_{scoring}_batch"):
+        if scoring == "tfidf":
+            recs = [[job for job, _ in row] for row in index.top_n_batch(skillsets, top_n)]
+        elif index is not None:
+            recs = index.overlap_top_n_batch(skillsets, top_n)
+        else:
+            recs = [overlap.top_n(skills, top_n) if skills else [] for skills in skillsets]
+    return [{"student_id": st.get("student_id"), "recommendations": r} for st, r in zip(chunk, recs)]
+
+def score_chunks(chunks: List[List[dict]], top_n: int, scoring: str) -> List[dict]:
+    return [row for chunk in chunks for row in score_chunk(chunk, top_n, scoring)]
+
+@app.post("/recommendations/batch")
+async def recommend_jobs_batch(
+    payload: dict = Body(...),
+    top_n: int = 5,
+    scoring: Literal["overlap", "tfidf"] = "overlap",
+    format: Literal["json", "ndjson"] = "json",
+):
+    """Recommendations for many students: body `{"students": [{"student_id", "skills"}]}`.
+
+    Students are scored in chunks of CF_BATCH_CHUNK_SIZE, one sparse matrix
+    product per chunk. With format=ndjson each student's line is streamed as
+    soon as its chunk is done.
+    """
+    students = [st for st in payload.get("students", []) if isinstance(st, dict)]
+    if len(students) > CF_BATCH_MAX_STUDENTS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {CF_BATCH_MAX_STUDENTS} students")
+    if scoring == "tfidf" and TFIDF_INDEX is None:
+        raise HTTPException(status_code=501, detail="TF-IDF scoring is not available on this service. Install numpy+scipy or use scoring=overlap.")
+    chunks = [students[i:i + CF_BATCH_CHUNK_SIZE] for i in range(0, len(students), CF_BATCH_CHUNK_SIZE)]
+    large = len(students) >= CF_LARGE_BATCH_STUDENTS
+
+    if format == "ndjson":
+        # Admitted (or refused with 503) before the response starts; holds its place until the last line
+        admission = cf_policy.admit(large)
+
+        async def lines():
+            try:
+                for chunk in chunks:
+                    rows = await cf_policy.call(score_chunk, chunk, top_n, scoring, large=large)
+                    yield "".join(json.dumps(row) + "\n" for row in rows)
+            finally:
+                admission.release()
+            logger.info("Batch recommendations streamed students=%d", len(students))
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = await cf_policy.run(score_chunks, chunks, top_n, scoring, large=large)
+    logger.info("Batch recommendations computed students=%d", len(results))
+    return {"results": results}
+
 @app.get("/diagnostics")
 def diagnostics():
-    return {"catalog_size": len(JOB_CATALOG), "sample": list(JOB_CATALOG.keys())[:10]}
+    als = ALS
+    return {
+        "catalog_size": len(CATALOG_INDEX),
+        "indexed_skills": len(CATALOG_INDEX.vocab),
+        "catalog_index_bytes": CATALOG_INDEX.nbytes,
+        "tfidf_enabled": TFIDF_INDEX is not None,
+        "catalog_version": CATALOG_VERSION,
+        "catalog_snapshot": None if CATALOG_INDEX.snapshot is None else {
+            "file": CATALOG_INDEX.snapshot.path,
+            "bytes": CATALOG_INDEX.snapshot.nbytes,
+        },
+        "als": None if als is None else {
+            "items": len(als[1]),
+            "students": len(als[1].students),
+            "matched_jobs": int((als[2] >= 0).sum()),
+            "approximate": als[1].ivf is not None,
+        },
+        "rec_store": REC_STORE.stats() if REC_STORE is not None else None,
+        "executor": cf_policy.stats(),
+        "sample": list(CATALOG_INDEX.jobs[:10]),
+    }
 
 @app.post("/reload-catalog")
 def reload_catalog():
-    global JOB_CATALOG
-    JOB_CATALOG = load_catalog()
-    return {"reloaded": True, "catalog_size": len(JOB_CATALOG)}
+    global CATALOG_INDEX, TFIDF_INDEX, CATALOG_VERSION, ALS
+    if CATALOG_CHANNEL is not None:
+        # Published for every worker; the others switch on their next request
+        with CATALOG_CHANNEL.exclusive():
+            source = catalog_source()
+            index, tfidf, version = indexes_from_snapshot(publish_catalog(load_catalog(), source))
+    else:
+        catalog = load_catalog()
+        index, tfidf = build_indexes(catalog)
+        version = catalog_version(catalog)
+    als = ALS
+    als = link_als(index, als[1]) if als is not None else None
+    # Stored rankings of the old catalog stop matching once the version changes
+    CATALOG_INDEX, TFIDF_INDEX, CATALOG_VERSION, ALS = index, tfidf, version, als
+    # Process-pool workers hold the old catalog and model; new ones start from these
+    cf_policy.reset()
+    return {"reloaded": True, "catalog_size": len(CATALOG_INDEX)}
+
+@app.post("/reload-als")
+def reload_als():
+    """Pick up a model directory rewritten by train_als.py."""
+    global ALS
+    als = load_als(CATALOG_INDEX)
+    if als is None:
+        raise HTTPException(status_code=404, detail=f"No loadable ALS model at {ALS_MODEL_DIR}")
+    ALS = als
+    cf_policy.reset()
+    return {"reloaded": True, "items": len(als[1]), "students": len(als[1].students)}
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    if WEB_CONCURRENCY > 1:
+        # Each worker imports main:app and maps the snapshot this process published at import
+        uvicorn.run("main:app", host="0.0.0.0", port=8002, workers=WEB_CONCURRENCY, app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8002)
@@ -0,0 +1,51 @@
+"""Precompute every student's top-K recommendations into the recommendation store.
+
+    python materialize.py --db sqlite:///recs.db [--scoring overlap|tfidf] [--top-k 20]
+
+Reads each student's latest resume skills in batches of CF_BATCH_CHUNK_SIZE,
+scores a batch with one sparse product (the /recommendations/batch path) and
+replaces the batch's stored rankings in one bulk write. The catalog comes from
+JOB_CATALOG_PATH, as for the service; the service serves the results while
+their catalog version, scoring and depth match its own.
+"""
+import argparse
+import logging
+import os
+import time
+
+import main
+from rec_store import RecStore
+
+logger = logging.getLogger("collaborative-filter")
+
+
+def materialize(store: RecStore, scoring: str = "overlap", top_k: int = main.REC_STORE_TOP_K, batch_size: int = main.CF_BATCH_CHUNK_SIZE) -> int:
+    """Score and store every student; returns the number of students written."""
+    if scoring == "tfidf" and main.TFIDF_INDEX is None:
+        raise RuntimeError("TF-IDF scoring is not available (numpy+scipy missing or TFIDF_ENABLED=0)")
+    version = main.CATALOG_VERSION
+    students = 0
+    for batch in store.iter_students(batch_size):
+        rows = main.score_chunk(batch, top_k, scoring)
+        store.write_recommendations(scoring, [
+            (st["student_id"], main.recommendation_hash(st["skills"], scoring, top_k, version), row["recommendations"])
+            for st, row in zip(batch, rows)
+        ])
+        students += len(batch)
+    return students
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=main.REC_STORE_URL or os.getenv("DATABASE_URL", ""), help="store URL (sqlite:///path or postgresql://...)")
+    parser.add_argument("--scoring", choices=("overlap", "tfidf"), default="overlap")
+    parser.add_argument("--top-k", type=int, default=main.REC_STORE_TOP_K)
+    parser.add_argument("--batch-size", type=int, default=main.CF_BATCH_CHUNK_SIZE)
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db (or REC_STORE_URL / DATABASE_URL) is required")
+    store = RecStore(args.db)
+    t0 = time.perf_counter()
+    n = materialize(store, args.scoring, args.top_k, args.batch_size)
+    logger.info("Materialized recommendations students=%d scoring=%s top_k=%d in %.1fs", n, args.scoring, args.top_k, time.perf_counter() - t0)
+    store.close()
@@ -0,0 +1,125 @@
+"""ALS factorization: solver accuracy, the memory-mapped model, IVF search and the blended ranking."""
+import importlib.util
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import als_model  # noqa: E402
+from als_model import AlsModel, IvfIndex, interaction_matrix, save, train  # noqa: E402
+
+
+def test_conjugate_gradient_matches_the_exact_solve():
+    rng = np.random.default_rng(0)
+    conf = sparse.random(300, 200, density=0.05, random_state=1, format="csr", dtype=np.float32)
+    conf.data = 1.0 + 40.0 * rng.integers(1, 5, conf.nnz).astype(np.float32)
+    y = (rng.standard_normal((200, 8)) * 0.1).astype(np.float32)
+    gram = y.T @ y + 0.1 * np.eye(8, dtype=np.float32)
+    x = np.zeros((300, 8), dtype=np.float32)
+    with ThreadPoolExecutor(2) as pool:
+        als_model._solve(conf, x, y, gram, 30, pool)
+    for u in range(300):
+        lo, hi = conf.indptr[u], conf.indptr[u + 1]
+        yu, c = y[conf.indices[lo:hi]], conf.data[lo:hi]
+        exact = np.linalg.solve(gram + (yu.T * (c - 1.0)) @ yu, (yu.T * c).sum(axis=1))
+        assert np.allclose(x[u], exact, atol=1e-4)
+
+
+def test_trained_model_round_trips_and_ranks_the_students_group(tmp_path):
+    rng = np.random.default_rng(1)
+    item_groups = np.arange(120) % 6
+    triples = []
+    for sid in range(100, 400):
+        group = sid % 6
+        for job in rng.choice(np.flatnonzero(item_groups == group), 6, replace=False):
+            triples.append((sid, f"Job {job}", float(rng.integers(1, 4))))
+    triples.append((100, "Job 0", None))
+    matrix, students, items = interaction_matrix(triples, [f"Job {j}" for j in range(120)])
+    assert matrix.shape == (300, 120) and students[0] == 100 and items[:2] == ["Job 0", "Job 1"]
+
+    users, factors = train(matrix, factors=12, iterations=8, threads=2)
+    save(str(tmp_path), users, factors, students, items)
+    model = AlsModel.load(str(tmp_path))
+    assert isinstance(model.item_factors, np.memmap) and model.user_vector(99) is None
+    for sid in (101, 205, 399):
+        top, scores = model.top_k(model.user_vector(sid), 10)
+        assert (item_groups[top] == sid % 6).all() and list(scores) == sorted(scores, reverse=True)
+
+    # Probing every cluster is an exact search
+    ivf = IvfIndex(np.asarray(factors), n_lists=8)
+    for u in users[:20]:
+        assert list(ivf.search(u, 10, nprobe=8)[0]) == list(als_model._top(factors @ u, 10))
+
+
+def test_save_switches_whole_versions_and_loads_never_mix_them(tmp_path):
+    def model(n):
+        # n items and n students, every value n: a mixed load has mismatched rows or values
+        return (np.full((n, 2), n, dtype=np.float32), np.full((n, 2), n, dtype=np.float32),
+                np.arange(n), [f"Job {j}" for j in range(n)])
+
+    # Files straight in the directory, as written before versioning, still load
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    users, items_f, students, items = model(3)
+    for name, values in (("user_factors.npy", users), ("item_factors.npy", items_f), ("students.npy", students)):
+        np.save(legacy / name, values)
+    (legacy / "items.json").write_text(json.dumps(items), encoding="utf-8")
+    assert len(AlsModel.load(str(legacy))) == 3
+
+    path = str(tmp_path / "model")
+    errors = []
+
+    def reload_loop():
+        for _ in range(200):
+            m = AlsModel.load(path)
+            n = len(m)
+            if not (m.item_factors == n).all() or not (m.user_factors == n).all() or len(m.students) != n:
+                errors.append(n)
+
+    save(path, *model(1))
+    with ThreadPoolExecutor(2) as pool:
+        loads = pool.submit(reload_loop)
+        for n in range(2, 30):
+            save(path, *model(n))
+        loads.result()
+    assert errors == [] and len(AlsModel.load(path)) == 29
+    # The current version and the two before it; no temporary directories are left behind
+    assert sorted(os.listdir(path)) == ["current", *sorted(d for d in os.listdir(path) if d.startswith("v"))]
+    assert len(os.listdir(path)) == 4
+
+
+def test_blend_mixes_factor_scores_into_the_overlap_ranking(tmp_path, monkeypatch):
+    catalog_jobs = ["Data Analyst", "Backend Developer", "ML Engineer"]
+    # Student 7 only ever engages with backend roles
+    item_factors = np.array([[0.0, 1.0], [1.0, 0.0], [0.1, 0.1]], dtype=np.float32)
+    save(str(tmp_path), np.array([[1.0, 0.0]], dtype=np.float32), item_factors, np.array([7]), catalog_jobs)
+    monkeypatch.setenv("ALS_MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("ALS_BLEND_WEIGHT", "0.6")
+    spec = importlib.util.spec_from_file_location("als_test_cf_main", os.path.join(SERVICE_DIR, "main.py"))
+    cf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cf)
+    cf.CATALOG_INDEX = cf.CatalogIndex.from_catalog({
+        "Data Analyst": ["python", "sql", "pandas", "excel"],
+        "Backend Developer": ["node.js", "sql", "docker"],
+        "ML Engineer": ["python", "pandas", "pytorch", "sql"],
+    })
+    cf.ALS = cf.link_als(cf.CATALOG_INDEX, cf.ALS[1])
+    client = TestClient(cf.app)
+
+    skills = {"skills": ["Python", "SQL", "Pandas"]}
+    overlap = client.post("/recommendations", json=skills).json()["recommendations"]
+    assert overlap == ["Data Analyst", "ML Engineer"]
+    blended = client.post("/recommendations?scoring=blend", json={"student_id": 7, **skills}).json()["recommendations"]
+    # Overlap ties between the analyst roles are broken by the factor score
+    assert blended == ["Backend Developer", "ML Engineer", "Data Analyst"]
+    # No interactions: the content ranking
+    assert client.post("/recommendations?scoring=blend", json={"student_id": 8, **skills}).json()["recommendations"] == overlap
+    assert client.get("/diagnostics").json()["als"] == {"items": 3, "students": 1, "matched_jobs": 3, "approximate": False}
@@ -0,0 +1,77 @@
+"""/recommendations/batch: JSON and NDJSON bodies, chunking, agreement with single requests and limits."""
+import json
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+CATALOG = {
+    "Data Analyst": ["python", "sql", "pandas", "excel"],
+    "Backend Developer": ["node.js", "express", "sql", "docker"],
+    "ML Engineer": ["python", "pandas", "pytorch", "sql"],
+    "DevOps Engineer": ["docker", "kubernetes", "linux", "python"],
+    "Reporting Analyst": ["sql", "excel"],
+}
+
+STUDENTS = [
+    {"student_id": 1, "skills": ["Python", "SQL", "Pandas"]},
+    {"student_id": 2, "skills": ["Docker", "Linux", "Kubernetes", "SQL"]},
+    {"student_id": 3, "skills": ["COBOL"]},
+    "not a student",
+    {"student_id": 4, "skills": ["SQL", "Excel", "PyTorch"]},
+    {"student_id": 5},
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    overlap, tfidf = main.build_indexes(CATALOG)
+    monkeypatch.setattr(main, "CATALOG_INDEX", overlap)
+    monkeypatch.setattr(main, "TFIDF_INDEX", tfidf)
+    # Several chunks per batch
+    monkeypatch.setattr(main, "CF_BATCH_CHUNK_SIZE", 2)
+    return TestClient(main.app)
+
+
+def single(client, student, scoring, top_n):
+    body = {"skills": student.get("skills", [])}
+    return client.post(f"/recommendations?scoring={scoring}&top_n={top_n}", json=body).json()["recommendations"]
+
+
+@pytest.mark.parametrize("scoring", ["overlap", "tfidf"])
+def test_json_and_ndjson_agree_with_single_requests(client, scoring):
+    batch = {"students": STUDENTS}
+    body = client.post(f"/recommendations/batch?scoring={scoring}&top_n=3", json=batch).json()
+    students = [st for st in STUDENTS if isinstance(st, dict)]
+    assert body == {"results": [
+        {"student_id": st.get("student_id"), "recommendations": single(client, st, scoring, 3)} for st in students
+    ]}
+    assert body["results"][0]["recommendations"] and body["results"][2]["recommendations"] == []
+
+    streamed = client.post(f"/recommendations/batch?scoring={scoring}&top_n=3&format=ndjson", json=batch)
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    lines = streamed.text.splitlines()
+    assert streamed.text.endswith("\n") and [json.loads(line) for line in lines] == body["results"]
+
+
+def test_overlap_batches_match_without_the_tfidf_matrix(client, monkeypatch):
+    expected = client.post("/recommendations/batch", json={"students": STUDENTS}).json()
+    monkeypatch.setattr(main, "TFIDF_INDEX", None)
+    assert client.post("/recommendations/batch", json={"students": STUDENTS}).json() == expected
+    assert client.post("/recommendations/batch?scoring=tfidf", json={"students": STUDENTS}).status_code == 501
+
+
+def test_limits_and_empty_batches(client, monkeypatch):
+    assert client.post("/recommendations/batch", json={}).json() == {"results": []}
+    assert client.post("/recommendations/batch?format=ndjson", json={"students": []}).text == ""
+    monkeypatch.setattr(main, "CF_BATCH_MAX_STUDENTS", 2)
+    too_many = client.post("/recommendations/batch", json={"students": STUDENTS})
+    assert too_many.status_code == 413 and "2 students" in too_many.json()["detail"]
+    assert client.post("/recommendations/batch?format=ndjson", json={"students": STUDENTS[:2]}).status_code == 200
@@ -0,0 +1,58 @@
+"""Multi-worker mode: indexes published once to a mapped snapshot and followed across reloads."""
+import importlib.util
+import json
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+CATALOG = {
+    "Data Analyst": ["python", "sql", "pandas", "excel"],
+    "Backend Developer": ["node.js", "express", "sql", "docker"],
+    "ML Engineer": ["python", "pandas", "pytorch", "sql"],
+    **{f"Support Engineer {k}": ["sql", "linux", "python"] for k in range(40)},
+}
+
+
+def start_worker(name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SERVICE_DIR, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_workers_serve_one_snapshot_and_follow_a_reload(tmp_path, monkeypatch):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(CATALOG), encoding="utf-8")
+    monkeypatch.setenv("JOB_CATALOG_PATH", str(path))
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.delenv("ALS_MODEL_DIR", raising=False)
+    first, second = start_worker("snapshot_test_cf_a"), start_worker("snapshot_test_cf_b")
+    # The second worker maps what the first published instead of building again
+    assert first.CATALOG_INDEX.snapshot.path == second.CATALOG_INDEX.snapshot.path
+    assert first.CATALOG_INDEX.dense  # "sql" and "python" are dense in this catalog
+
+    built, _ = first.build_indexes(CATALOG)
+    a, b = TestClient(first.app), TestClient(second.app)
+    skills = {"skills": ["Python", "SQL", "Pandas", "Linux"]}
+    for scoring in ("overlap", "tfidf"):
+        expected = a.post(f"/recommendations?scoring={scoring}&top_n=6", json=skills).json()
+        assert b.post(f"/recommendations?scoring={scoring}&top_n=6", json=skills).json() == expected
+    assert a.post("/recommendations?top_n=6", json=skills).json()["recommendations"] == built.top_n(
+        built.vocab.encode(skills["skills"]), 6
+    )
+    batch = {"students": [{"student_id": 1, **skills}]}
+    assert b.post("/recommendations/batch", json=batch).json()["results"][0]["recommendations"] == built.top_n(
+        built.vocab.encode(skills["skills"]), 5
+    )
+
+    path.write_text(json.dumps({"Data Engineer": ["python", "sql", "spark"]}), encoding="utf-8")
+    assert a.post("/reload-catalog").json() == {"reloaded": True, "catalog_size": 1}
+    # The other worker switches on its next request
+    assert b.post("/recommendations", json=skills).json() == {"recommendations": ["Data Engineer"]}
+    diag = b.get("/diagnostics").json()
+    assert diag["catalog_size"] == 1 and diag["catalog_snapshot"]["file"] == first.CATALOG_INDEX.snapshot.path
+    assert diag["catalog_version"] == first.CATALOG_VERSION
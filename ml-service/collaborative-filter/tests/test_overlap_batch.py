@@ -0,0 +1,27 @@
+"""Batched overlap ranking: same order as CatalogIndex.top_n for every depth, including n <= 0."""
+import os
+import random
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "..", "shared"))
+
+from catalog_index import CatalogIndex, encode_catalog  # noqa: E402
+from tfidf_index import TfidfIndex  # noqa: E402
+
+
+def test_batch_overlap_matches_the_catalog_index_for_every_n():
+    rng = random.Random(7)
+    skills = [f"skill{k}" for k in range(30)]
+    # Small tag sets over few skills: plenty of ties in overlap and in ratio
+    catalog = {f"Job {j}": rng.sample(skills, rng.randint(1, 6)) for j in range(80)}
+    jobs, vocab, tags = encode_catalog(catalog)
+    overlap, tfidf = CatalogIndex(jobs, vocab, tags), TfidfIndex(jobs, vocab, tags)
+    users = [vocab.encode(rng.sample(skills, rng.randint(0, 8))) for _ in range(60)]
+    users.append(vocab.encode(["unknown"]))
+    for n in (-100, -5, -1, 0, 1, 3, 10, 200):
+        expected = [overlap.top_n(u, n) for u in users]
+        assert tfidf.overlap_top_n_batch(users, n) == expected, n
+    # The depths do differ
+    assert any(len(overlap.top_n(u, -1)) for u in users) and not any(overlap.top_n(u, 0) for u in users)
@@ -0,0 +1,102 @@
+"""TF-IDF scoring: IDF weights, cosine score values and the ranking they produce."""
+import math
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from tfidf_index import TfidfIndex  # noqa: E402
+
+CATALOG = {
+    "Data Analyst": ["python", "sql", "pandas", "excel"],
+    "Backend Developer": ["node.js", "sql", "docker"],
+    "ML Engineer": ["python", "pandas", "pytorch", "sql"],
+    "Reporting Analyst": ["sql", "excel"],
+}
+
+
+def reference(catalog, skills):
+    """Cosine similarities written out by hand: smoothed IDF, binary tags, L2 norms."""
+    n = len(catalog)
+    df = {}
+    for tags in catalog.values():
+        for tag in tags:
+            df[tag] = df.get(tag, 0) + 1
+    idf = {tag: math.log((1 + n) / (1 + d)) + 1 for tag, d in df.items()}
+    user = [s for s in {s.lower() for s in skills} if s in idf]
+    user_norm = math.sqrt(sum(idf[s] ** 2 for s in user))
+    scores = {}
+    for job, tags in catalog.items():
+        dot = sum(idf[s] ** 2 for s in user if s in tags)
+        if dot:
+            scores[job] = dot / (user_norm * math.sqrt(sum(idf[t] ** 2 for t in tags)))
+    return scores
+
+
+def test_idf_weights_rare_skills_above_common_ones():
+    index = TfidfIndex.from_catalog(CATALOG)
+    idf = {skill: float(index.idf[index.vocab.encode([skill])[0]]) for skill in ("sql", "python", "pytorch")}
+    # sql is on every job, pytorch on one
+    assert math.isclose(idf["sql"], 1.0, rel_tol=1e-6)
+    assert math.isclose(idf["python"], math.log(5 / 3) + 1, rel_tol=1e-6)
+    assert math.isclose(idf["pytorch"], math.log(5 / 2) + 1, rel_tol=1e-6)
+
+
+def test_scores_are_cosine_similarities_best_first():
+    index = TfidfIndex.from_catalog(CATALOG)
+    for skills in (["Python", "SQL", "Pandas"], ["PyTorch", "SQL"], ["Excel"], ["Docker", "Node.js", "Excel"]):
+        expected = reference(CATALOG, skills)
+        ranked = index.top_n_batch([index.vocab.encode(skills)], 10)[0]
+        assert {job for job, _ in ranked} == set(expected)
+        for job, score in ranked:
+            assert math.isclose(score, expected[job], abs_tol=1e-4)
+        assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+
+    # A user listing exactly one job's tags scores 1.0 against it
+    assert index.top_n_batch([index.vocab.encode(CATALOG["ML Engineer"])], 1)[0] == [("ML Engineer", 1.0)]
+    # Unknown skills and empty users score nothing
+    assert index.top_n_batch([[], index.vocab.encode(["cobol"])], 5) == [[], []]
+
+
+def test_rare_shared_skills_outrank_common_ones_unlike_overlap(monkeypatch):
+    overlap, tfidf = main.build_indexes(CATALOG)
+    monkeypatch.setattr(main, "CATALOG_INDEX", overlap)
+    monkeypatch.setattr(main, "TFIDF_INDEX", tfidf)
+    client = TestClient(main.app)
+    skills = {"skills": ["SQL", "Excel", "PyTorch"]}
+    # Both analyst and ML jobs share two skills; overlap breaks the tie by catalog order,
+    # TF-IDF prefers the job sharing the rare skill
+    assert client.post("/recommendations?top_n=2", json=skills).json()["recommendations"] == [
+        "Reporting Analyst", "Data Analyst",
+    ]
+    tfidf_recs = client.post("/recommendations?scoring=tfidf&top_n=2", json=skills).json()["recommendations"]
+    assert tfidf_recs == ["Reporting Analyst", "ML Engineer"]
+
+    # Equal scores keep catalog order
+    tied = TfidfIndex.from_catalog({"B": ["go", "sql"], "A": ["go", "sql"], "C": ["go", "rust"]})
+    assert tied.top_n(tied.vocab.encode(["Go", "SQL"]), 2) == ["B", "A"]
+
+    monkeypatch.setattr(main, "TFIDF_INDEX", None)
+    assert client.post("/recommendations?scoring=tfidf", json=skills).status_code == 501
+
+
+def test_top_n_uses_list_slice_semantics_like_the_overlap_ranking(monkeypatch):
+    overlap, tfidf = main.build_indexes(CATALOG)
+    monkeypatch.setattr(main, "CATALOG_INDEX", overlap)
+    monkeypatch.setattr(main, "TFIDF_INDEX", tfidf)
+    client = TestClient(main.app)
+    skills = ["SQL", "Excel", "PyTorch"]
+    full = [job for job, _ in sorted(reference(CATALOG, skills).items(), key=lambda kv: -kv[1])]
+    ids = tfidf.vocab.encode(skills)
+    for n in (-10, -2, -1, 0, 1, 2, 10):
+        assert tfidf.top_n(ids, n) == full[:n], n
+        ranked = client.post(f"/recommendations?scoring=tfidf&top_n={n}", json={"skills": skills}).json()
+        assert ranked["recommendations"] == full[:n]
+        # Same rule for the other scoring mode and for batches
+        assert overlap.top_n(overlap.vocab.encode(skills), n) == overlap.top_n(overlap.vocab.encode(skills), 100)[:n]
+        batch = client.post(f"/recommendations/batch?scoring=tfidf&top_n={n}", json={"students": [{"skills": skills}]})
+        assert batch.json()["results"][0]["recommendations"] == full[:n]
@@ -0,0 +1,149 @@
+"""TF-IDF / cosine scoring of the job catalog with SciPy sparse matrices.
+
+The job x skill matrix is built once per catalog load. Its binary twin scores
+the classic overlap ranking for whole batches of users the same way. Tags are binary (a job
+lists a skill or not), weighted by smoothed IDF and L2-normalised per job, so
+rare skills count for more than ubiquitous ones like "python". A batch of
+users is scored with one sparse product against the transposed matrix, which
+only touches jobs that share a skill with some user.
+
+Jobs' tag sets come from catalog_index.encode_catalog: sorted skill ids per
+job in one flat array, which is already the CSR layout of the job x skill
+matrix, so it is wrapped without a Python loop. Users are id arrays from the
+same SkillVocab. `to_sections` / `from_snapshot` hand the built matrices to
+other worker processes through a shared snapshot file, wrapped in place.
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from catalog_index import encode_catalog
+from skill_vocab import SkillVocab, TagSets
+
+
+class TfidfIndex:
+    def __init__(self, jobs: Sequence[str], vocab: SkillVocab, tags: TagSets):
+        self.jobs = jobs
+        self.vocab = vocab
+        n_jobs, n_skills = len(jobs), len(vocab)
+        indptr = np.frombuffer(tags.offsets, dtype=np.uint32).astype(np.int64)
+        cols = np.frombuffer(tags.ids, dtype=np.uint32).astype(np.int32)
+        data = np.ones(len(cols), dtype=np.float32)
+        binary = sparse.csr_matrix((data, cols, indptr), shape=(n_jobs, n_skills), dtype=np.float32)
+        df = np.bincount(cols, minlength=n_skills)
+        # Smoothed IDF as in scikit-learn: ln((1 + n) / (1 + df)) + 1
+        self.idf = (np.log((1.0 + n_jobs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        weighted = binary.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        weighted = sparse.diags((1.0 / norms).astype(np.float32)).dot(weighted)
+        # skills x jobs, so a user row times this yields scores for matching jobs only
+        self.matrix_t = weighted.T.tocsr()
+        self.matrix_t.sort_indices()
+        # Same sparsity pattern with unit weights: user row times this counts shared skills
+        self.binary_t = sparse.csr_matrix(
+            (np.ones_like(self.matrix_t.data), self.matrix_t.indices, self.matrix_t.indptr), shape=self.matrix_t.shape
+        )
+        self.tag_counts = np.diff(binary.indptr).astype(np.float32)
+
+    @classmethod
+    def from_catalog(cls, catalog: Dict[str, List[str]]) -> "TfidfIndex":
+        return cls(*encode_catalog(catalog))
+
+    def to_sections(self) -> Dict[str, Any]:
+        m = self.matrix_t
+        return {
+            "tfidf.idf": self.idf, "tfidf.tag_counts": self.tag_counts,
+            "tfidf.data": m.data, "tfidf.ones": self.binary_t.data, "tfidf.indices": m.indices, "tfidf.indptr": m.indptr,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot, jobs: Sequence[str], vocab: SkillVocab) -> "TfidfIndex":
+        """An index whose arrays are read-only views into a mapped snapshot."""
+
+        def view(name: str) -> np.ndarray:
+            return np.frombuffer(snapshot.buffer(name), dtype=snapshot.dtype(name))
+
+        index = cls.__new__(cls)
+        index.jobs = jobs
+        index.vocab = vocab
+        index.idf = view("tfidf.idf")
+        index.tag_counts = view("tfidf.tag_counts")
+        shape = (len(index.idf), len(jobs))
+        indices, indptr = view("tfidf.indices"), view("tfidf.indptr")
+        index.matrix_t = sparse.csr_matrix((view("tfidf.data"), indices, indptr), shape=shape)
+        index.binary_t = sparse.csr_matrix((view("tfidf.ones"), indices, indptr), shape=shape)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def query_matrix(self, skillsets: Sequence[Sequence[int]]) -> sparse.csr_matrix:
+        """users x skills matrix of L2-normalised IDF weights (ids the catalog lacks ignored)."""
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        idf = self.idf
+        n_skills = len(idf)
+        for skills in skillsets:
+            # Sorted and unique already (SkillVocab.encode)
+            cols = [s for s in skills if s < n_skills]
+            weights = idf[cols]
+            norm = float(np.sqrt(np.dot(weights, weights))) or 1.0
+            indices.extend(cols)
+            data.extend((weights / norm).tolist())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(skillsets), n_skills),
+        )
+
+    def scores(self, skillsets: Sequence[Sequence[int]]) -> sparse.csr_matrix:
+        """users x jobs cosine similarities; only non-zero entries are stored."""
+        return self.query_matrix(skillsets).dot(self.matrix_t).tocsr()
+
+    def top_n_batch(self, skillsets: Sequence[Sequence[int]], n: int) -> List[List[Tuple[str, float]]]:
+        """(job, score) lists per user, best first; ties go to the earlier catalog entry."""
+        result = self.scores(skillsets)
+        out: List[List[Tuple[str, float]]] = []
+        for i in range(result.shape[0]):
+            lo, hi = result.indptr[i], result.indptr[i + 1]
+            out.append(self._top(result.data[lo:hi], result.indices[lo:hi], n))
+        return out
+
+    def top_n(self, skill_ids: Sequence[int], n: int) -> List[str]:
+        return [job for job, _ in self.top_n_batch([skill_ids], n)[0]]
+
+    def overlap_top_n_batch(self, skillsets: Sequence[Sequence[int]], n: int, min_overlap: int = 2) -> List[List[str]]:
+        """Overlap ranking for many users at once; same order as CatalogIndex.top_n."""
+        q = self.query_matrix(skillsets)
+        q.data[:] = 1.0
+        counts = q.dot(self.binary_t).tocsr()
+        out: List[List[str]] = []
+        for i in range(counts.shape[0]):
+            lo, hi = counts.indptr[i], counts.indptr[i + 1]
+            c, idx = counts.data[lo:hi], counts.indices[lo:hi]
+            keep = c >= min_overlap
+            c, idx = c[keep], idx[keep]
+            if not len(c):
+                out.append([])
+                continue
+            ratio = c.astype(np.float64) / self.tag_counts[idx]
+            # List-slice semantics for any n, as CatalogIndex.top_n
+            order = np.lexsort((idx, -ratio, -c))[:n]
+            out.append([self.jobs[idx[k]] for k in order])
+        return out
+
+    def _top(self, data: np.ndarray, idx: np.ndarray, n: int) -> List[Tuple[str, float]]:
+        if not len(data):
+            return []
+        if 0 < n < len(data):
+            # Keep everything tied with the n-th best so tie-breaking stays deterministic
+            kth = np.partition(data, len(data) - n)[len(data) - n]
+            keep = data >= kth
+            data, idx = data[keep], idx[keep]
+        # List-slice semantics for any n, as the overlap ranking
+        order = np.lexsort((idx, -data))[:n]
+        return [(self.jobs[idx[k]], round(float(data[k]), 4)) for k in order]
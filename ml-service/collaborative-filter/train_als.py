@@ -0,0 +1,57 @@
+"""Train the implicit-feedback ALS model on student_job_interactions.
+
+    python train_als.py --db postgresql://... [--factors 64 --iterations 15 --out als_factors]
+
+Interactions are read in batches (jobs matched by title), summed per
+(student, job) into a sparse matrix and factorized with als_model.train. The
+model directory (ALS_MODEL_DIR by default) is what the service memory-maps;
+POST /reload-als picks up a new one without a restart.
+"""
+import argparse
+import logging
+import os
+import time
+
+import main
+from als_model import interaction_matrix, save, train
+from rec_store import RecStore
+
+logger = logging.getLogger("collaborative-filter")
+
+ALS_FACTORS = int(os.getenv("ALS_FACTORS", "64"))
+ALS_ITERATIONS = int(os.getenv("ALS_ITERATIONS", "15"))
+ALS_REGULARIZATION = float(os.getenv("ALS_REGULARIZATION", "0.05"))
+ALS_ALPHA = float(os.getenv("ALS_ALPHA", "40"))
+ALS_THREADS = int(os.getenv("ALS_THREADS", "0"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=main.REC_STORE_URL or os.getenv("DATABASE_URL", ""), help="database URL (sqlite:///path or postgresql://...)")
+    parser.add_argument("--out", default=main.ALS_MODEL_DIR)
+    parser.add_argument("--factors", type=int, default=ALS_FACTORS)
+    parser.add_argument("--iterations", type=int, default=ALS_ITERATIONS)
+    parser.add_argument("--regularization", type=float, default=ALS_REGULARIZATION)
+    parser.add_argument("--alpha", type=float, default=ALS_ALPHA)
+    parser.add_argument("--threads", type=int, default=ALS_THREADS, help="solver threads (0 = CPU count)")
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db (or REC_STORE_URL / DATABASE_URL) is required")
+
+    store = RecStore(args.db)
+    triples = [row for batch in store.iter_interactions() for row in batch]
+    store.close()
+    if not triples:
+        raise SystemExit("student_job_interactions is empty; nothing to train on")
+    # Catalog jobs come first so item order follows the catalog; other titles are appended
+    matrix, students, items = interaction_matrix(triples, main.CATALOG_INDEX.jobs)
+    t0 = time.perf_counter()
+    user_factors, item_factors = train(
+        matrix, factors=args.factors, regularization=args.regularization, alpha=args.alpha,
+        iterations=args.iterations, threads=args.threads,
+    )
+    version = save(args.out, user_factors, item_factors, students, items)
+    logger.info(
+        "Trained ALS students=%d items=%d interactions=%d factors=%d in %.1fs -> %s",
+        len(students), len(items), matrix.nnz, args.factors, time.perf_counter() - t0, version,
+    )
@@ -1,7 +1,29 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 import random
+from typing import List
+import os, sys, json, hashlib, logging, math, time, warnings
+
+# Code shared by the ML services lives in ml-service/shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from executor_policy import ExecutionPolicy, install as install_executor_policy
+from instrumentation import Metrics
+from rec_store import RecStore, inputs_hash
+
+from micro_batcher import MicroBatcher
+
+logger = logging.getLogger("placement-predict")
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
+
+# Optional model serving dependencies (numpy + scikit-learn/joblib)
+try:
+    import numpy as np
+    import joblib
+    MODEL_LIBS_AVAILABLE = True
+except Exception:
+    MODEL_LIBS_AVAILABLE = False
 
 app = FastAPI(title="Placement Prediction Service")
 
@@ -12,8 +34,137 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Request latency and per-stage histograms on /metrics; SERVER_TIMING=1 adds the header
+metrics = Metrics(
+    "placement-predict",
+    enabled=os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"),
+    server_timing=os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes"),
+)
+metrics.install(app)
+
+MODEL_PATH = os.getenv("PLACEMENT_MODEL_PATH", os.path.join(os.path.dirname(__file__), "placement_model.pkl"))
+
+# Column order the shipped LogisticRegression was trained on
+FEATURES = ["cgpa", "department", "projects", "internships", "aptitude_score", "interview_score", "skill_count"]
+
+# Used for anything a request does not supply (override with PLACEMENT_FEATURE_DEFAULTS='{"cgpa": 7.5}')
+FEATURE_DEFAULTS = {
+    "cgpa": 7.0,
+    "department": 0.0,
+    "projects": 2.0,
+    "internships": 0.0,
+    "aptitude_score": 70.0,
+    "interview_score": 70.0,
+}
+FEATURE_DEFAULTS.update(json.loads(os.getenv("PLACEMENT_FEATURE_DEFAULTS", "{}") or "{}"))
+
+# students.department is free text; the model takes an integer code
+DEPARTMENT_CODES = {
+    "CSE": 0, "CS": 0, "COMPUTER SCIENCE": 0,
+    "IT": 1, "ISE": 1, "INFORMATION SCIENCE": 1, "INFORMATION TECHNOLOGY": 1,
+    "ECE": 2, "ELECTRONICS": 2,
+    "EEE": 3, "EE": 3, "ELECTRICAL": 3,
+    "MECH": 4, "ME": 4, "MECHANICAL": 4,
+    "CIVIL": 5, "CE": 5,
+}
+
+# Request keys accepted for each feature (TEST_REPORT payloads and the Prisma Student model)
+FEATURE_ALIASES = {
+    "cgpa": ("cgpa",),
+    "department": ("department", "dept"),
+    "projects": ("projects",),
+    "internships": ("internships",),
+    "aptitude_score": ("aptitude_score", "aptitudeScore"),
+    "interview_score": ("interview_score", "interviewPerformance"),
+    "skill_count": ("skill_count",),
+}
+
+
+def load_model(path: str = MODEL_PATH):
+    if not MODEL_LIBS_AVAILABLE:
+        logger.warning("numpy/joblib not installed; using heuristic predictions")
+        return None
+    try:
+        with warnings.catch_warnings():
+            # Pickled with a nearby scikit-learn release; LogisticRegression state is compatible
+            warnings.simplefilter("ignore")
+            model = joblib.load(path)
+        n = getattr(model, "n_features_in_", len(FEATURES))
+        if n != len(FEATURES):
+            raise ValueError(f"model expects {n} features, service builds {len(FEATURES)}")
+        logger.info("Loaded placement model %s path=%s", type(model).__name__, path)
+        return model
+    except Exception as e:
+        logger.warning("Failed to load placement model at %s: %s; using heuristic predictions", path, e)
+        return None
+
+
+def warm_up(model) -> None:
+    """Run one prediction so the first request does not pay for lazy initialisation."""
+    if model is None:
+        return
+    t0 = time.perf_counter()
+    model.predict_proba(build_features([{"skills": []}]))
+    logger.info("Model warm-up took %.1f ms", (time.perf_counter() - t0) * 1000.0)
+
+
+def department_code(value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str) and value.strip():
+        return float(DEPARTMENT_CODES.get(value.strip().upper(), FEATURE_DEFAULTS["department"]))
+    return float(FEATURE_DEFAULTS["department"])
+
+
+def feature_row(payload: dict) -> List[float]:
+    """Model inputs in FEATURES order; ValueError names a feature that is not a finite number."""
+    row: List[float] = []
+    for name in FEATURES:
+        value = next((payload[k] for k in FEATURE_ALIASES[name] if payload.get(k) is not None), None)
+        if name == "department":
+            row.append(department_code(value))
+        elif name == "skill_count" and value is None:
+            skills = [s for s in payload.get("skills", []) if isinstance(s, str)]
+            row.append(float(len({s.strip().lower() for s in skills if s.strip()})))
+        else:
+            try:
+                x = float(value) if value is not None else float(FEATURE_DEFAULTS[name])
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number")
+            # float() accepts "nan" and "inf", which predict_proba rejects
+            if not math.isfinite(x):
+                raise ValueError(f"{name} must be a number")
+            row.append(x)
+    return row
+
+
+def request_row(payload: dict) -> List[float]:
+    # Rows are built in the handler: HTTPException does not survive the trip back from a process pool
+    try:
+        return feature_row(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def build_features(payloads: List[dict]):
+    return np.asarray([feature_row(p) for p in payloads], dtype=np.float64).reshape(len(payloads), len(FEATURES))
+
+
+def model_version(model, path: str = MODEL_PATH) -> str:
+    """Digest of the served model file; stored predictions from another model do not match."""
+    if model is None:
+        return "heuristic"
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+MODEL = load_model()
+MODEL_VERSION = model_version(MODEL)
+warm_up(MODEL)
+
 
 def predict_placement(skills: list) -> float:
+    """Heuristic fallback used when the model cannot be loaded."""
     n = len(set(skills))
     # New heuristic: base = 0.08 * n, cap at 0.95, min 0.10, add small random factor
     base = max(0.10, min(0.08 * n, 0.95))
@@ -21,15 +172,153 @@ def predict_placement(skills: list) -> float:
     prob = max(0.10, min(base + noise, 0.95))
     return round(prob, 2)
 
+
+def predict_rows(rows: List[List[float]]) -> List[float]:
+    """Model probabilities for already-built feature rows, one predict_proba call."""
+    if not rows:
+        return []
+    proba = MODEL.predict_proba(np.asarray(rows, dtype=np.float64).reshape(len(rows), len(FEATURES)))[:, 1]
+    return [round(float(p), 2) for p in proba]
+
+
+def predict_many(payloads: List[dict]) -> List[float]:
+    """Placement probabilities for a batch of students with one predict_proba call."""
+    if not payloads:
+        return []
+    if MODEL is None:
+        return [predict_placement([s for s in p.get("skills", []) if isinstance(s, str)]) for p in payloads]
+    return predict_rows([feature_row(p) for p in payloads])
+
+
+async def predict_students(students: List[dict], rows: List[List[float]], large: bool = False) -> List[float]:
+    """Validated students through predict_policy: the model on their rows, or the heuristic on their skills."""
+    if MODEL is None:
+        return await predict_policy.run(predict_many, students, large=large)
+    return await predict_policy.run(predict_rows, rows, large=large)
+
+
+# Concurrent /predict-placement calls are coalesced into one predict_proba per window
+MICROBATCH_ENABLED = os.getenv("PREDICT_MICROBATCH", "1").lower() not in ("0", "false", "no")
+MICROBATCH_WINDOW_MS = float(os.getenv("PREDICT_MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("PREDICT_MICROBATCH_MAX_SIZE", "64"))
+
+# Inference runs under this policy instead of Starlette's shared threadpool
+# (PREDICT_EXECUTOR=inline|thread|process, see executor_policy.py). Every request waiting
+# for a micro-batch holds a place, so the default queue leaves room for a few full batches.
+# Batches of at least PREDICT_LARGE_BATCH_STUDENTS go to their own lane; a full lane is a 503.
+predict_policy = ExecutionPolicy.from_env("PREDICT", queue=4 * MICROBATCH_MAX_SIZE)
+PREDICT_LARGE_BATCH_STUDENTS = int(os.getenv("PREDICT_LARGE_BATCH_STUDENTS", "1000"))
+install_executor_policy(app)
+
+batcher = MicroBatcher(predict_rows, max_batch=MICROBATCH_MAX_SIZE, window_ms=MICROBATCH_WINDOW_MS,
+                       runner=predict_policy.call, metrics=metrics)
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+    predict_policy.shutdown()
+
+
+# Predictions precomputed by materialize.py, served to requests that carry a student_id
+REC_STORE_URL = os.getenv("REC_STORE_URL", "")
+REC_STORE_MAX_AGE_SECONDS = float(os.getenv("REC_STORE_MAX_AGE_SECONDS", "86400"))
+
+
+def open_store(url: str = REC_STORE_URL):
+    if not url:
+        return None
+    try:
+        return RecStore(url)
+    except Exception as e:
+        logger.warning("Prediction store unavailable (%s); predicting every request live", e)
+        return None
+
+
+REC_STORE = open_store()
+
+
+def prediction_hash(row: List[float]) -> str:
+    """Inputs digest of a stored prediction: model version and the full feature row."""
+    return inputs_hash(MODEL_VERSION, row)
+
+
 @app.post("/predict-placement")
-def predict(payload: dict = Body(...)):
-    skills = [s for s in payload.get("skills", []) if isinstance(s, str)]
-    prob = predict_placement(skills)
+async def predict(payload: dict = Body(...)):
+    student_id = payload.get("student_id")
+    # Validated here so one bad payload cannot fail a whole micro-batch
+    row = request_row(payload)
+    if REC_STORE is not None and isinstance(student_id, int):
+        stored = await run_in_threadpool(REC_STORE.prediction, student_id, prediction_hash(row), REC_STORE_MAX_AGE_SECONDS)
+        if stored is not None:
+            return {"placement_probability": round(stored, 2)}
+    if MODEL is None or not MICROBATCH_ENABLED:
+        with metrics.stage("model_inference"):
+            prob = (await predict_students([payload], [row]))[0]
+    else:
+        # Includes the wait for the micro-batch window
+        with predict_policy.admit(), metrics.stage("model_inference"):
+            prob = await batcher.submit(row)
     return {"placement_probability": round(prob, 2)}
 
+
+PREDICT_BATCH_MAX = int(os.getenv("PREDICT_BATCH_MAX", "100000"))
+
+
+@app.post("/predict-placement/batch")
+async def predict_batch(payload: dict = Body(...)):
+    """Body `{"students": [{student_id, skills, cgpa?, department?, ...}]}`; one vectorized model call.
+
+    Results follow input order. A student whose features are not numbers gets
+    `{"student_id", "error"}` in place of a probability; the rest are still predicted.
+    """
+    students = [st for st in payload.get("students", []) if isinstance(st, dict)]
+    if len(students) > PREDICT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {PREDICT_BATCH_MAX} students")
+    results: List[dict] = []
+    valid: List[dict] = []
+    rows: List[List[float]] = []
+    for st in students:
+        result = {"student_id": st.get("student_id")}
+        try:
+            rows.append(feature_row(st))
+            valid.append(st)
+        except ValueError as e:
+            result["error"] = str(e)
+        results.append(result)
+    with metrics.stage("model_inference_batch"):
+        probs = await predict_students(valid, rows, large=len(valid) >= PREDICT_LARGE_BATCH_STUDENTS) if valid else []
+    predicted = iter(probs)
+    for result in results:
+        if "error" not in result:
+            result["placement_probability"] = next(predicted)
+    logger.info("Batch predictions computed count=%d failed=%d", len(probs), len(results) - len(probs))
+    return {"results": results}
+
+
+@app.get("/diagnostics")
+def diagnostics():
+    return {
+        "model_loaded": MODEL is not None,
+        "model_type": type(MODEL).__name__ if MODEL is not None else "heuristic",
+        "features": FEATURES,
+        "feature_defaults": FEATURE_DEFAULTS,
+        "model_version": MODEL_VERSION,
+        "microbatch": {"enabled": MICROBATCH_ENABLED, **batcher.stats()},
+        "executor": predict_policy.stats(),
+        "rec_store": REC_STORE.stats() if REC_STORE is not None else None,
+    }
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+# Worker processes, as for `uvicorn --workers`; the model is small, so each worker loads its own
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8003)
+    if WEB_CONCURRENCY > 1:
+        uvicorn.run("main:app", host="0.0.0.0", port=8003, workers=WEB_CONCURRENCY, app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8003)
@@ -0,0 +1,47 @@
+"""Precompute every student's placement probability into the recommendation store.
+
+    python materialize.py --db sqlite:///recs.db [--batch-size 4096]
+
+Reads each student's latest resume skills plus cgpa/department in batches,
+predicts a batch with one predict_proba call and replaces the batch's stored
+predictions in one bulk write. The service serves a stored prediction while
+the request's feature row and the model file match.
+"""
+import argparse
+import logging
+import os
+import time
+
+import main
+from rec_store import RecStore
+
+logger = logging.getLogger("placement-predict")
+
+MATERIALIZE_BATCH_SIZE = int(os.getenv("MATERIALIZE_BATCH_SIZE", "4096"))
+
+
+def materialize(store: RecStore, batch_size: int = MATERIALIZE_BATCH_SIZE) -> int:
+    """Predict and store every student; returns the number of students written."""
+    students = 0
+    for batch in store.iter_students(batch_size):
+        rows = [main.feature_row(st) for st in batch]
+        probs = main.predict_rows(rows) if main.MODEL is not None else main.predict_many(batch)
+        store.write_predictions([
+            (st["student_id"], main.prediction_hash(row), prob) for st, row, prob in zip(batch, rows, probs)
+        ])
+        students += len(batch)
+    return students
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=main.REC_STORE_URL or os.getenv("DATABASE_URL", ""), help="store URL (sqlite:///path or postgresql://...)")
+    parser.add_argument("--batch-size", type=int, default=MATERIALIZE_BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.db:
+        parser.error("--db (or REC_STORE_URL / DATABASE_URL) is required")
+    store = RecStore(args.db)
+    t0 = time.perf_counter()
+    n = materialize(store, args.batch_size)
+    logger.info("Materialized placement predictions students=%d in %.1fs", n, time.perf_counter() - t0)
+    store.close()
@@ -0,0 +1,136 @@
+"""Asyncio micro-batcher for model inference.
+
+Concurrent callers submit one item each; a single dispatcher task gathers
+whatever is queued, waits up to `window_ms` for more (or until `max_batch`),
+runs the whole batch with one call on a worker thread (or through `runner`,
+an awaitable `runner(fn, items)` such as an execution policy's `call`) and
+resolves every caller's future. When a batch call fails its items are
+re-run one at a time, so only the callers whose items fail get the
+exception; a caller cancelled while queued is left out. While a batch is
+running new requests keep queueing, so batches grow with load and a lone
+request only pays the window.
+
+Batch sizes and queue waits are histograms of the service's Metrics
+(ml-service/shared/instrumentation.py), so they are served on /metrics as
+microbatch_size and microbatch_queue_wait_seconds.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from instrumentation import Histogram, Metrics
+
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+QUEUE_WAIT_BUCKETS_SECONDS = (0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch: int = 64, window_ms: float = 2.0,
+                 runner: Optional[Callable[..., Awaitable[List[Any]]]] = None, metrics: Optional[Metrics] = None):
+        self.fn = fn
+        self.runner = runner or run_in_threadpool
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window_ms) / 1000.0
+        # Without a Metrics the histograms are kept for stats() only
+        self.labels = (metrics.service if metrics is not None else "",)
+        sizes = ("microbatch_size", "Items per micro-batch", ("service",), BATCH_SIZE_BUCKETS)
+        waits = ("microbatch_queue_wait_seconds", "Time from submit to the start of the item's batch", ("service",),
+                 QUEUE_WAIT_BUCKETS_SECONDS)
+        self.batch_sizes = metrics.histogram(*sizes) if metrics is not None else Histogram(*sizes)
+        self.queue_wait = metrics.histogram(*waits) if metrics is not None else Histogram(*waits)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        # Bound to the running loop on first use (uvicorn and TestClient each own one)
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._queue
+
+    async def submit(self, item: Any) -> Any:
+        queue = self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        queue = self._queue
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            # Callers that went away while queued are not worth running
+            batch = [entry for entry in await self._collect() if not entry[1].done()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            self.batch_sizes.observe(self.labels, len(batch))
+            for _, _, enqueued in batch:
+                self.queue_wait.observe(self.labels, started - enqueued)
+            try:
+                results = await self.runner(self.fn, [item for item, _, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._resolve(batch[0][1], error=e)
+                else:
+                    await self._run_singly(batch)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                self._resolve(future, result)
+
+    async def _run_singly(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        # One bad item must not fail its neighbours
+        for item, future, _ in batch:
+            if future.done():
+                continue
+            try:
+                result = (await self.runner(self.fn, [item]))[0]
+            except Exception as e:
+                self._resolve(future, error=e)
+            else:
+                self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        # Caller may have gone away (client disconnect cancels its await)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": self.window * 1000.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.snapshot(self.labels),
+            "queue_wait_seconds": self.queue_wait.snapshot(self.labels),
+        }
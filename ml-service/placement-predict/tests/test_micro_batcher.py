@@ -0,0 +1,134 @@
+"""Micro-batcher: window and max_batch coalescing, failures stay with their item, cancelled callers are dropped."""
+import asyncio
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "..", "shared"))
+
+from micro_batcher import MicroBatcher  # noqa: E402
+
+
+class Runner:
+    """Records every batch; each call waits for `release` so tests decide when a batch finishes."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, fn, items):
+        self.batches.append(list(items))
+        await self.release.wait()
+        return fn(items)
+
+
+def double(items):
+    return [2 * x for x in items]
+
+
+def test_queued_items_are_coalesced_up_to_max_batch():
+    async def scenario():
+        runner = Runner()
+        batcher = MicroBatcher(double, max_batch=3, window_ms=0, runner=runner)
+        # All five are queued before the dispatcher first runs
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return runner.batches, results, batcher.stats()
+
+    batches, results, stats = asyncio.run(scenario())
+    assert batches == [[0, 1, 2], [3, 4]] and results == [0, 2, 4, 6, 8]
+    assert stats["batch_size"]["count"] == 2 and stats["batch_size"]["sum"] == 5
+
+
+def test_the_window_waits_for_stragglers_but_not_past_max_batch():
+    async def scenario():
+        runner = Runner()
+        batcher = MicroBatcher(double, max_batch=2, window_ms=10_000, runner=runner)
+        first = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.01)
+        assert runner.batches == []  # still inside the window
+        # The second item fills the batch, which runs without waiting out the window
+        second = await asyncio.wait_for(batcher.submit(2), 1.0)
+        assert await first == 2 and second == 4
+
+        # A lone item runs once the window closes
+        batcher.window = 0.02
+        assert await asyncio.wait_for(batcher.submit(3), 1.0) == 6
+        await batcher.stop()
+        return runner.batches
+
+    assert asyncio.run(scenario()) == [[1, 2], [3]]
+
+
+def flaky(items):
+    if 0 in items:
+        raise RuntimeError("model crashed")
+    return double(items)
+
+
+def test_a_failed_batch_only_fails_the_bad_item_and_the_next_batch_still_runs():
+    async def scenario():
+        runner = Runner()
+        batcher = MicroBatcher(flaky, max_batch=8, window_ms=0, runner=runner)
+        outcomes = await asyncio.gather(*(batcher.submit(i) for i in (1, 0, 2)), return_exceptions=True)
+        after = await batcher.submit(5)
+        await batcher.stop()
+        return outcomes, after, runner.batches
+
+    outcomes, after, batches = asyncio.run(scenario())
+    assert outcomes[0] == 2 and outcomes[2] == 4
+    assert isinstance(outcomes[1], RuntimeError) and str(outcomes[1]) == "model crashed"
+    # The failed batch is re-run one item at a time
+    assert after == 10 and batches == [[1, 0, 2], [1], [0], [2], [5]]
+
+
+def test_concurrent_callers_next_to_a_bad_item_get_their_results():
+    async def scenario():
+        runner = Runner()
+        runner.release.clear()
+        batcher = MicroBatcher(flaky, max_batch=64, window_ms=0, runner=runner)
+        # 7 occupies the dispatcher so the rest share one batch behind it
+        first = asyncio.ensure_future(batcher.submit(7))
+        while not runner.batches:
+            await asyncio.sleep(0)
+        rest = [asyncio.ensure_future(batcher.submit(i)) for i in range(-5, 6)]
+        await asyncio.sleep(0)
+        runner.release.set()
+        outcomes = await asyncio.gather(first, *rest, return_exceptions=True)
+        await batcher.stop()
+        return outcomes, runner.batches
+
+    outcomes, batches = asyncio.run(scenario())
+    assert batches[:2] == [[7], list(range(-5, 6))]
+    errors = [i for i, o in zip([7, *range(-5, 6)], outcomes) if isinstance(o, RuntimeError)]
+    assert errors == [0]
+    assert [o for o in outcomes if not isinstance(o, Exception)] == [14] + [2 * i for i in range(-5, 6) if i != 0]
+
+
+def test_cancelled_callers_are_left_out_and_the_rest_get_their_results():
+    async def scenario():
+        runner = Runner()
+        runner.release.clear()
+        batcher = MicroBatcher(double, max_batch=8, window_ms=0, runner=runner)
+        # Item 1 occupies the dispatcher while 2, 3 and 4 queue behind it
+        running = asyncio.ensure_future(batcher.submit(1))
+        while not runner.batches:
+            await asyncio.sleep(0)
+        queued = [asyncio.ensure_future(batcher.submit(i)) for i in (2, 3, 4)]
+        await asyncio.sleep(0)
+        queued[1].cancel()
+        # Cancelled while its batch runs: the result is dropped, nothing breaks
+        running.cancel()
+        runner.release.set()
+        results = await asyncio.gather(queued[0], queued[2])
+        with pytest.raises(asyncio.CancelledError):
+            await queued[1]
+        await batcher.stop()
+        return runner.batches, results
+
+    batches, results = asyncio.run(scenario())
+    assert batches == [[1], [2, 4]] and results == [4, 8]
@@ -0,0 +1,106 @@
+"""Placement predictions: batch and single paths agree, the heuristic fallback and input validation."""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+STUDENTS = [
+    {"student_id": 1, "skills": ["Python", "SQL"], "cgpa": 8.4, "department": "CSE", "projects": 3},
+    {"student_id": 2, "skills": ["Java"], "cgpa": "6.1", "dept": "Mechanical", "internships": 1},
+    {"student_id": 3, "skills": [], "aptitudeScore": 91, "interviewPerformance": 55},
+    {"student_id": 4, "skills": ["Docker", "Go", "Rust", "Kotlin", "docker "], "department": 2},
+]
+
+
+def post_all(payloads):
+    """Every payload as its own /predict-placement call, all in flight at once."""
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.post("/predict-placement", json=p) for p in payloads))
+        await main.batcher.stop()
+        return responses
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("microbatch", [True, False])
+def test_batch_predictions_match_single_requests(monkeypatch, microbatch):
+    assert main.MODEL is not None
+    monkeypatch.setattr(main, "MICROBATCH_ENABLED", microbatch)
+    single = [r.json()["placement_probability"] for r in post_all(STUDENTS * 3)]
+    batch = TestClient(main.app).post("/predict-placement/batch", json={"students": STUDENTS}).json()["results"]
+    assert [r["student_id"] for r in batch] == [1, 2, 3, 4]
+    assert single == [r["placement_probability"] for r in batch] * 3
+    assert single[:4] == main.predict_many(STUDENTS)
+    # Students differ, so the model actually looked at their features
+    assert len(set(single[:4])) > 1
+    if microbatch:
+        assert main.batcher.stats()["batch_size"]["count"] >= 1
+        body = TestClient(main.app).get("/metrics").text
+        assert 'microbatch_size_count{service="placement-predict"}' in body
+        assert 'microbatch_queue_wait_seconds_bucket{service="placement-predict",le="+Inf"}' in body
+
+
+def test_heuristic_fallback_without_a_model(monkeypatch):
+    monkeypatch.setattr(main, "MODEL", None)
+    monkeypatch.setattr(main.random, "uniform", lambda lo, hi: 0.0)
+    client = TestClient(main.app)
+    # 0.08 per distinct skill string, clamped to [0.10, 0.95]
+    assert client.post("/predict-placement", json={"skills": ["A", "B", "C", "D", "E"]}).json() == {"placement_probability": 0.4}
+    assert client.post("/predict-placement", json={"skills": []}).json() == {"placement_probability": 0.1}
+    batch = client.post("/predict-placement/batch", json={"students": STUDENTS}).json()["results"]
+    assert [r["placement_probability"] for r in batch] == [0.16, 0.1, 0.1, 0.4]
+    assert client.get("/diagnostics").json()["model_loaded"] is False
+
+
+def test_bad_input_is_a_422_and_only_fails_its_own_batch_row():
+    client = TestClient(main.app)
+    bad = {"student_id": 9, "skills": ["Python"], "cgpa": "eight"}
+    response = client.post("/predict-placement", json=bad)
+    assert response.status_code == 422 and response.json()["detail"] == "cgpa must be a number"
+    assert client.post("/predict-placement", json=["not", "an", "object"]).status_code == 422
+    # 1e400 is valid JSON that parses to inf
+    for value in ('"nan"', '"inf"', '"-Infinity"', "1e400"):
+        response = client.post("/predict-placement", content='{"cgpa": %s}' % value,
+                               headers={"Content-Type": "application/json"})
+        assert response.status_code == 422 and response.json()["detail"] == "cgpa must be a number"
+
+    students = [STUDENTS[0], bad, {"student_id": 10, "projects": [1, 2]}, STUDENTS[1],
+                {"student_id": 11, "cgpa": "nan"}, {"student_id": 12, "aptitude_score": "inf"}]
+    results = client.post("/predict-placement/batch", json={"students": students}).json()["results"]
+    assert results[1] == {"student_id": 9, "error": "cgpa must be a number"}
+    assert results[2] == {"student_id": 10, "error": "projects must be a number"}
+    assert results[4:] == [{"student_id": 11, "error": "cgpa must be a number"},
+                           {"student_id": 12, "error": "aptitude_score must be a number"}]
+    assert [r["placement_probability"] for r in (results[0], results[3])] == main.predict_many([STUDENTS[0], STUDENTS[1]])
+    assert client.post("/predict-placement/batch", json={"students": [bad]}).json() == {
+        "results": [{"student_id": 9, "error": "cgpa must be a number"}]
+    }
+
+
+def test_process_executor_gets_only_validated_rows(monkeypatch):
+    policy = main.ExecutionPolicy("predict", "process", workers=1)
+    monkeypatch.setattr(main, "predict_policy", policy)
+    monkeypatch.setattr(main, "MICROBATCH_ENABLED", False)
+    client = TestClient(main.app)
+    try:
+        students = [STUDENTS[0], {"student_id": 9, "cgpa": "eight"}]
+        results = client.post("/predict-placement/batch", json={"students": students}).json()["results"]
+        assert results == [
+            {"student_id": 1, "placement_probability": main.predict_many(STUDENTS[:1])[0]},
+            {"student_id": 9, "error": "cgpa must be a number"},
+        ]
+        assert client.post("/predict-placement", json=students[1]).status_code == 422
+    finally:
+        policy.shutdown()
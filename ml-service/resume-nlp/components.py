@@ -0,0 +1,107 @@
+"""Lazily loaded optional components (spaCy, OCR, PDF/DOCX backends, corpus).
+
+Nothing heavy is imported when the service module loads. Each component is
+registered with a loader that runs on first `get()` (or from the warm-up hook)
+and its result, or the reason it failed, is kept for the life of the process.
+`available()` answers from importlib metadata without importing anything, so
+/diagnostics can report optional dependencies without paying for them.
+"""
+import importlib.util
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("resume-nlp")
+
+_MISSING = object()
+
+
+class ComponentUnavailable(RuntimeError):
+    pass
+
+
+class Component:
+    def __init__(self, name: str, loader: Callable[[], Any], modules: Iterable[str] = ()):
+        self.name = name
+        self.loader = loader
+        self.modules = tuple(modules)
+        self.value: Any = _MISSING
+        self.error: Optional[str] = None
+        self.load_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.error is not None:
+            return "unavailable"
+        return "not_loaded" if self.value is _MISSING else "loaded"
+
+    def installed(self) -> bool:
+        try:
+            return all(importlib.util.find_spec(m) is not None for m in self.modules)
+        except (ImportError, ValueError):
+            return False
+
+    def load(self) -> Any:
+        if self.value is not _MISSING:
+            return self.value
+        with self._lock:
+            if self.value is _MISSING and self.error is None:
+                t0 = time.perf_counter()
+                try:
+                    self.value = self.loader()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    logger.warning("Component %s unavailable: %s", self.name, self.error)
+                finally:
+                    self.load_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+                if self.error is None:
+                    logger.info("Loaded component %s in %.1f ms", self.name, self.load_ms)
+        if self.error is not None:
+            raise ComponentUnavailable(f"{self.name}: {self.error}")
+        return self.value
+
+
+class ComponentRegistry:
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], modules: Iterable[str] = ()) -> None:
+        """modules: import names that must be installed for the component to load."""
+        self._components[name] = Component(name, loader, modules)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._components
+
+    def names(self) -> List[str]:
+        return list(self._components)
+
+    def get(self, name: str) -> Any:
+        return self._components[name].load()
+
+    def loaded(self, name: str) -> bool:
+        return self._components[name].state == "loaded"
+
+    def available(self, name: str) -> bool:
+        """Loaded, or not tried yet and every required module is installed."""
+        component = self._components[name]
+        if component.state == "not_loaded":
+            return component.installed()
+        return component.state == "loaded"
+
+    def warm(self, names: Iterable[str]) -> Dict[str, str]:
+        """Load each named component now; unavailable ones are reported, not raised."""
+        names = list(names)
+        for name in names:
+            try:
+                self.get(name)
+            except ComponentUnavailable:
+                pass
+        return {name: self._components[name].state for name in names}
+
+    def status(self) -> Dict[str, dict]:
+        return {
+            name: {"state": c.state, "load_ms": c.load_ms, **({"error": c.error} if c.error else {})}
+            for name, c in self._components.items()
+        }
@@ -0,0 +1,240 @@
+"""Versioned skill-corpus snapshots, swapped in atomically.
+
+A CorpusSnapshot bundles the corpus and alias table, their compiled
+SkillMatcher (plus the fuzzy index, when the store has a builder for one)
+and the cache digest, and is never modified once published. Readers grab
+`store.current` once per request and use that object throughout, so a
+reload can never hand them an empty or half-built matcher. New snapshots are compiled off to the
+side and published with a single attribute assignment.
+
+With a SnapshotChannel (ml-service/shared/mmap_snapshot.py) the store is
+shared by worker processes: publishing writes the corpus and the flattened
+automaton to a snapshot file every worker maps, and each worker adopts the
+channel's current file the next time it reads `store.current`. A publish
+whose corpus, aliases and file stamp equal the current file's adopts that
+file instead of compiling again, so workers that start, or see a file
+change, at the same time compile it once between them.
+
+CorpusWatcher polls the snapshot's file (mtime_ns, size) and republishes it
+once a change has settled: the new stamp must be seen on two consecutive
+polls, so a file caught halfway through a write is not loaded.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from skill_matcher import MappedSkillMatcher, SkillMatcher
+
+logger = logging.getLogger("resume-nlp")
+
+Stamp = Optional[Tuple[int, int]]
+
+
+def file_stamp(path: str) -> Stamp:
+    """(mtime_ns, size) of path, or None when it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+Aliases = Dict[str, Tuple[str, ...]]
+
+
+def corpus_digest(corpus: Iterable[str], aliases: Optional[Aliases] = None) -> str:
+    text = "\n".join(corpus)
+    if aliases:
+        # Without aliases the digest is unchanged, so existing parse cache entries stay valid
+        text += "\n\0" + "\n".join(f"{name}={','.join(variants)}" for name, variants in aliases.items())
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class CorpusSnapshot(NamedTuple):
+    version: int
+    digest: str  # content hash; part of every parse cache key
+    corpus: Sequence[str]  # a tuple, or a StringTable in a shared snapshot file
+    matcher: SkillMatcher
+    path: str
+    stamp: Stamp  # file stamp taken before the corpus was read
+    loaded_at: float
+    fuzzy: Any = None  # FuzzySkillIndex, or None when the fuzzy pass is off
+    aliases: Optional[Aliases] = None  # canonical skill -> variants, compiled into matcher
+
+
+class CorpusStore:
+    def __init__(self, short_whitelist: Iterable[str] = (),
+                 fuzzy_builder: Optional[Callable[[Sequence[str]], Any]] = None,
+                 channel=None):
+        self.short_whitelist = frozenset(short_whitelist)
+        self.fuzzy_builder = fuzzy_builder
+        # SnapshotChannel shared with the other workers, or None for a private store
+        self.channel = channel
+        self._current: Optional[CorpusSnapshot] = None
+        self._version = 0
+        # Serializes builds only; readers never take it
+        self._build_lock = threading.Lock()
+        self._adopt_lock = threading.Lock()
+
+    @property
+    def current(self) -> CorpusSnapshot:
+        channel = self.channel
+        if channel is not None and channel.changed():
+            # Another worker published: switch before this request picks its snapshot
+            with self._adopt_lock:
+                if channel.changed():
+                    mapped = channel.current()
+                    if mapped is not None:
+                        self._adopt(mapped)
+        return self._current
+
+    def publish(self, corpus: Sequence[str], path: str, stamp: Stamp = None,
+                aliases: Optional[Aliases] = None) -> CorpusSnapshot:
+        """Compile a matcher for corpus (and aliases) and make it the current snapshot."""
+        if self.channel is not None:
+            return self._publish_shared(tuple(corpus), path, stamp, aliases)
+        with self._build_lock:
+            t0 = time.perf_counter()
+            entries = tuple(corpus)
+            matcher = SkillMatcher(entries, self.short_whitelist, aliases)
+            fuzzy = self.fuzzy_builder(entries) if self.fuzzy_builder is not None else None
+            self._version += 1
+            snapshot = CorpusSnapshot(
+                version=self._version,
+                digest=corpus_digest(entries, aliases),
+                corpus=entries,
+                matcher=matcher,
+                path=path,
+                stamp=stamp,
+                loaded_at=time.time(),
+                fuzzy=fuzzy,
+                aliases=aliases,
+            )
+            self._current = snapshot
+        logger.info(
+            "Published corpus version=%d entries=%d canonical=%d patterns=%d fuzzy_keys=%s build_ms=%.1f",
+            snapshot.version, len(entries), len(matcher.canonical), len(matcher),
+            len(fuzzy) if fuzzy is not None else "off",
+            (time.perf_counter() - t0) * 1000.0,
+        )
+        return snapshot
+
+    def _publish_shared(self, entries: Tuple[str, ...], path: str, stamp: Stamp,
+                        aliases: Optional[Aliases]) -> CorpusSnapshot:
+        meta = {
+            "digest": corpus_digest(entries, aliases),
+            "path": path,
+            "stamp": list(stamp) if stamp is not None else None,
+            "aliases": {name: list(variants) for name, variants in aliases.items()} if aliases else None,
+        }
+        with self._build_lock, self.channel.exclusive():
+            t0 = time.perf_counter()
+            mapped = self.channel.current()
+            if mapped is not None and all(mapped.meta.get(k) == v for k, v in meta.items()):
+                return self._adopt(mapped)
+            matcher = SkillMatcher(entries, self.short_whitelist, aliases)
+            meta["version"] = (mapped.meta["version"] if mapped is not None else 0) + 1
+            meta["loaded_at"] = time.time()
+            mapped = self.channel.publish({"corpus": entries, **matcher.to_sections()}, meta)
+        logger.info(
+            "Published shared corpus version=%d entries=%d patterns=%d bytes=%d build_ms=%.1f",
+            meta["version"], len(entries), len(matcher), mapped.nbytes, (time.perf_counter() - t0) * 1000.0,
+        )
+        return self._adopt(mapped)
+
+    def _adopt(self, mapped) -> CorpusSnapshot:
+        """Make a mapped snapshot file current; only the fuzzy index is built per process."""
+        current = self._current
+        if current is not None and isinstance(current.matcher, MappedSkillMatcher) and current.matcher.snapshot.path == mapped.path:
+            return current
+        meta = mapped.meta
+        entries = mapped.strings("corpus")
+        aliases = {name: tuple(variants) for name, variants in meta["aliases"].items()} if meta["aliases"] else None
+        snapshot = CorpusSnapshot(
+            version=meta["version"],
+            digest=meta["digest"],
+            corpus=entries,
+            matcher=MappedSkillMatcher(mapped),
+            path=meta["path"],
+            stamp=tuple(meta["stamp"]) if meta["stamp"] is not None else None,
+            loaded_at=meta["loaded_at"],
+            fuzzy=self.fuzzy_builder(list(entries)) if self.fuzzy_builder is not None else None,
+            aliases=aliases,
+        )
+        self._current = snapshot
+        logger.info("Adopted shared corpus version=%d file=%s", snapshot.version, mapped.path)
+        return snapshot
+
+
+class CorpusWatcher:
+    def __init__(self, store: CorpusStore, reload: Callable[[str], CorpusSnapshot], interval: float = 2.0):
+        self.store = store
+        self.reload = reload
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._pending: Stamp = None
+        self._failed: Stamp = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self) -> None:
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll(self) -> Optional[CorpusSnapshot]:
+        """One check; returns the new snapshot when the file was reloaded."""
+        snapshot = self.store.current
+        if snapshot is None:
+            # Nothing to watch until the corpus has been loaded
+            return None
+        stamp = file_stamp(snapshot.path)
+        if stamp is None or stamp == snapshot.stamp or stamp == self._failed:
+            self._pending = None
+            return None
+        if stamp != self._pending:
+            # Changed since the last poll: wait one more interval for the writer to finish
+            self._pending = stamp
+            return None
+        self._pending = None
+        try:
+            fresh = await run_in_threadpool(self.reload, snapshot.path)
+        except Exception as e:
+            # Not retried until the file changes again
+            self._failed = stamp
+            self.failures += 1
+            logger.warning("Corpus reload from %s failed: %s; keeping version %d", snapshot.path, e, snapshot.version)
+            return None
+        self.reloads += 1
+        return fresh
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.poll()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval_seconds": self.interval,
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
@@ -0,0 +1,246 @@
+"""Fuzzy second pass for skills the exact SkillMatcher did not find.
+
+Catches spelling variants and OCR damage: "Reactjs", "Node JS", "Postgre SQL",
+"Tensorfiow". Queries are single tokens and runs of up to `max_words` tokens
+separated by plain spaces on one line, longest run first, left to right; each
+must include at least one token the exact matcher left unclaimed. Single
+tokens and a claimed token plus the next one ("React Nativ") get steps 1 and 2
+below; other runs only step 1.
+
+Resume text and skills are compared as compact keys: folded, with everything
+but letters, digits, '+' and '#' dropped, so "Node JS", "node.js" and "NodeJS"
+are all "nodejs". For each query key:
+
+1. a skill with the same compact key matches outright (score 100); a trailing
+   "js" may also be dropped ("reactjs" -> React)
+2. otherwise candidates come from a trigram index bucketed by key length. Only
+   lengths that can still reach the cutoff are read. A skill within the cutoff
+   shares at least (q-gram lemma bound) trigrams with the query, so only the
+   postings of the query's rarest len(grams) - bound + 1 trigrams are read
+   (where the bound is <= 0, which takes very short keys and a low cutoff, the
+   whole length bucket is). rapidfuzz scores that union (fuzz.ratio on the
+   compact keys, kept if >= cutoff), so results equal a scan of the corpus.
+   Words in `ignore` (COMMON_WORDS plus whatever the caller adds) skip this
+   step.
+
+Most resume words are not skills and recur across resumes, so results per
+query key are memoized (bounded) on the index. An index belongs to one corpus
+snapshot and is never modified after it is built, apart from that memo.
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz, process
+
+from skill_matcher import fold
+
+# Matched on folded text. Words may carry internal dots (node.js, asp.net) and + / # (c++, c#)
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+_NON_KEY = re.compile(r"[^a-z0-9+#]+")
+_Q = 3
+_PREFIX = 6
+_EPS = 1e-9
+_RUN = re.compile(_TOKEN.pattern + r"(?:[ \t]+" + _TOKEN.pattern + ")*")
+
+# Everyday resume words within the default cutoff of a shipped skill
+# ("testing" ~ TestNG, "objective" ~ Objective-C); they only match exactly
+COMMON_WORDS = ("objective", "testing")
+
+
+def compact(text: str) -> str:
+    return _NON_KEY.sub("", fold(text))
+
+
+def _grams(key: str) -> List[str]:
+    # One boundary marker per side: a key of n characters has n trigrams
+    padded = f"^{key}$"
+    return [padded[i:i + _Q] for i in range(len(padded) - _Q + 1)]
+
+
+class FuzzySkillIndex:
+    def __init__(self, skills: Iterable[str], cutoff: float = 90.0, min_length: int = 4,
+                 max_words: int = 3, ignore: Iterable[str] = COMMON_WORDS, memo_size: int = 100_000):
+        self.cutoff = float(cutoff)
+        self.min_length = min_length
+        self.max_words = max_words
+        self.memo_size = memo_size
+        self._ignore = frozenset(compact(w) for w in ignore)
+        self.skills: List[str] = []
+        self._keys: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self._no_js: Dict[str, int] = {}
+        # Leading characters (up to _PREFIX) of every key: a run of words can only
+        # spell a key if its first word is, or starts with, one of these
+        self._prefixes = set()
+        # trigram -> key length -> skill ids, and key length -> skill ids
+        self._grams: Dict[str, Dict[int, List[int]]] = {}
+        self._by_length: Dict[int, List[int]] = {}
+        self._memo: Dict[str, Optional[Tuple[int, float]]] = {}
+
+        for skill in skills:
+            key = compact(skill)
+            if len(key) < min_length or key in self._exact:
+                continue
+            sid = len(self.skills)
+            self.skills.append(skill.strip())
+            self._keys.append(key)
+            self._exact[key] = sid
+            self._no_js.setdefault(key[:-2] if key.endswith("js") else key, sid)
+            self._prefixes.update(key[:k] for k in range(1, min(len(key), _PREFIX) + 1))
+            self._by_length.setdefault(len(key), []).append(sid)
+            for gram in set(_grams(key)):
+                self._grams.setdefault(gram, {}).setdefault(len(key), []).append(sid)
+
+        longest = max(map(len, self._keys), default=0)
+        self._max_query = math.floor(longest * (200.0 - self.cutoff) / self.cutoff + _EPS) if self.cutoff else 1 << 30
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _length_window(self, n: int) -> range:
+        # fuzz.ratio = 2 * matches / (a + b) <= 2 * min(a, b) / (a + b); the epsilon
+        # keeps float rounding from dropping a length that reaches the cutoff exactly
+        c = self.cutoff
+        lo = math.ceil(n * c / (200.0 - c) - _EPS)
+        hi = math.floor(n * (200.0 - c) / c + _EPS) if c else n * 4
+        return range(max(lo, self.min_length), hi + 1)
+
+    def _min_shared(self, a: int, b: int) -> int:
+        # Each insertion/deletion breaks at most q trigrams; ratio >= cutoff allows
+        # (a + b) * (1 - cutoff) of them. May be <= 0: no trigram need be shared
+        edits = math.floor((a + b) * (100.0 - self.cutoff) / 100.0 + _EPS)
+        return max(a, b) - _Q * edits
+
+    def exact(self, key: str) -> Optional[Tuple[int, float]]:
+        """Step 1 alone: a skill with this compact key (or this key minus "js")."""
+        sid = self._exact.get(key)
+        if sid is None and key.endswith("js"):
+            sid = self._no_js.get(key[:-2])
+        return (sid, 100.0) if sid is not None else None
+
+    def lookup(self, key: str) -> Optional[Tuple[int, float]]:
+        """(skill id, score) of the best skill for a compact key, or None."""
+        hit = self._memo.get(key, False)
+        if hit is not False:
+            return hit
+        hit = self._lookup(key)
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[key] = hit
+        return hit
+
+    def _lookup(self, key: str) -> Optional[Tuple[int, float]]:
+        hit = self.exact(key)
+        if hit is not None:
+            return hit
+        if key in self._ignore:
+            return None
+        n = len(key)
+        window = self._length_window(n)
+        if not window:
+            return None
+        grams = set(_grams(key))
+        # Bounds count trigrams with repeats; the index holds distinct ones
+        repeats = n - len(grams)
+        candidates = set()
+        indexed = []
+        for length in window:
+            if self._min_shared(n, length) - repeats > 0:
+                indexed.append(length)
+            else:
+                # Short keys at low cutoffs can match without sharing a trigram: score the bucket
+                candidates.update(self._by_length.get(length, ()))
+        if indexed:
+            postings = []
+            for gram in grams:
+                by_length = self._grams.get(gram)
+                lists = [by_length[length] for length in indexed if length in by_length] if by_length else []
+                postings.append((sum(map(len, lists)), gram, lists))
+            # Prefix filter: a skill sharing `need` of the query's distinct trigrams
+            # shares at least one of its len(grams) - need + 1 rarest ones
+            need = min(self._min_shared(n, length) for length in indexed) - repeats
+            postings.sort()
+            for _, _, lists in postings[:len(grams) - need + 1]:
+                for ids in lists:
+                    candidates.update(ids)
+        if not candidates:
+            return None
+        # Scored in C; on a tie extractOne keeps the first, i.e. the skill listed first in the corpus
+        ids = sorted(candidates)
+        keys = self._keys
+        best = process.extractOne(key, [keys[sid] for sid in ids], scorer=fuzz.ratio, score_cutoff=self.cutoff)
+        return (ids[best[2]], best[1]) if best is not None else None
+
+    def match(self, text: str, start: int = 0,
+              claimed: Sequence[Tuple[int, int]] = ()) -> List[Tuple[int, str, str, float]]:
+        """(position, skill, resume text, score) per fuzzy hit in text[start:], in order.
+
+        Tokens overlapping a `claimed` (start, end) span are never looked up on
+        their own, but may be part of a longer run ("Postgre SQL" with SQL claimed).
+        """
+        spans = sorted(claimed)
+        folded = fold(text)
+        memo, exact, lookup, prefixes = self._memo, self.exact, self.lookup, self._prefixes
+        min_length, max_query, max_words = self.min_length, self._max_query, self.max_words
+        hits: List[Tuple[int, str, str, float]] = []
+        seen = set()
+        ci = 0
+        # fold() keeps offsets. Tokens are ASCII and a run separates them with spaces
+        # and tabs only, so split() yields them; a token's compact key is the token minus dots
+        for run in _RUN.finditer(folded, start):
+            run_start, run_end = run.span()
+            chunk = run.group()
+            keys = chunk.replace(".", "").split() if "." in chunk else chunk.split()
+            while ci < len(spans) and spans[ci][1] <= run_start:
+                ci += 1
+            offsets = None
+            if ci < len(spans) and spans[ci][0] < run_end:
+                offsets = [m.span() for m in _TOKEN.finditer(folded, run_start, run_end)]
+                taken = []
+                k = ci
+                for s, e in offsets:
+                    while k < len(spans) and spans[k][1] <= s:
+                        k += 1
+                    taken.append(k < len(spans) and spans[k][0] < e)
+            else:
+                taken = [False] * len(keys)
+            n = len(keys)
+            i = 0
+            while i < n:
+                key = keys[i]
+                step = 1
+                hit = None
+                last = min(n, i + max_words) - 1
+                if last > i and key[:_PREFIX] in prefixes:
+                    run_keys = [key]
+                    for k in range(i + 1, last + 1):
+                        run_keys.append(run_keys[-1] + keys[k])
+                    # Longest run of words first, so "Postgre SQL" beats "Postgre"
+                    for j in range(last, i, -1):
+                        run_key = run_keys[j - i]
+                        claimed_words = taken[i:j + 1]
+                        if all(claimed_words) or len(run_key) > max_query:
+                            continue
+                        # A claimed skill plus the next word ("React Nativ") gets the full
+                        # lookup. Other runs rarely repeat across resumes, so the memo cannot
+                        # absorb them: they only get the exact-key step
+                        extends = j == i + 1 and claimed_words[0] and not claimed_words[1]
+                        hit = lookup(run_key) if extends else exact(run_key)
+                        if hit is not None:
+                            step = j - i + 1
+                            break
+                if hit is None and not taken[i] and min_length <= len(key) <= max_query:
+                    hit = memo.get(key, False)
+                    if hit is False:
+                        hit = None if key.isdigit() else lookup(key)
+                if hit is not None:
+                    sid, score = hit
+                    if sid not in seen:
+                        seen.add(sid)
+                        if offsets is None:
+                            offsets = [m.span() for m in _TOKEN.finditer(folded, run_start, run_end)]
+                        s, e = offsets[i][0], offsets[i + step - 1][1]
+                        hits.append((s, self.skills[sid], text[s:e], round(score, 1)))
+                i += step
+        return hits
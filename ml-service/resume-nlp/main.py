@@ -1,108 +1,301 @@
 from fastapi import FastAPI, UploadFile, File, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
-from io import BytesIO
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 import os
+import sys
 import logging
 from functools import lru_cache
-import re
+import mmap
+import time
+import hashlib
+import asyncio
+import zipfile
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+
+from components import ComponentRegistry, ComponentUnavailable
+from ocr_pipeline import OcrPipeline
+from corpus_snapshot import CorpusSnapshot, CorpusStore, CorpusWatcher, file_stamp
+from skill_matcher import MappedSkillMatcher
+from section_parser import GENERIC_LABELS, NEXT_SECTION_ANCHORS, ResumeSectionParser
+from parse_cache import ParseCache, make_key
+from upload_spool import Blob, SpooledUpload, UploadTooLarge, as_stream, map_file, spool_upload
+
+# Code shared by the ML services lives in ml-service/shared
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from executor_policy import ExecutionPolicy, install as install_executor_policy
+from instrumentation import Metrics
+from mmap_snapshot import SnapshotChannel
+
+# Request latency and per-stage histograms on /metrics; SERVER_TIMING=1 adds the header
+metrics = Metrics(
+    "resume-nlp",
+    enabled=os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"),
+    server_timing=os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes"),
+)
+
+# Optional and heavy dependencies load on first use (or from the startup warm-up),
+# so importing this module stays cheap; see components.py
+components = ComponentRegistry()
 
-# Optional OCR availability flags
-try:
+def _load_ocr():
     from PIL import Image  # type: ignore
     import pytesseract  # type: ignore
-    OCR_AVAILABLE = True
-except Exception:
-    OCR_AVAILABLE = False
+    return Image, pytesseract
+
+def _load_pypdf():
+    from pypdf import PdfReader
+    return PdfReader
+
+def _load_pdfminer():
+    # Importing these pulls in the whole pdfminer layout/interpreter stack
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    return TextConverter, LAParams, PDFPageInterpreter, PDFResourceManager, PDFPage
+
+def _load_docx():
+    import docx
+    return docx
+
+def _load_spacy():
+    # Not used by /parse; available to callers via components.get("spacy")
+    import spacy
+    return spacy.load(os.getenv("SPACY_MODEL", "en_core_web_sm"))
 
-# PDF and DOCX extractors
-def extract_text_from_pdf(data: bytes) -> str:
-    """Extract text from PDF with a quality heuristic.
+components.register("ocr", _load_ocr, modules=("PIL", "pytesseract"))
+components.register("pypdf", _load_pypdf, modules=("pypdf",))
+components.register("pdfminer", _load_pdfminer, modules=("pdfminer",))
+components.register("docx", _load_docx, modules=("docx",))
+components.register("spacy", _load_spacy, modules=("spacy",))
 
-    We try both PyPDF and pdfminer.six and choose the one with better quality.
-    Some PDFs render with missing glyphs (e.g., 'u' disappearing) in PyPDF; in
-    those cases pdfminer.six typically performs better.
-    """
-    # Allow override via env: PDF_EXTRACTOR=pdfminer|pypdf|auto
-    mode = os.getenv("PDF_EXTRACTOR", "auto").lower()
-    pypdf_text = ""
-    try:
-        from pypdf import PdfReader
-        reader = PdfReader(BytesIO(data))
-        pages = [p.extract_text() or "" for p in reader.pages]
-        pypdf_text = "\n".join(pages)
-    except Exception:
-        pypdf_text = ""
+def _load_fuzzy():
+    from fuzzy_matcher import FuzzySkillIndex
+    return FuzzySkillIndex
 
-    pdfminer_text = ""
-    try:
-        from pdfminer.high_level import extract_text as pdfminer_extract
-        pdfminer_text = pdfminer_extract(BytesIO(data)) or ""
-    except Exception:
-        pdfminer_text = ""
+components.register("fuzzy", _load_fuzzy, modules=("rapidfuzz",))
 
-    # If explicit mode requested
-    if mode == "pypdf" and pypdf_text:
-        return pypdf_text
-    if mode == "pdfminer" and pdfminer_text:
-        return pdfminer_text
+# PDF and DOCX extractors
+# PDF_EXTRACTOR=adaptive|auto|pdfminer|pypdf
+#   adaptive: run pypdf first and fall back to pdfminer.six only when a page
+#             sample looks degraded (empty or missing 'u' glyphs)
+#   auto:     run both on the full document and keep the better scoring text
+# PDF_MAX_PAGES caps the pages read. PDF_TIMEOUT_SECONDS is a soft deadline for the whole
+# document, checked between pages: extraction stops at the first page boundary after it
+# (meta.truncated), but a single page already inside pypdf or pdfminer runs to completion,
+# since neither can be interrupted mid-page. Bound the wall time of pathological files
+# with the parse policy's workers and the client's timeout, not with this setting.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "15"))
+PDF_SAMPLE_PAGES = int(os.getenv("PDF_SAMPLE_PAGES", "3"))
+
+# Scanned pages (no text layer) and images go through page-level OCR on a process pool
+PDF_OCR_ENABLED = os.getenv("PDF_OCR", "1").lower() not in ("0", "false", "no")
+ocr = OcrPipeline(
+    workers=int(os.getenv("OCR_POOL_WORKERS", str(os.cpu_count() or 1))),
+    page_timeout=float(os.getenv("OCR_PAGE_TIMEOUT_SECONDS", "20")),
+    max_side=int(os.getenv("OCR_MAX_SIDE", "2400")),
+    dpi=int(os.getenv("OCR_DPI", "200")),
+    lang=os.getenv("OCR_LANG", "eng"),
+    deskew_pages=os.getenv("OCR_DESKEW", "1").lower() not in ("0", "false", "no"),
+)
 
+def _pypdf_pages(data: Blob, deadline: float) -> tuple[List[str], bool]:
+    """Per-page pypdf text; the flag is True when the page cap or the (between-pages) deadline cut it short."""
+    PdfReader = components.get("pypdf")
+    reader = PdfReader(as_stream(data))
+    pages: List[str] = []
+    for i, page in enumerate(reader.pages):
+        if i >= PDF_MAX_PAGES or time.monotonic() > deadline:
+            return pages, True
+        pages.append(page.extract_text() or "")
+    return pages, False
+
+def _pdfminer_text(data: Blob, deadline: float) -> tuple[str, bool]:
+    """pdfminer.six extract_text() with the same page cap and between-pages deadline."""
+    from io import StringIO
+    TextConverter, LAParams, PDFPageInterpreter, PDFResourceManager, PDFPage = components.get("pdfminer")
+    truncated = False
+    with StringIO() as out:
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = TextConverter(rsrcmgr, out, codec="utf-8", laparams=LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for i, page in enumerate(PDFPage.get_pages(as_stream(data), caching=True)):
+            if i >= PDF_MAX_PAGES or time.monotonic() > deadline:
+                truncated = True
+                break
+            interpreter.process_page(page)
+        return out.getvalue(), truncated
+
+def u_ratio(s: str) -> float:
+    l = len(s) or 1
+    return s.lower().count("u") / l
+
+def score_quality(t: str) -> float:
+    # Heuristic: prefer longer text with balanced vowel distribution
+    t_l = t.lower()
+    vowels = sum(t_l.count(v) for v in "aeiou")
+    u_count = t_l.count("u")
+    e_count = t_l.count("e") or 1
+    length = len(t_l)
+    # Penalize when 'u' frequency is suspiciously low compared to 'e'
+    u_penalty = 0.0
+    if u_count < 0.05 * e_count:
+        u_penalty = 0.3
+    # Simple score: normalized length + vowel density - penalties
+    vowel_density = vowels / max(length, 1)
+    base = (length / 10000.0) + vowel_density
+    return base - u_penalty
+
+def looks_degraded(sample: str) -> bool:
+    """True when PyPDF output needs a second opinion from pdfminer.six."""
+    if not sample.strip():
+        return True
+    # Some PDFs render with missing glyphs (e.g., 'u' disappearing) in PyPDF
+    return u_ratio(sample) < 0.002
+
+def pick_better(pypdf_text: str, pdfminer_text: str) -> tuple[str, str]:
+    """Choose between both extractions; returns (text, extractor)."""
     # If only one succeeded, return it
     if pypdf_text and not pdfminer_text:
-        return pypdf_text
+        return pypdf_text, "pypdf"
     if pdfminer_text and not pypdf_text:
-        return pdfminer_text
-
-    # If both failed
+        return pdfminer_text, "pdfminer"
     if not pypdf_text and not pdfminer_text:
-        return ""
-
-    def score_quality(t: str) -> float:
-        # Heuristic: prefer longer text with balanced vowel distribution
-        t_l = t.lower()
-        vowels = sum(t_l.count(v) for v in "aeiou")
-        u_count = t_l.count("u")
-        e_count = t_l.count("e") or 1
-        length = len(t_l)
-        # Penalize when 'u' frequency is suspiciously low compared to 'e'
-        u_penalty = 0.0
-        if u_count < 0.05 * e_count:
-            u_penalty = 0.3
-        # Simple score: normalized length + vowel density - penalties
-        vowel_density = vowels / max(length, 1)
-        base = (length / 10000.0) + vowel_density
-        return base - u_penalty
-
-    # Choose text with higher score
-    p_score = score_quality(pypdf_text)
-    m_score = score_quality(pdfminer_text)
+        return "", "none"
     # If PyPDF appears to drop 'u' characters, favor pdfminer
-    p_l = pypdf_text.lower()
-    m_l = pdfminer_text.lower()
-    def u_ratio(s: str) -> float:
-        l = len(s) or 1
-        return s.count("u") / l
-    if pdfminer_text and (u_ratio(p_l) < 0.002) and (u_ratio(m_l) >= u_ratio(p_l)):
-        return pdfminer_text
-    return pypdf_text if p_score >= m_score else pdfminer_text
-
-def extract_text_from_docx(data: bytes) -> str:
+    if u_ratio(pypdf_text) < 0.002 and u_ratio(pdfminer_text) >= u_ratio(pypdf_text):
+        return pdfminer_text, "pdfminer"
+    if score_quality(pypdf_text) >= score_quality(pdfminer_text):
+        return pypdf_text, "pypdf"
+    return pdfminer_text, "pdfminer"
+
+def extract_pdf(data: Blob, mode: Optional[str] = None) -> tuple[str, dict]:
+    """Extract text from a PDF and report how it was done.
+
+    Returns (text, meta) where meta names the extractor that produced the
+    text, the extractors that ran, the elapsed time and whether the page cap
+    or the document deadline truncated it. The deadline is soft: it is only
+    checked between pages, and adaptive mode skips the pdfminer fallback
+    once it has passed.
+    """
+    mode = (mode or os.getenv("PDF_EXTRACTOR", "adaptive")).lower()
+    t0 = time.monotonic()
+    deadline = t0 + PDF_TIMEOUT_SECONDS
+    ran: List[str] = []
+    truncated = False
+
+    pypdf_pages: Optional[List[str]] = None
+
+    def run_pypdf() -> List[str]:
+        nonlocal truncated, pypdf_pages
+        ran.append("pypdf")
+        try:
+            with metrics.stage("extract_pypdf"):
+                pages, cut = _pypdf_pages(data, deadline)
+        except Exception:
+            return []
+        truncated = truncated or cut
+        pypdf_pages = pages
+        return pages
+
+    def run_pdfminer() -> str:
+        nonlocal truncated
+        ran.append("pdfminer")
+        try:
+            with metrics.stage("extract_pdfminer"):
+                text, cut = _pdfminer_text(data, deadline)
+        except Exception:
+            return ""
+        truncated = truncated or cut
+        return text or ""
+
+    if mode == "pypdf":
+        text, chosen = "\n".join(run_pypdf()), "pypdf"
+        if not text:
+            text, chosen = run_pdfminer(), "pdfminer"
+    elif mode == "pdfminer":
+        text, chosen = run_pdfminer(), "pdfminer"
+        if not text:
+            text, chosen = "\n".join(run_pypdf()), "pypdf"
+    elif mode == "auto":
+        text, chosen = pick_better("\n".join(run_pypdf()), run_pdfminer())
+    else:
+        pages = run_pypdf()
+        text = "\n".join(pages)
+        chosen = "pypdf" if text else "none"
+        # Score a page sample only; glyph loss shows up on every page of an affected PDF
+        sample = "\n".join(pages[:PDF_SAMPLE_PAGES]) if PDF_SAMPLE_PAGES > 0 else text
+        if looks_degraded(sample) and time.monotonic() < deadline:
+            text, chosen = pick_better(text, run_pdfminer())
+
+    ocr_meta: dict = {}
+    # Only pypdf gives per-page text; a pdfminer result is kept as is unless it is empty
+    has_text = bool(text.strip())
+    blank = pypdf_pages is not None and chosen == "pypdf" and any(not p.strip() for p in pypdf_pages)
+    if PDF_OCR_ENABLED and (not has_text or blank) and components.available("ocr"):
+        ran.append("ocr")
+        with metrics.stage("extract_ocr"):
+            ocr_text, ocr_meta = ocr_pdf_pages(data, pypdf_pages if has_text else None)
+        if ocr_text.strip():
+            text, chosen = ocr_text, (f"{chosen}+ocr" if has_text else "ocr")
+
+    meta = {
+        "extractor": chosen if text else "none",
+        "extractors_run": ran,
+        "extract_ms": round((time.monotonic() - t0) * 1000.0, 2),
+        "truncated": truncated,
+        **ocr_meta,
+    }
+    return text, meta
+
+def ocr_pdf_pages(data: Blob, pages: Optional[List[str]]) -> tuple[str, dict]:
+    """OCR the pages with no text layer and splice them in, in page order.
+
+    pages is pypdf's per-page text; None means nothing usable was extracted
+    and every page (up to PDF_MAX_PAGES) is OCR'd.
+    """
+    indices = None if pages is None else [i for i, p in enumerate(pages) if not p.strip()]
     try:
-        import docx
-        doc = docx.Document(BytesIO(data))
+        components.get("ocr")
+        images = ocr.rasterize_pdf(as_stream(data), indices, PDF_MAX_PAGES)
+    except Exception as e:
+        logger.warning("Could not rasterize PDF for OCR: %s", e)
+        return "", {"ocr_pages": 0, "ocr_errors": 1}
+    texts, meta = ocr.run(images)
+    by_index = {img.index: t for img, t in zip(images, texts)}
+    if pages is None:
+        return "\n".join(by_index[i] for i in sorted(by_index)), meta
+    return "\n".join(p if p.strip() else by_index.get(i, p) for i, p in enumerate(pages)), meta
+
+def extract_text_from_pdf(data: Blob) -> str:
+    return extract_pdf(data)[0]
+
+def extract_text_from_docx(data: Blob) -> str:
+    try:
+        docx = components.get("docx")
+        doc = docx.Document(as_stream(data))
         return "\n".join([p.text for p in doc.paragraphs])
     except Exception:
         return ""
 
-def extract_text_from_image(data: bytes) -> str:
-    if not OCR_AVAILABLE:
-        return ""
+def extract_image(data: Blob) -> tuple[str, dict]:
+    """OCR an uploaded image (every frame of a multi-page TIFF) through the page pipeline."""
     try:
-        img = Image.open(BytesIO(data))
-        return pytesseract.image_to_string(img) or ""
-    except Exception:
-        return ""
+        components.get("ocr")
+        pages = ocr.image_pages(as_stream(data), PDF_MAX_PAGES)
+    except Exception as e:
+        logger.warning("Could not open image for OCR: %s", e)
+        return "", {"ocr_pages": 0, "ocr_errors": 1}
+    texts, meta = ocr.run(pages)
+    return "\n".join(texts), meta
+
+def extract_text_from_image(data: Blob) -> str:
+    return extract_image(data)[0]
 
 logger = logging.getLogger("resume-nlp")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="[%(asctime)s] %(levelname)s %(name)s: %(message)s")
@@ -116,15 +309,12 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-try:
-    import spacy
-    nlp = spacy.load("en_core_web_sm")
-except Exception:
-    nlp = None
+metrics.install(app)
 
 BASE_DIR = os.path.dirname(__file__)
 DEFAULT_CORPUS_FULL = os.path.join(BASE_DIR, "skill_corpus.txt")
 DEFAULT_CORPUS_LEAN = os.path.join(BASE_DIR, "skill_corpus_lean.txt")
+DEFAULT_ALIASES = os.path.join(BASE_DIR, "skill_aliases.txt")
 
 def select_corpus_path(mode: Optional[str] = None) -> str:
     env_path = os.getenv("SKILL_CORPUS_PATH")
@@ -133,373 +323,527 @@ def select_corpus_path(mode: Optional[str] = None) -> str:
     selected = (mode or os.getenv("SKILL_CORPUS_MODE", "full")).lower()
     return DEFAULT_CORPUS_LEAN if selected in ("lean", "skills", "skills-only") else DEFAULT_CORPUS_FULL
 
+def read_corpus(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+    logger.info("Loaded skill corpus entries=%d path=%s", len(corpus), path)
+    return corpus
+
 def load_corpus(path: Optional[str] = None, mode: Optional[str] = None) -> List[str]:
     p = path or select_corpus_path(mode)
     try:
-        with open(p, "r", encoding="utf-8") as f:
-            corpus = [line.strip() for line in f if line.strip()]
-        logger.info("Loaded skill corpus entries=%d path=%s", len(corpus), p)
-        return corpus
+        return read_corpus(p)
     except Exception as e:
         logger.warning("Failed to load corpus at %s: %s", p, e)
         # fallback to minimal set
         return ["python", "java", "sql", "react"]
 
-skill_corpus: List[str] = load_corpus()
-compiled_patterns: List[tuple[str, re.Pattern]] = []
+# Canonical skill -> variant spellings ("JavaScript = JS, ECMAScript"), compiled into
+# the matcher with the corpus; an empty SKILL_ALIASES_PATH disables aliases
+SKILL_ALIASES_PATH = os.getenv("SKILL_ALIASES_PATH", DEFAULT_ALIASES)
+
+def read_aliases(path: str) -> Dict[str, Tuple[str, ...]]:
+    """Parse an alias file: one `canonical = variant, variant` per line, # comments."""
+    aliases: Dict[str, Tuple[str, ...]] = {}
+    if not path:
+        return aliases
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, sep, variants = line.partition("=")
+            if not sep or not name.strip():
+                raise ValueError(f"{path}:{n}: expected 'canonical = variant, ...'")
+            found = tuple(v.strip() for v in variants.split(",") if v.strip())
+            aliases[name.strip()] = aliases.get(name.strip(), ()) + found
+    logger.info("Loaded skill aliases canonical=%d variants=%d path=%s", len(aliases), sum(map(len, aliases.values())), path)
+    return aliases
+
+def load_aliases(path: str = SKILL_ALIASES_PATH) -> Dict[str, Tuple[str, ...]]:
+    try:
+        return read_aliases(path)
+    except Exception as e:
+        logger.warning("Failed to load skill aliases at %s: %s", path, e)
+        return {}
 
 SHORT_SKILL_WHITELIST = {"c", "go", "r"}
 
-def compile_patterns():
-    global compiled_patterns
-    compiled_patterns = []
-    for s in sorted(skill_corpus, key=lambda x: len(x), reverse=True):
-        sl = s.strip()
-        if not sl:
-            continue
-        if len(sl) < 2 and sl.lower() not in SHORT_SKILL_WHITELIST:
-            continue
-        # Case-insensitive, ensure not part of a larger alphanumeric token
-        pattern = re.compile(rf"(?<![A-Za-z0-9]){re.escape(sl)}(?![A-Za-z0-9])", re.IGNORECASE)
-        compiled_patterns.append((s, pattern))
-    logger.info("Compiled %d skill patterns", len(compiled_patterns))
-
-compile_patterns()
+# Optional fuzzy pass (RapidFuzz) over whatever the exact matcher left unclaimed;
+# see fuzzy_matcher.py. Its index is built with each corpus snapshot.
+SKILL_FUZZY_ENABLED = os.getenv("SKILL_FUZZY", "0").lower() in ("1", "true", "yes")
+SKILL_FUZZY_CUTOFF = float(os.getenv("SKILL_FUZZY_CUTOFF", "90"))
+SKILL_FUZZY_MIN_LENGTH = int(os.getenv("SKILL_FUZZY_MIN_LENGTH", "4"))
+SKILL_FUZZY_MAX_WORDS = int(os.getenv("SKILL_FUZZY_MAX_WORDS", "3"))
+SKILL_FUZZY_IGNORE = [w.strip() for w in os.getenv("SKILL_FUZZY_IGNORE", "").split(",") if w.strip()]
+
+def build_fuzzy_index(corpus: List[str]):
+    try:
+        FuzzySkillIndex = components.get("fuzzy")
+    except ComponentUnavailable as e:
+        logger.warning("Fuzzy skill matching disabled: %s", e)
+        return None
+    from fuzzy_matcher import COMMON_WORDS
+    # Section headings are ordinary words on every resume; never fuzzy-match them
+    headings = {w for anchor in (*NEXT_SECTION_ANCHORS, *GENERIC_LABELS) for w in anchor.split()}
+    return FuzzySkillIndex(
+        corpus,
+        cutoff=SKILL_FUZZY_CUTOFF,
+        min_length=SKILL_FUZZY_MIN_LENGTH,
+        max_words=SKILL_FUZZY_MAX_WORDS,
+        ignore=(*COMMON_WORDS, *headings, *SKILL_FUZZY_IGNORE),
+    )
+
+# Worker processes, as for `uvicorn --workers`. With more than one, the corpus and its
+# automaton are compiled once into a snapshot file in SNAPSHOT_DIR that every worker maps.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or (
+    os.path.join(tempfile.gettempdir(), "resume-nlp-snapshots") if WEB_CONCURRENCY > 1 else ""
+)
+
+# The corpus and its automaton (case-insensitive, not part of a larger alphanumeric
+# token) live in one immutable snapshot; reloads build a new one and swap it in.
+corpus_store = CorpusStore(
+    SHORT_SKILL_WHITELIST,
+    build_fuzzy_index if SKILL_FUZZY_ENABLED else None,
+    SnapshotChannel(SNAPSHOT_DIR, "corpus") if SNAPSHOT_DIR else None,
+)
+
+def install_corpus(path: str) -> CorpusSnapshot:
+    """Read path and publish it as the current snapshot.
+
+    The alias file is re-read too. Unlike startup there is no fallback: a
+    missing or empty corpus, or a malformed alias file, raises and the
+    snapshot already serving requests stays in place.
+    """
+    stamp = file_stamp(path)
+    corpus = read_corpus(path)
+    if not corpus:
+        raise ValueError("corpus file is empty")
+    snapshot = corpus_store.publish(corpus, path, stamp, read_aliases(SKILL_ALIASES_PATH))
+    parse_policy.reset()
+    return snapshot
+
+def _load_corpus_snapshot() -> CorpusSnapshot:
+    # Startup load: falls back to the minimal corpus rather than failing
+    path = select_corpus_path()
+    return corpus_store.publish(load_corpus(path), path, file_stamp(path), load_aliases())
+
+components.register("corpus", _load_corpus_snapshot)
+
+def current_corpus() -> CorpusSnapshot:
+    snapshot = corpus_store.current
+    if snapshot is None:
+        # First use; a /reload-corpus that already published wins over the startup load
+        components.get("corpus")
+        snapshot = corpus_store.current
+    return snapshot
+
+# Heading automata and project patterns are compiled once, not per request
+section_parser = ResumeSectionParser()
+
+# Repeat uploads of the same file skip extraction and parsing entirely
+parse_cache = ParseCache(
+    max_bytes=int(os.getenv("PARSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    disk_path=os.getenv("PARSE_CACHE_PATH") or None,
+    disk_max_entries=int(os.getenv("PARSE_CACHE_DISK_MAX_ENTRIES", "100000")),
+)
 
 @app.get("/health")
 def health():
+    # Liveness only: answers as soon as the process serves HTTP, before warm-up
     return {"status": "ok"}
 
+# Components loaded by the startup warm-up before /ready reports ready
+# (comma separated names from the registry, "all", or empty to load everything lazily)
+WARMUP_COMPONENTS = os.getenv("RESUME_NLP_WARMUP", "corpus,pypdf")
+
+def warmup_names() -> List[str]:
+    if WARMUP_COMPONENTS.strip().lower() == "all":
+        return components.names()
+    return [n.strip() for n in WARMUP_COMPONENTS.split(",") if n.strip() in components]
+
+warmup_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_warmup():
+    # Runs in the background so /health answers while components load
+    global warmup_task
+    warmup_task = asyncio.get_running_loop().create_task(run_in_threadpool(components.warm, warmup_names()))
+
+@app.get("/ready")
+def ready():
+    """Readiness: 503 until the warm-up has finished, then 200."""
+    done = warmup_task is not None and warmup_task.done()
+    body = {"ready": done, "warmup": warmup_names(), "components": components.status()}
+    return body if done else JSONResponse(status_code=503, content=body)
+
+# Poll SKILL_CORPUS_PATH (or the selected default corpus) and hot-swap on change; 0 disables
+CORPUS_WATCH_INTERVAL_SECONDS = float(os.getenv("CORPUS_WATCH_INTERVAL_SECONDS", "2"))
+corpus_watcher = CorpusWatcher(corpus_store, install_corpus, interval=CORPUS_WATCH_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def start_corpus_watcher():
+    corpus_watcher.start()
+
+@app.on_event("shutdown")
+async def stop_corpus_watcher():
+    await corpus_watcher.stop()
+
+@app.on_event("shutdown")
+def stop_ocr_pool():
+    ocr.shutdown()
+
+@app.on_event("shutdown")
+def stop_parse_executor():
+    parse_policy.shutdown()
+
 @app.get("/diagnostics")
 def diagnostics():
+    snapshot = current_corpus()
+    mapped = snapshot.matcher if isinstance(snapshot.matcher, MappedSkillMatcher) else None
     return {
-        "corpus_size": len(skill_corpus),
-        "spacy_enabled": bool(nlp),
-        "ocr_available": OCR_AVAILABLE,
-        "sample": skill_corpus[:10]
+        "corpus_size": len(snapshot.corpus),
+        "spacy_enabled": components.available("spacy"),
+        "ocr_available": components.available("ocr"),
+        "components": components.status(),
+        "pdf_extractor": os.getenv("PDF_EXTRACTOR", "adaptive").lower(),
+        "corpus_version": snapshot.digest,
+        "corpus_snapshot": {
+            "version": snapshot.version,
+            "path": snapshot.path,
+            "loaded_at": snapshot.loaded_at,
+            "canonical_skills": len(snapshot.matcher.canonical),
+            "alias_variants": sum(map(len, snapshot.aliases.values())) if snapshot.aliases else 0,
+            "fuzzy_keys": len(snapshot.fuzzy) if snapshot.fuzzy is not None else None,
+            "watch": corpus_watcher.stats(),
+            "shared": None if mapped is None else {
+                "file": mapped.snapshot.path,
+                "bytes": mapped.snapshot.nbytes,
+                "states_loaded": mapped.loaded_states,
+            },
+        },
+        "parse_cache": parse_cache.stats(),
+        "parse_executor": parse_policy.stats(),
+        "sample": list(snapshot.corpus[:10])
     }
 
+@app.get("/skills/vocabulary")
+def skill_vocabulary():
+    """Canonical skill names by id. Ids in /parse results index this list for the same version."""
+    snapshot = current_corpus()
+    return {"version": snapshot.digest, "skills": list(snapshot.matcher.canonical)}
+
 @app.post("/reload-corpus")
-def reload_corpus(mode: Optional[str] = Query(default=None, description="full|lean")):
-    global skill_corpus
-    skill_corpus = load_corpus(mode=mode)
-    compile_patterns()
-    return {"reloaded": True, "corpus_size": len(skill_corpus), "mode": (mode or os.getenv("SKILL_CORPUS_MODE", "full"))}
+async def reload_corpus(mode: Optional[str] = Query(default=None, description="full|lean")):
+    path = select_corpus_path(mode)
+    # Built on a worker thread; requests keep using the previous snapshot until the swap
+    try:
+        snapshot = await run_in_threadpool(install_corpus, path)
+    except Exception as e:
+        current = current_corpus()
+        logger.warning("Failed to reload corpus at %s: %s; keeping version %d", path, e, current.version)
+        raise HTTPException(status_code=500, detail=f"Failed to load corpus at {path}: {e}; keeping version {current.version}")
+    return {
+        "reloaded": True,
+        "corpus_size": len(snapshot.corpus),
+        "mode": (mode or os.getenv("SKILL_CORPUS_MODE", "full")),
+        "version": snapshot.version,
+    }
 
-@app.post("/parse")
-async def parse_resume(file: UploadFile = File(...)):
-    data = await file.read()
-    filename = (file.filename or "").lower()
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
 
-    # Choose extractor by extension or content-type
-    text = ""
+class OCRUnavailableError(RuntimeError):
+    pass
+
+def extract_document(filename: str, data: Blob) -> tuple[str, dict]:
+    """Choose an extractor by (lowercased) file extension; returns (text, meta)."""
     if filename.endswith(".pdf"):
-        text = extract_text_from_pdf(data)
-    elif filename.endswith(".docx"):
-        text = extract_text_from_docx(data)
-    elif filename.endswith(".jpg") or filename.endswith(".jpeg") or filename.endswith(".png"):
-        if not OCR_AVAILABLE:
-            # Make it explicit to callers that OCR is not available
-            raise HTTPException(status_code=501, detail="OCR is not available on this service. Install Pillow+pytesseract or use PDF/DOCX.")
-        text = extract_text_from_image(data)
+        return extract_pdf(data)
+    t0 = time.monotonic()
+    if filename.endswith(".docx"):
+        with metrics.stage("extract_docx"):
+            text, extractor = extract_text_from_docx(data), "docx"
+    elif filename.endswith(IMAGE_EXTENSIONS):
+        try:
+            components.get("ocr")
+        except ComponentUnavailable:
+            raise OCRUnavailableError("OCR is not available on this service. Install Pillow+pytesseract or use PDF/DOCX.")
+        with metrics.stage("extract_ocr"):
+            text, ocr_meta = extract_image(data)
+        return text, {"extractor": "ocr" if text else "none", "extract_ms": round((time.monotonic() - t0) * 1000.0, 2), **ocr_meta}
     else:
         # fallback assume utf-8 text
         try:
-            text = data.decode('utf-8', errors='ignore')
+            text = data[:].decode('utf-8', errors='ignore')
         except Exception:
             text = ""
+        extractor = "text"
+    return text, {"extractor": extractor if text else "none", "extract_ms": round((time.monotonic() - t0) * 1000.0, 2)}
 
+def parse_document(filename: str, data: Blob, snapshot: Optional[CorpusSnapshot] = None) -> dict:
+    text, meta = extract_document((filename or "").lower(), data)
     if not text:
         # Gracefully return empty results if extraction fails
-        return {"skills": [], "projects": []}
-
-    # Keep two versions: one compact for skill phrase matching, one with newlines for section parsing
-    text_with_newlines = text.replace("\r\n", "\n")
-    # normalize whitespace to make multi-word matches robust across line breaks for skills
-    norm_text = re.sub(r"\s+", " ", text)
-
-    # Prefer the SKILLS section if present to reduce false positives
-    def slice_skills_section(t: str) -> str:
-        tl = t
-        # Use uppercase for heading scan but retain original for matching
-        up = tl.upper()
-        start = up.find("\nSKILLS")
-        if start == -1:
-            start = up.find(" SKILLS")
-        if start == -1:
-            return tl
-        # Candidates for the next heading
-        next_heads = [
-            "\nPROJECTS", "\nEXPERIENCE", "\nWORK EXPERIENCE", "\nEDUCATION", "\nCERTIFICATIONS",
-            "\nACHIEVEMENTS", "\nINTERNSHIP", "\nPUBLICATIONS", "\nAWARDS", "\nSUMMARY", "\nPROFILE"
-        ]
-        end_positions = [up.find(h, start + 1) for h in next_heads]
-        end_positions = [p for p in end_positions if p != -1]
-        end = min(end_positions) if end_positions else -1
-        if end != -1 and end > start:
-            return tl[start:end]
-        return tl[start:]
-
-    search_text = slice_skills_section("\n" + norm_text)  # add leading newline to help heading detection
-
-    found_ordered = []
-    seen = set()
-    for original, pattern in compiled_patterns:
-        m = pattern.search(search_text)
-        if m:
-            resume_case = m.group(0)
-            key = resume_case.lower()
-            if key not in seen:
-                seen.add(key)
-                found_ordered.append((m.start(), resume_case))
-    found_ordered.sort(key=lambda x: x[0])
-    skills_out = [s for _, s in found_ordered]
-    logger.info("Extracted %d skills (exact exact-section match)", len(skills_out))
+        return {"skills": [], "skill_ids": [], "canonical_skills": [], "projects": [], "meta": meta}
+    return {**parse_text(text, snapshot), "meta": meta}
+
+def parse_text(text: str, snapshot: Optional[CorpusSnapshot] = None) -> dict:
+    snapshot = snapshot or current_corpus()
+    matcher = snapshot.matcher
+    if "\r\r\n" in text:
+        # Stray \r before \r\n: fold \r\n first so line splitting matches the old behaviour
+        text = text.replace("\r\n", "\n")
+    # One pass over the lines maps every section; the consumers below share it
+    with metrics.stage("section_segment"):
+        sections = section_parser.segment(text)
+
+    # Skills are matched from the first "skills" mention to the end of the resume (whole
+    # resume if there is none), so skills named under projects/experience still count.
+    # Whitespace runs match the spaces in multi-word skills without normalising a copy.
+    claimed = [] if snapshot.fuzzy is not None else None
+    with metrics.stage("skill_match"):
+        found = matcher.match_terms(text, sections.skills_from, claimed)
+    logger.info("Extracted %d skills (exact exact-section match)", len(found))
+
+    fuzzy_out = None
+    if snapshot.fuzzy is not None:
+        # Second pass over the tokens the automaton did not claim; hits are reported
+        # under the corpus spelling and merged into skills in resume order
+        with metrics.stage("skill_fuzzy"):
+            hits = snapshot.fuzzy.match(text, sections.skills_from, claimed)
+        known = {cid for _, _, cid, corpus in found if corpus}
+        fuzzy_out = []
+        for pos, skill, matched, score in hits:
+            cid = matcher.canonical_id(skill)
+            if cid not in known:
+                known.add(cid)
+                found.append((pos, skill, cid, True))
+                fuzzy_out.append({"skill": skill, "text": matched, "score": score})
+        found.sort(key=lambda f: f[0])
+    # skills lists corpus entries only, as without an alias table; variants only the
+    # alias table knows ("JS", "GCP") are reported through skill_ids/canonical_skills
+    skills_out = [s for _, s, _, corpus in found if corpus]
+    # Variants of one skill ("JS", "Javascript") collapse to its canonical id, first mention first
+    skill_ids = list(dict.fromkeys(cid for _, _, cid, _ in found if cid is not None))
 
     # --- Project extraction (robust line-based) ---
-    lines_all = [ln.rstrip() for ln in text_with_newlines.splitlines()]
-    upper_all = [ln.upper() for ln in lines_all]
-
-    header_patterns = [
-        r"^PROJECTS?$",
-        r"^KEY PROJECTS$",
-        r"^PERSONAL PROJECTS$",
-        r"^ACADEMIC PROJECTS$",
-        r"^MAJOR PROJECTS$",
-        r"^MINI PROJECTS$",
-        r"^PROJECT DETAILS$",
-        r"^PROJECT EXPERIENCE$",
-        r"^SELECTED PROJECTS$",
-        r"^PROJECTS[\s&/]+(INTERNSHIPS|TRAINING|CERTIFICATIONS|ACHIEVEMENTS)$",
-        r"^PROJECTS AND (INTERNSHIPS|TRAINING)$",
-        r"^ACADEMIC PROJECTS AND INTERNSHIPS$",
-        r"^PROJECTS AND HACKATHONS$",
-        r"^PROJECTS & HACKATHONS$",
-        r"^PROJECTS AND ACHIEVEMENTS$",
-        r"^PROJECTS & ACHIEVEMENTS$",
-        r"^PROJECTS (?:AND|&) (?:AWARDS|ACCOMPLISHMENTS)$",
-    ]
-    header_res = [re.compile(p) for p in header_patterns]
-
-    def normalize_heading(s: str) -> str:
-        return re.sub(r"\s+", " ", s.strip().strip("-:•*\u2013")).upper()
-
-    start_idx = -1
-    for i, u in enumerate(upper_all):
-        norm = normalize_heading(u)
-        for rx in header_res:
-            if rx.match(norm):
-                start_idx = i + 1
-                break
-        if start_idx != -1:
-            break
-
-    # fallback: find first occurrence of the word PROJECT in any heading-like line
-    if start_idx == -1:
-        for i, line in enumerate(lines_all):
-            raw = line.strip()
-            if not raw:
-                continue
-            # Strip common decorations
-            raw_norm = re.sub(r"^[\-*•\u2022\u25CF\s]+|\s*[-_*]{2,}\s*$", "", raw)
-            up = raw_norm.upper()
-            if ("PROJECT" in up) and (len(raw_norm) <= 120):
-                start_idx = i + 1
-                break
+    with metrics.stage("project_parse"):
+        projects_out = section_parser.extract_projects(text, sections)
+
+    result = {
+        "skills": skills_out,
+        "skill_ids": skill_ids,
+        "canonical_skills": [matcher.canonical[cid] for cid in skill_ids],
+        "projects": projects_out,
+    }
+    if fuzzy_out is not None:
+        result["fuzzy_skills"] = fuzzy_out
+    return result
+
+# --- Upload handling ---
+# Uploads are streamed into a bounded spool and hashed on the way in; files
+# above UPLOAD_SPOOL_MEMORY_BYTES are parsed from an mmap of a temp file.
+PARSE_MAX_FILE_BYTES = int(os.getenv("PARSE_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+PARSE_MAX_REQUEST_BYTES = int(os.getenv("PARSE_MAX_REQUEST_BYTES", str(512 * 1024 * 1024)))
+UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+# Slack for multipart boundaries and part headers around a single file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+@app.middleware("http")
+async def reject_oversized_uploads(request, call_next):
+    # Refuse before the multipart body is read when the client declares its size
+    limits = {"/parse": PARSE_MAX_FILE_BYTES + MULTIPART_OVERHEAD_BYTES, "/parse-batch": PARSE_MAX_REQUEST_BYTES}
+    limit = limits.get(request.url.path)
+    length = request.headers.get("content-length", "")
+    if request.method == "POST" and limit is not None and length.isdigit() and int(length) > limit:
+        return JSONResponse(status_code=413, content={"detail": f"Request exceeds {limit} bytes"})
+    return await call_next(request)
+
+async def spool(file: UploadFile) -> SpooledUpload:
+    return await spool_upload(file, PARSE_MAX_FILE_BYTES, UPLOAD_SPOOL_MEMORY_BYTES, UPLOAD_SPOOL_DIR)
+
+# Settings that change /parse output for the same file and corpus
+PARSE_OPTIONS_TAG = hashlib.sha256(repr((
+    SKILL_FUZZY_CUTOFF, SKILL_FUZZY_MIN_LENGTH, SKILL_FUZZY_MAX_WORDS, sorted(SKILL_FUZZY_IGNORE),
+)).encode()).hexdigest()[:8] if SKILL_FUZZY_ENABLED else ""
+
+# Extraction and parsing of /parse uploads run under this policy instead of on the event
+# loop (PARSE_EXECUTOR=inline|thread|process, see executor_policy.py). Uploads of at least
+# PARSE_LARGE_UPLOAD_BYTES go to their own lane of PARSE_LARGE_WORKERS; a full lane is a 503.
+parse_policy = ExecutionPolicy.from_env("PARSE")
+PARSE_LARGE_UPLOAD_BYTES = int(os.getenv("PARSE_LARGE_UPLOAD_BYTES", str(1024 * 1024)))
+install_executor_policy(app)
+
+def parse_upload(filename: str, source: Union[bytes, str]) -> dict:
+    """Process-mode entry point: parse the bytes, or map the spooled file at path source."""
+    data = map_file(source) if isinstance(source, str) else source
+    try:
+        return parse_document(filename, data)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
 
-    def is_next_heading(line: str) -> bool:
-        t = line.strip()
-        if not t:
-            return False
-        # Known next section anchors
-        anchors = [
-            "EXPERIENCE", "WORK EXPERIENCE", "PROFESSIONAL EXPERIENCE", "EDUCATION", "ACADEMICS",
-            "QUALIFICATIONS", "CERTIFICATIONS", "ACHIEVEMENTS", "INTERNSHIP", "PUBLICATIONS",
-            "AWARDS", "SUMMARY", "OBJECTIVE", "PROFILE", "SKILLS", "TECHNICAL SKILLS", "LANGUAGES",
-            "HOBBIES", "INTERESTS", "CONTACT", "WORK HISTORY", "VOLUNTEERING", "EXTRACURRICULAR",
-            "CO-CURRICULAR", "COURSES", "TRAININGS"
-        ]
-        u = t.upper()
-        # Consider anchor if equals, starts with, or contains a known heading word
-        if u in anchors or any(u.startswith(a) for a in anchors) or any(a in u for a in anchors):
-            return True
-        # Common education/degree patterns often used as first line under EDUCATION in extracted text
-        degree_rx = re.compile(r"^(Bachelor|Master|B\.?E\.?|B\.?Tech|BTech|B\.?Sc|BSc|M\.?Tech|MTech|M\.?Sc|MBA|Diploma|PUC|Intermediate|XII|10th|12th)\b", re.IGNORECASE)
-        if degree_rx.match(t):
-            return True
-        # Horizontal rules / separators
-        if re.match(r"^\s*[-_=]{4,}\s*$", t):
-            return True
-        # Heuristic: line that is mostly uppercase and short looks like a heading
-        letters = [ch for ch in t if ch.isalpha()]
-        if letters:
-            upper_ratio = sum(1 for ch in letters if ch.isupper()) / len(letters)
-            if upper_ratio > 0.8 and 3 <= len(t) <= 60:
-                return True
-        return False
-
-    projects_lines: list[str] = []
-    if start_idx != -1:
-        j = start_idx
-        while j < len(lines_all) and not is_next_heading(lines_all[j]):
-            projects_lines.append(lines_all[j])
-            j += 1
-    else:
-        projects_lines = []
-
-    projects_out: list[dict] = []
-    if projects_lines:
-        # Preserve original line breaks; minimal trimming
-        lines = [ln.rstrip() for ln in projects_lines]
-        while lines and not lines[0].strip():
-            lines.pop(0)
-
-        def push(current_title: str, desc_lines: list[str]):
-            # Helpers
-            months_rx = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\b\s*\d{2,4}", re.IGNORECASE)
-            date_range_rx = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b\s*[–—\-]\s*(?:Present|\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b)", re.IGNORECASE)
-            def clean_title(t: str) -> str:
-                t = t.strip().strip("-–—:•*·•")
-                # Merge broken word case handled later
-                # Prefer left side before pipe
-                if "|" in t:
-                    t = t.split("|")[0].strip()
-                # Drop anything after 'GitHub'
-                t = re.sub(r"\bGitHub\b.*$", "", t, flags=re.IGNORECASE)
-                # Remove date ranges or single month-year tokens
-                t = date_range_rx.sub("", t)
-                t = months_rx.sub("", t)
-                # Collapse extra punctuation/spaces
-                t = re.sub(r"\s+", " ", t).strip("-–—:•* ·")
-                return t.strip()
-
-            def clean_desc_lines(lines: list[str]) -> list[str]:
-                out = []
-                for ln in lines:
-                    if ln is None:
-                        continue
-                    # Preserve leading whitespace for indentation; trim only right side
-                    s = ln.rstrip("\n\r")
-                    if not s:
-                        out.append("")
-                        continue
-                    # Skip standalone dates or github-only lines
-                    if date_range_rx.fullmatch(s) or months_rx.fullmatch(s) or re.fullmatch(r"(?i)github\b.*", s):
-                        continue
-                    # Normalize common leading markers (bullets, numbers) to a single bullet while keeping indentation
-                    s = re.sub(r"^(\s*)([\-\*•\u2022\u25CF]+)\s*", r"\1• ", s)
-                    s = re.sub(r"^(\s*)\d+[\)\.]\s+", r"\1• ", s)
-                    out.append(s)
-                return out
-
-            # Start with raw title
-            title_raw = (current_title or "").strip()
-            # If title looks too short (e.g., 'Fra'), try to merge first desc line
-            if len(title_raw) < 10 and desc_lines:
-                first = (desc_lines[0] or "").strip()
-                if first and first[0].islower():
-                    title_raw = f"{title_raw} {first}".strip()
-                    desc_lines = desc_lines[1:]
-            title = clean_title(title_raw)
-            if not title and desc_lines:
-                # Fallback: take first meaningful desc line as title
-                title = clean_title(desc_lines[0])
-                desc_lines = desc_lines[1:]
-            if not title:
-                return
-            if len(title) > 150:
-                title = title[:150] + "…"
-            # Clean description
-            desc_items = clean_desc_lines(desc_lines)
-            # Remove leading/trailing blanks
-            while desc_items and not desc_items[0]:
-                desc_items.pop(0)
-            while desc_items and not desc_items[-1]:
-                desc_items.pop()
-            desc = "\n".join(desc_items).strip()
-            if len(desc) > 4000:
-                desc = desc[:3997] + "…"
-            projects_out.append({"title": title, "description": desc})
-
-        current_title = ""
-        current_desc: list[str] = []
-        bullet_start = re.compile(r"^[\-\*•\u2022\u25CF]|^\d+[\)\.]\s+")
-        title_desc_pair = re.compile(r"^(.{3,160}?)\s*[-–—:\\u2013\|]\s*(.{4,})$")
-        months = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\b\s*\d{2,4}", re.IGNORECASE)
-        GENERIC_LABELS = {"TECH STACK","RESPONSIBILITIES","ROLE","DURATION","TOOLS","ENVIRONMENT","TEAM SIZE","CONTRIBUTIONS","KEY FEATURES","ACHIEVEMENTS","LINKS","GITHUB","URL","WEBSITE","RESULT","OUTCOME","IMPACT"}
-
-        def is_generic_label_line(s: str) -> bool:
-            u = s.strip().upper()
-            return any(u == g or u.startswith(g + ":") for g in GENERIC_LABELS)
-
-        was_blank = True
-        heading_like = re.compile(r"^[A-Z][A-Za-z0-9&/()\-]*?(?:\s+[A-Z][A-Za-z0-9&/()\-]*){2,}\s*$")
-        for raw in lines:
-            ln = raw.strip()
-            if not ln:
-                if current_title and (not current_desc or current_desc[-1] != ""):
-                    current_desc.append("")
-                was_blank = True
-                continue
+def extract_options_tag(ext: str) -> str:
+    """Settings that change what is extracted from a PDF or image, or "" for other files.
+
+    Read per key: PDF_EXTRACTOR is read per call, and OCR becomes available once
+    Tesseract is installed, so a persisted entry from before either change misses.
+    """
+    if ext != ".pdf" and not ext.endswith(IMAGE_EXTENSIONS):
+        return ""
+    return hashlib.sha256(repr((
+        os.getenv("PDF_EXTRACTOR", "adaptive").lower(), PDF_MAX_PAGES, PDF_TIMEOUT_SECONDS, PDF_SAMPLE_PAGES,
+        PDF_OCR_ENABLED, components.available("ocr"),
+    )).encode()).hexdigest()[:8]
+
+def cache_key(digest: str, filename: str, snapshot: CorpusSnapshot) -> str:
+    ext = os.path.splitext(filename.lower())[1]
+    version = f"{snapshot.digest}+fuzzy{PARSE_OPTIONS_TAG}" if PARSE_OPTIONS_TAG else snapshot.digest
+    extract_tag = extract_options_tag(ext)
+    if extract_tag:
+        version += f"+extract{extract_tag}"
+    return make_key(digest, ext, version)
 
-            m_pair = title_desc_pair.match(ln)
-            if m_pair:
-                if not current_title or was_blank:
-                    if current_title:
-                        push(current_title, current_desc)
-                    current_title = m_pair.group(1)
-                    current_desc = [m_pair.group(2)]
-                else:
-                    current_desc.append(raw)
-                was_blank = False
+@app.post("/parse")
+async def parse_resume(file: UploadFile = File(...)):
+    filename = file.filename or ""
+    try:
+        upload = await spool(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    # Key and parse against the same snapshot even if a reload lands mid-request
+    snapshot = current_corpus()
+    try:
+        key = cache_key(upload.sha256, filename, snapshot)
+        cached = parse_cache.get(key)
+        if cached is not None:
+            return cached
+        large = upload.size >= PARSE_LARGE_UPLOAD_BYTES
+        try:
+            if parse_policy.mode == "process":
+                # Workers get a path (or bytes) to read, and match with their own copy of the corpus
+                result = await parse_policy.run(parse_upload, filename, upload.source(), large=large)
+            else:
+                result = await parse_policy.run(parse_document, filename, upload.view(), snapshot, large=large)
+        except OCRUnavailableError as e:
+            # Make it explicit to callers that OCR is not available
+            raise HTTPException(status_code=501, detail=str(e))
+    finally:
+        upload.close()
+    # Process workers match with their own corpus copy: after a reload mid-parse the key may not describe it
+    if current_corpus().digest == snapshot.digest:
+        parse_cache.put(key, result)
+    return result
+
+
+# --- Batch parsing ---
+# Batches are large work: each one is admitted once to the large lane of parse_policy
+# (503 + Retry-After when it is full) and its files are parsed on that lane's workers,
+# so a batch never takes the workers single /parse uploads need.
+PARSE_BATCH_MAX_FILES = int(os.getenv("PARSE_BATCH_MAX_FILES", "1000"))
+
+def parse_document_safe(filename: str, source: Union[bytes, str], snapshot: Optional[CorpusSnapshot] = None) -> dict:
+    """Batch entry point: never raises, so one bad file cannot fail the batch.
+
+    source is either the file bytes or the path of a spooled upload, which the
+    worker maps itself instead of receiving a pickled copy. snapshot is only
+    passed in-process; process workers match with their own copy of the corpus.
+    """
+    data: Blob = b""
+    try:
+        data = map_file(source) if isinstance(source, str) else source
+        return {"filename": filename, **parse_document(filename, data, snapshot)}
+    except Exception as e:
+        return {"filename": filename, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+class BatchItem(NamedTuple):
+    filename: str
+    digest: str = ""
+    source: Union[bytes, str, None] = None
+    error: Optional[str] = None
+
+def expand_zip(data: Blob) -> List[BatchItem]:
+    """One BatchItem per file member of a zip archive."""
+    members: List[BatchItem] = []
+    with zipfile.ZipFile(as_stream(data)) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            if info.file_size > PARSE_MAX_FILE_BYTES:
+                members.append(BatchItem(name, error=f"file exceeds {PARSE_MAX_FILE_BYTES} bytes"))
                 continue
+            member = zf.read(info)
+            members.append(BatchItem(name, hashlib.sha256(member).hexdigest(), member))
+    return members
 
-            looks_like_title = (
-                bullet_start.match(ln) is not None
-                or re.match(r"^(Project|PROJECT)[^:]{0,20}[:\-]", ln) is not None
-                or (not current_title and len(ln) >= 25 and len(ln.split()) >= 4)
-                or ("|" in ln and len(ln) >= 12)
-            )
-            # If separated by a blank line, treat Title Case headings as titles
-            if was_blank and heading_like.match(ln):
-                looks_like_title = True
-            if months.fullmatch(ln) or is_generic_label_line(ln) or (len(ln) < 10 and current_title):
-                looks_like_title = False
-
-            if looks_like_title and (not current_title or was_blank or bullet_start.match(ln)):
-                if current_title:
-                    push(current_title, current_desc)
-                title_line = re.sub(r"^[\-\*•\u2022\u25CF\d\)\.\s]+", "", ln).strip()
-                current_title = title_line
-                current_desc = []
+@app.post("/parse-batch")
+async def parse_resume_batch(files: List[UploadFile] = File(...)):
+    """Parse many resumes at once. Zip uploads are expanded into their members.
+
+    Results come back in input order; a file that fails carries an `error`
+    instead of skills/projects and does not affect the rest of the batch.
+    """
+    items: List[BatchItem] = []
+    spools: List[SpooledUpload] = []
+    try:
+        for f in files:
+            name = f.filename or ""
+            try:
+                upload = await spool(f)
+            except UploadTooLarge as e:
+                items.append(BatchItem(name, error=str(e)))
+                continue
+            spools.append(upload)
+            if name.lower().endswith(".zip"):
+                try:
+                    items.extend(await run_in_threadpool(expand_zip, upload.view()))
+                except zipfile.BadZipFile as e:
+                    items.append(BatchItem(name, error=f"BadZipFile: {e}"))
             else:
-                if current_title:
-                    current_desc.append(raw)
-            was_blank = False
-
-        if current_title:
-            push(current_title, current_desc)
-
-    # Filter out hackathon-related entries if present
-    if projects_out:
-        exclude_rx = re.compile(r"\b(hackathon|hack\-?a\-?thon|hackman|hack\s*fest|hackfest)\b", re.IGNORECASE)
-        projects_out = [
-            pr for pr in projects_out
-            if not (exclude_rx.search(pr.get("title") or "") or exclude_rx.search(pr.get("description") or ""))
-        ]
-
-    # De-duplicate by normalized title to avoid splitting/duplicates
-    if projects_out:
-        seen_titles = set()
-        unique = []
-        for pr in projects_out:
-            key = re.sub(r"\W+", "", (pr.get("title") or "").lower())
-            if key and key not in seen_titles:
-                seen_titles.add(key)
-                unique.append(pr)
-        projects_out = unique
-
-    return {"skills": skills_out, "projects": projects_out}
+                items.append(BatchItem(name, upload.sha256, upload.source()))
+            if len(items) > PARSE_BATCH_MAX_FILES:
+                raise HTTPException(status_code=413, detail=f"Batch exceeds {PARSE_BATCH_MAX_FILES} files")
+
+        snapshot = current_corpus()
+        # Admitted before any work starts; files only queue on the large lane's workers
+        admission = parse_policy.admit(large=True)
+
+        async def run(item: BatchItem) -> dict:
+            if item.error is not None:
+                return {"filename": item.filename, "error": item.error}
+            key = cache_key(item.digest, item.filename, snapshot)
+            cached = parse_cache.get(key)
+            if cached is not None:
+                return {"filename": item.filename, **cached}
+            # Parsed against the snapshot the key names, as in /parse
+            args = (item.filename, item.source) if parse_policy.mode == "process" else (item.filename, item.source, snapshot)
+            try:
+                result = await parse_policy.call(parse_document_safe, *args, large=True)
+            except BrokenProcessPool:
+                parse_policy.reset()
+                return {"filename": item.filename, "error": "BrokenProcessPool: worker exited while parsing"}
+            if "error" not in result and current_corpus().digest == snapshot.digest:
+                parse_cache.put(key, {k: v for k, v in result.items() if k != "filename"})
+            return result
+
+        with admission:
+            results = await asyncio.gather(*(run(item) for item in items))
+    finally:
+        for upload in spools:
+            upload.close()
+    failed = sum(1 for r in results if "error" in r)
+    logger.info("Batch parsed files=%d failed=%d workers=%d", len(results), failed, parse_policy.large_workers)
+    return {"count": len(results), "failed": failed, "results": results}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    if WEB_CONCURRENCY > 1:
+        # Each worker imports main:app; the first to load the corpus publishes it for the rest
+        uvicorn.run("main:app", host="0.0.0.0", port=8001, workers=WEB_CONCURRENCY, app_dir=BASE_DIR)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,230 @@
+"""Page-level OCR for scanned PDFs and images.
+
+Pages are rasterized in the request process (pypdfium2 when installed,
+otherwise the largest image pypdf finds embedded in each page, which is what
+a scanner produces), converted to grayscale and downscaled, then handed to a
+bounded process pool. Each worker deskews its page and runs Tesseract with a
+per-page timeout; results come back in page order, with "" for pages that
+timed out or failed.
+
+Pillow, pytesseract and pypdfium2 are optional and imported on first use.
+"""
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, BinaryIO, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger("resume-nlp")
+
+# Extra wait on top of the per-page budget before the caller gives up on a page
+OCR_GRACE_SECONDS = 5.0
+
+
+class PageImage(NamedTuple):
+    """A prepared page, as plain data so it pickles cheaply to a worker."""
+    index: int
+    mode: str
+    size: Tuple[int, int]
+    pixels: bytes
+
+
+def prepare(img, max_side: int):
+    """Grayscale and downscale so the longest side is at most max_side."""
+    from PIL import Image
+    if img.mode != "L":
+        img = img.convert("L")
+    w, h = img.size
+    scale = max_side / float(max(w, h))
+    if 0 < scale < 1:
+        img = img.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.LANCZOS)
+    return img
+
+
+def skew_angle(img, max_angle: float = 5.0, step: float = 0.5, probe_side: int = 800) -> float:
+    """Rotation (degrees, counter-clockwise) that makes text lines horizontal.
+
+    Projection profile search: on a small binarized copy, the angle whose
+    row sums change most sharply from row to row lines the text up best.
+    """
+    from PIL import Image, ImageOps
+    probe = img.convert("L") if img.mode != "L" else img.copy()
+    probe.thumbnail((probe_side, probe_side))
+    probe = ImageOps.autocontrast(probe)
+    ink = probe.point(lambda p: 255 if p < 128 else 0).convert("F")
+    h = ink.size[1]
+    best, best_score = 0.0, -1.0
+    for k in range(-int(max_angle / step), int(max_angle / step) + 1):
+        angle = k * step
+        rotated = ink.rotate(angle, fillcolor=0) if angle else ink
+        # Box-resizing to one column yields the per-row ink means in C
+        rows = list(rotated.resize((1, h), Image.BOX).getdata())
+        score = float(sum((b - a) ** 2 for a, b in zip(rows, rows[1:])))
+        # Prefer the smaller correction on ties (blank or uniform pages)
+        if score > best_score or (score == best_score and abs(angle) < abs(best)):
+            best, best_score = angle, score
+    return best
+
+
+def deskew(img, max_angle: float = 5.0):
+    angle = skew_angle(img, max_angle)
+    if not angle:
+        return img
+    from PIL import Image
+    return img.rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+
+
+def ocr_page(page: PageImage, lang: str, config: str, timeout: float, deskew_pages: bool) -> str:
+    """Worker entry point: deskew one prepared page and OCR it."""
+    from PIL import Image
+    import pytesseract  # type: ignore
+    img = Image.frombytes(page.mode, page.size, page.pixels)
+    if deskew_pages:
+        img = deskew(img)
+    # pytesseract kills the tesseract process and raises RuntimeError past the timeout
+    return pytesseract.image_to_string(img, lang=lang, config=config, timeout=timeout) or ""
+
+
+def _init_worker() -> None:
+    # One Tesseract per core: its own OpenMP threads would oversubscribe the pool
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _in_worker_process() -> bool:
+    # Batch parsing already runs in pool workers; they OCR serially instead of nesting pools
+    return multiprocessing.parent_process() is not None
+
+
+class OcrPipeline:
+    def __init__(
+        self,
+        workers: int,
+        page_timeout: float = 20.0,
+        max_side: int = 2400,
+        dpi: int = 200,
+        lang: str = "eng",
+        config: str = "",
+        deskew_pages: bool = True,
+        page_fn: Callable[..., str] = ocr_page,
+    ):
+        self.workers = workers
+        self.page_timeout = page_timeout
+        self.max_side = max_side
+        self.dpi = dpi
+        self.lang = lang
+        self.config = config
+        self.deskew_pages = deskew_pages
+        self.page_fn = page_fn
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._pool
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _page(self, index: int, img) -> PageImage:
+        img = prepare(img, self.max_side)
+        return PageImage(index, img.mode, img.size, img.tobytes())
+
+    def rasterize_pdf(self, stream: BinaryIO, indices: Optional[Sequence[int]], max_pages: int) -> List[PageImage]:
+        """Render the given page indices (all pages up to max_pages when None)."""
+        try:
+            import pypdfium2 as pdfium  # type: ignore
+        except ImportError:
+            return self._embedded_pdf_images(stream, indices, max_pages)
+        doc = pdfium.PdfDocument(stream)
+        try:
+            count = min(len(doc), max_pages)
+            pages: List[PageImage] = []
+            for i in (range(count) if indices is None else [i for i in indices if i < count]):
+                page = doc[i]
+                try:
+                    pages.append(self._page(i, page.render(scale=self.dpi / 72.0, grayscale=True).to_pil()))
+                finally:
+                    page.close()
+            return pages
+        finally:
+            doc.close()
+
+    def _embedded_pdf_images(self, stream: BinaryIO, indices: Optional[Sequence[int]], max_pages: int) -> List[PageImage]:
+        from pypdf import PdfReader
+        reader = PdfReader(stream)
+        count = min(len(reader.pages), max_pages)
+        pages: List[PageImage] = []
+        for i in (range(count) if indices is None else [i for i in indices if i < count]):
+            try:
+                images = [f.image for f in reader.pages[i].images]
+            except Exception as e:
+                logger.warning("Could not read images on PDF page %d: %s", i, e)
+                continue
+            if images:
+                pages.append(self._page(i, max(images, key=lambda im: im.size[0] * im.size[1])))
+        return pages
+
+    def image_pages(self, stream: BinaryIO, max_pages: int) -> List[PageImage]:
+        """One page per frame (multi-page TIFFs), a single page for JPEG/PNG."""
+        from PIL import Image, ImageSequence
+        img = Image.open(stream)
+        frames = itertools.islice(ImageSequence.Iterator(img), max(1, max_pages))
+        return [self._page(i, frame.copy()) for i, frame in enumerate(frames)]
+
+    def run(self, pages: Sequence[PageImage]) -> Tuple[List[str], Dict[str, Any]]:
+        """OCR pages; texts come back in the order given."""
+        t0 = time.monotonic()
+        args = (self.lang, self.config, self.page_timeout, self.deskew_pages)
+        texts: List[str] = [""] * len(pages)
+        timeouts: List[int] = []
+        errors = 0
+
+        def failed(page: PageImage, e: Exception) -> None:
+            nonlocal errors
+            if "timeout" in str(e).lower():
+                timeouts.append(page.index)
+            else:
+                errors += 1
+                logger.warning("OCR failed on page %d: %s", page.index, e)
+
+        parallel = len(pages) > 1 and self.workers > 1 and not _in_worker_process()
+        if not parallel:
+            for n, page in enumerate(pages):
+                try:
+                    texts[n] = self.page_fn(page, *args)
+                except Exception as e:
+                    failed(page, e)
+        else:
+            pool = self._get_pool()
+            futures = [pool.submit(self.page_fn, page, *args) for page in pages]
+            # Pages queue behind each other once there are more than workers
+            waves = math.ceil(len(pages) / self.workers)
+            deadline = t0 + waves * self.page_timeout + OCR_GRACE_SECONDS
+            for n, (page, future) in enumerate(zip(pages, futures)):
+                try:
+                    texts[n] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeout:
+                    future.cancel()
+                    timeouts.append(page.index)
+                except BrokenProcessPool as e:
+                    self.shutdown()
+                    errors += len(pages) - n
+                    logger.warning("OCR pool broke on page %d: %s", page.index, e)
+                    break
+                except Exception as e:
+                    failed(page, e)
+        meta = {
+            "ocr_pages": len(pages),
+            "ocr_ms": round((time.monotonic() - t0) * 1000.0, 2),
+            "ocr_workers": min(self.workers, len(pages)) if parallel else 1,
+            "ocr_timeouts": timeouts,
+            "ocr_errors": errors,
+        }
+        return texts, meta
@@ -0,0 +1,158 @@
+"""Content-addressed cache of /parse results.
+
+Entries are keyed by a hash of the uploaded bytes, the file extension (it
+picks the extractor) and a version string: the corpus version plus tags of
+the matching and extraction settings (main.cache_key). A re-upload of the
+same resume skips extraction and parsing, while a corpus reload or a changed
+setting naturally misses, also in the disk tier after a restart.
+
+Two tiers:
+- memory: LRU bounded by the serialized size of the cached results
+- disk (optional): SQLite file shared across restarts, bounded by row count
+
+Degraded results are not stored: a PDF cut short by the page cap or deadline
+(`meta.truncated`) or pages whose OCR timed out or failed. Those depend on
+load at the time, and caching one would keep serving it for that content.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def make_key(digest: str, ext: str, corpus_version: str) -> str:
+    return f"{digest}:{ext}:{corpus_version}"
+
+
+def degraded(result: dict) -> bool:
+    """True when extraction gave up on part of the document; such results are not cached."""
+    meta = result.get("meta") or {}
+    return bool(meta.get("truncated") or meta.get("ocr_timeouts") or meta.get("ocr_errors"))
+
+
+class ParseCache:
+    def __init__(self, max_bytes: int, disk_path: Optional[str] = None, disk_max_entries: int = 100_000):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path or None
+        self.disk_max_entries = disk_max_entries
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self.skipped_degraded = 0
+        self._disk_puts = 0
+        if self.disk_path:
+            self._open_disk()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self._db is not None
+
+    def _open_disk(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.disk_path)), exist_ok=True)
+        self._db = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, atime REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS parse_cache_atime ON parse_cache(atime)")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            raw = self._mem.get(key)
+            if raw is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                tier = "memory"
+            elif self._db is not None:
+                row = self._db.execute("SELECT value FROM parse_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                raw = bytes(row[0])
+                self._db.execute("UPDATE parse_cache SET atime = ? WHERE key = ?", (time.time(), key))
+                self._put_mem(key, raw)
+                self.hits += 1
+                self.disk_hits += 1
+                tier = "disk"
+            else:
+                self.misses += 1
+                return None
+        result = json.loads(raw)
+        result.setdefault("meta", {})["cache"] = tier
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        if not self.enabled:
+            return
+        if degraded(result):
+            with self._lock:
+                self.skipped_degraded += 1
+            return
+        raw = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._put_mem(key, raw)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO parse_cache (key, value, atime) VALUES (?, ?, ?)", (key, raw, time.time())
+                )
+                self._disk_puts += 1
+                # Counting rows is a table scan; trim periodically rather than on every write
+                if self._disk_puts % 256 == 1:
+                    self._trim_disk()
+
+    def _put_mem(self, key: str, raw: bytes) -> None:
+        if len(raw) > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = raw
+        self._mem_bytes += len(raw)
+        while self._mem_bytes > self.max_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _trim_disk(self) -> None:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM parse_cache").fetchone()
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM parse_cache WHERE key IN (SELECT key FROM parse_cache ORDER BY atime LIMIT ?)", (excess,)
+            )
+            self.disk_evictions += excess
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM parse_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "skipped_degraded": self.skipped_degraded,
+                "entries": len(self._mem),
+                "bytes": self._mem_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_path": self.disk_path,
+            }
@@ -0,0 +1,394 @@
+"""Section segmentation and project extraction for parsed resumes.
+
+`segment` walks the resume's lines once and returns a SectionMap: every
+heading with its line span and character offsets, the projects heading, and
+where skill matching starts. Skill matching, project extraction and any
+section-aware feature (education, experience, ...) read that map instead of
+rescanning or copying the text.
+
+Every pattern is compiled once at import time. The project heading variants
+and the "next section" anchors are each folded into a single alternation, so
+a line costs one regex search instead of a loop of startswith/in scans.
+"""
+import re
+import string
+from typing import Dict, List, NamedTuple, Optional
+
+PROJECT_HEADER_PATTERNS = (
+    r"^PROJECTS?$",
+    r"^KEY PROJECTS$",
+    r"^PERSONAL PROJECTS$",
+    r"^ACADEMIC PROJECTS$",
+    r"^MAJOR PROJECTS$",
+    r"^MINI PROJECTS$",
+    r"^PROJECT DETAILS$",
+    r"^PROJECT EXPERIENCE$",
+    r"^SELECTED PROJECTS$",
+    r"^PROJECTS[\s&/]+(INTERNSHIPS|TRAINING|CERTIFICATIONS|ACHIEVEMENTS)$",
+    r"^PROJECTS AND (INTERNSHIPS|TRAINING)$",
+    r"^ACADEMIC PROJECTS AND INTERNSHIPS$",
+    r"^PROJECTS AND HACKATHONS$",
+    r"^PROJECTS & HACKATHONS$",
+    r"^PROJECTS AND ACHIEVEMENTS$",
+    r"^PROJECTS & ACHIEVEMENTS$",
+    r"^PROJECTS (?:AND|&) (?:AWARDS|ACCOMPLISHMENTS)$",
+)
+
+# Headings that end the projects section; a line containing any of them counts
+NEXT_SECTION_ANCHORS = (
+    "EXPERIENCE", "WORK EXPERIENCE", "PROFESSIONAL EXPERIENCE", "EDUCATION", "ACADEMICS",
+    "QUALIFICATIONS", "CERTIFICATIONS", "ACHIEVEMENTS", "INTERNSHIP", "PUBLICATIONS",
+    "AWARDS", "SUMMARY", "OBJECTIVE", "PROFILE", "SKILLS", "TECHNICAL SKILLS", "LANGUAGES",
+    "HOBBIES", "INTERESTS", "CONTACT", "WORK HISTORY", "VOLUNTEERING", "EXTRACURRICULAR",
+    "CO-CURRICULAR", "COURSES", "TRAININGS",
+)
+
+# Anchor -> section name in the SectionMap
+SECTION_NAMES = {
+    "EXPERIENCE": "experience", "WORK EXPERIENCE": "experience", "PROFESSIONAL EXPERIENCE": "experience",
+    "WORK HISTORY": "experience", "INTERNSHIP": "experience",
+    "EDUCATION": "education", "ACADEMICS": "education", "QUALIFICATIONS": "education",
+    "CERTIFICATIONS": "certifications", "COURSES": "certifications", "TRAININGS": "certifications",
+    "ACHIEVEMENTS": "achievements", "AWARDS": "achievements", "PUBLICATIONS": "publications",
+    "SUMMARY": "summary", "OBJECTIVE": "summary", "PROFILE": "summary",
+    "SKILLS": "skills", "TECHNICAL SKILLS": "skills", "LANGUAGES": "languages",
+    "HOBBIES": "interests", "INTERESTS": "interests", "CONTACT": "contact",
+    "VOLUNTEERING": "activities", "EXTRACURRICULAR": "activities", "CO-CURRICULAR": "activities",
+}
+
+GENERIC_LABELS = {
+    "TECH STACK", "RESPONSIBILITIES", "ROLE", "DURATION", "TOOLS", "ENVIRONMENT", "TEAM SIZE", "CONTRIBUTIONS",
+    "KEY FEATURES", "ACHIEVEMENTS", "LINKS", "GITHUB", "URL", "WEBSITE", "RESULT", "OUTCOME", "IMPACT",
+}
+
+_WS = re.compile(r"\s+")
+_HEADING_DECORATION = re.compile(r"^[\-*•\u2022\u25CF\s]+|\s*[-_*]{2,}\s*$")
+_DEGREE = re.compile(r"^(Bachelor|Master|B\.?E\.?|B\.?Tech|BTech|B\.?Sc|BSc|M\.?Tech|MTech|M\.?Sc|MBA|Diploma|PUC|Intermediate|XII|10th|12th)\b", re.IGNORECASE)
+# Characters a _DEGREE match can start with (re.IGNORECASE also folds İ/ı to I)
+_DEGREE_FIRST = frozenset("BbMmDdPpIiXx1İı")
+_SEPARATOR = re.compile(r"^\s*[-_=]{4,}\s*$")
+_MONTHS = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\b\s*\d{2,4}", re.IGNORECASE)
+_DATE_RANGE = re.compile(r"\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b\s*[–—\-]\s*(?:Present|\b(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[a-z]*\s*\d{2,4}\b)", re.IGNORECASE)
+_GITHUB_TAIL = re.compile(r"\bGitHub\b.*$", re.IGNORECASE)
+_GITHUB_LINE = re.compile(r"(?i)github\b.*")
+_BULLET_MARKER = re.compile(r"^(\s*)([\-\*•\u2022\u25CF]+)\s*")
+_NUMBER_MARKER = re.compile(r"^(\s*)\d+[\)\.]\s+")
+_BULLET_START = re.compile(r"^[\-\*•\u2022\u25CF]|^\d+[\)\.]\s+")
+# The \\u2013 is literal (a backslash plus "u2013") in this raw string; kept as-is so titles do not change
+_TITLE_DESC_PAIR = re.compile(r"^(.{3,160}?)\s*[-–—:\\u2013\|]\s*(.{4,})$")
+_PROJECT_PREFIX = re.compile(r"^(Project|PROJECT)[^:]{0,20}[:\-]")
+_HEADING_LIKE = re.compile(r"^[A-Z][A-Za-z0-9&/()\-]*?(?:\s+[A-Z][A-Za-z0-9&/()\-]*){2,}\s*$")
+_TITLE_MARKERS = re.compile(r"^[\-\*•\u2022\u25CF\d\)\.\s]+")
+_HACKATHON = re.compile(r"\b(hackathon|hack\-?a\-?thon|hackman|hack\s*fest|hackfest)\b", re.IGNORECASE)
+_NON_WORD = re.compile(r"\W+")
+# "skills" at the start of a whitespace-separated token
+_SKILLS_MENTION = re.compile(r"(?<!\S)SKILLS", re.IGNORECASE)
+
+
+_ASCII_LETTERS = string.ascii_letters.encode()
+_ASCII_UPPER = string.ascii_uppercase.encode()
+
+
+def mostly_upper(t: str) -> bool:
+    """More than 80% of the letters in t are uppercase."""
+    if t.isascii():
+        # Count by deleting bytes in C rather than testing characters one by one
+        b = t.encode()
+        letters = len(b) - len(b.translate(None, _ASCII_LETTERS))
+        upper = len(b) - len(b.translate(None, _ASCII_UPPER))
+    else:
+        chars = "".join(filter(str.isalpha, t))
+        letters, upper = len(chars), sum(map(str.isupper, chars))
+    return letters > 0 and upper / letters > 0.8
+
+
+def literal_trie_pattern(words) -> str:
+    """Regex alternation of literal words factored by shared prefixes.
+
+    re tries a flat alternation word by word at every position; factored, a
+    position that cannot start any word is rejected on its first character.
+    Longer words win over their own prefixes, as with longest-first ordering.
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if end else body
+
+    return emit(trie)
+
+
+class Section(NamedTuple):
+    name: str     # "projects", "skills", "education", ... or "" for an unrecognised heading
+    heading: int  # line index of the heading
+    end: int      # line index of the next heading (end of this section's body)
+
+
+class SectionMap:
+    """Where each section of one resume starts and ends; spans only, no copied text."""
+
+    def __init__(self, lines: List[str], offsets: List[int], sections: List[Section], projects: int, skills_from: int):
+        self.lines = lines        # right-stripped lines
+        self.offsets = offsets    # character offset of each line in the source text, plus its length
+        self.sections = sections  # in document order
+        self.projects = projects  # heading line of the projects section, -1 when there is none
+        self.skills_from = skills_from  # offset of the first "skills" mention (0 when absent)
+        self._by_name: Dict[str, Section] = {}
+        for sec in sections:
+            self._by_name.setdefault(sec.name, sec)
+
+    def find(self, name: str) -> Optional[Section]:
+        """First section with this name."""
+        return self._by_name.get(name)
+
+    def body(self, section: Section) -> List[str]:
+        return self.lines[section.heading + 1:section.end]
+
+    def span(self, section: Section) -> tuple:
+        """(start, end) character offsets of the section, heading included."""
+        return self.offsets[section.heading], self.offsets[section.end]
+
+
+class ResumeSectionParser:
+    def __init__(self, header_patterns=PROJECT_HEADER_PATTERNS, anchors=NEXT_SECTION_ANCHORS):
+        self.header_rx = re.compile("|".join(f"(?:{p})" for p in header_patterns))
+        self.anchor_rx = re.compile(literal_trie_pattern(set(anchors)))
+
+    @staticmethod
+    def normalize_heading(s: str) -> str:
+        return _WS.sub(" ", s.strip().strip("-:•*\u2013")).upper()
+
+    def heading_name(self, t: str, upper: str) -> Optional[str]:
+        """Section name if the stripped line t ends the previous section, else None."""
+        # Known next section anchors (equal to, starting with or containing one)
+        m = self.anchor_rx.search(upper)
+        if m:
+            return SECTION_NAMES.get(m.group(0), "")
+        # Common education/degree patterns often used as first line under EDUCATION in extracted text
+        if t[0] in _DEGREE_FIRST and _DEGREE.match(t):
+            return "education"
+        # Horizontal rules / separators
+        if t[0] in "-_=" and _SEPARATOR.match(t):
+            return ""
+        # Heuristic: line that is mostly uppercase and short looks like a heading
+        if 3 <= len(t) <= 60 and mostly_upper(t):
+            return ""
+        return None
+
+    def segment(self, text: str) -> SectionMap:
+        """Split a resume into sections in one pass over its lines."""
+        lines: List[str] = []
+        offsets: List[int] = []
+        headings: List[Section] = []
+        header = fallback = -1
+        skills_from = -1
+        pos = 0
+        for i, raw_line in enumerate(text.splitlines(True)):
+            offsets.append(pos)
+            pos += len(raw_line)
+            line = raw_line.rstrip()
+            lines.append(line)
+            t = line.strip()
+            if not t:
+                continue
+            upper = t.upper()
+            is_projects = False
+            # Every project heading variant contains PROJECT, so other lines skip normalising
+            if header == -1 and "PROJECT" in upper:
+                if self.header_rx.match(self.normalize_heading(upper)):
+                    header = i
+                    is_projects = True
+                elif fallback == -1:
+                    # First heading-like line mentioning PROJECT, used when no real heading exists
+                    raw_norm = _HEADING_DECORATION.sub("", t)
+                    if "PROJECT" in raw_norm.upper() and len(raw_norm) <= 120:
+                        fallback = i
+            if skills_from == -1 and "SKILLS" in upper:
+                m = _SKILLS_MENTION.search(line)
+                if m:
+                    skills_from = pos - len(raw_line) + m.start()
+            name = self.heading_name(t, upper)
+            if is_projects:
+                headings.append(Section("projects", i, 0))
+            elif name is not None:
+                headings.append(Section(name, i, 0))
+        offsets.append(pos)
+
+        projects = header if header != -1 else fallback
+        if projects != -1 and not any(h.heading == projects for h in headings):
+            # A projects heading that does not look like one ("Project Work") still opens the section
+            headings.append(Section("projects", projects, 0))
+            headings.sort(key=lambda h: h.heading)
+        sections = [
+            Section("projects" if h.heading == projects else h.name, h.heading,
+                    headings[k + 1].heading if k + 1 < len(headings) else len(lines))
+            for k, h in enumerate(headings)
+        ]
+        return SectionMap(lines, offsets, sections, projects, max(skills_from, 0))
+
+    @staticmethod
+    def clean_title(t: str) -> str:
+        t = t.strip().strip("-–—:•*·•")
+        # Prefer left side before pipe
+        if "|" in t:
+            t = t.split("|")[0].strip()
+        # Drop anything after 'GitHub'
+        t = _GITHUB_TAIL.sub("", t)
+        # Remove date ranges or single month-year tokens
+        t = _DATE_RANGE.sub("", t)
+        t = _MONTHS.sub("", t)
+        # Collapse extra punctuation/spaces
+        t = _WS.sub(" ", t).strip("-–—:•* ·")
+        return t.strip()
+
+    @staticmethod
+    def clean_desc_lines(lines: List[str]) -> List[str]:
+        out = []
+        for ln in lines:
+            if ln is None:
+                continue
+            # Preserve leading whitespace for indentation; trim only right side
+            s = ln.rstrip("\n\r")
+            if not s:
+                out.append("")
+                continue
+            # Skip standalone dates or github-only lines
+            if _DATE_RANGE.fullmatch(s) or _MONTHS.fullmatch(s) or _GITHUB_LINE.fullmatch(s):
+                continue
+            # Normalize common leading markers (bullets, numbers) to a single bullet while keeping indentation
+            s = _BULLET_MARKER.sub(r"\1• ", s)
+            s = _NUMBER_MARKER.sub(r"\1• ", s)
+            out.append(s)
+        return out
+
+    def build_project(self, current_title: str, desc_lines: List[str]) -> Optional[dict]:
+        # Start with raw title
+        title_raw = (current_title or "").strip()
+        # If title looks too short (e.g., 'Fra'), try to merge first desc line
+        if len(title_raw) < 10 and desc_lines:
+            first = (desc_lines[0] or "").strip()
+            if first and first[0].islower():
+                title_raw = f"{title_raw} {first}".strip()
+                desc_lines = desc_lines[1:]
+        title = self.clean_title(title_raw)
+        if not title and desc_lines:
+            # Fallback: take first meaningful desc line as title
+            title = self.clean_title(desc_lines[0])
+            desc_lines = desc_lines[1:]
+        if not title:
+            return None
+        if len(title) > 150:
+            title = title[:150] + "…"
+        # Clean description
+        desc_items = self.clean_desc_lines(desc_lines)
+        # Remove leading/trailing blanks
+        while desc_items and not desc_items[0]:
+            desc_items.pop(0)
+        while desc_items and not desc_items[-1]:
+            desc_items.pop()
+        desc = "\n".join(desc_items).strip()
+        if len(desc) > 4000:
+            desc = desc[:3997] + "…"
+        return {"title": title, "description": desc}
+
+    @staticmethod
+    def is_generic_label_line(s: str) -> bool:
+        u = s.strip().upper()
+        return any(u == g or u.startswith(g + ":") for g in GENERIC_LABELS)
+
+    def split_projects(self, projects_lines: List[str]) -> List[dict]:
+        """Group the lines of a projects section into {title, description} entries."""
+        # Preserve original line breaks; minimal trimming
+        lines = [ln.rstrip() for ln in projects_lines]
+        while lines and not lines[0].strip():
+            lines.pop(0)
+
+        projects: List[dict] = []
+
+        def push(title: str, desc: List[str]) -> None:
+            project = self.build_project(title, desc)
+            if project is not None:
+                projects.append(project)
+
+        current_title = ""
+        current_desc: List[str] = []
+        was_blank = True
+        for raw in lines:
+            ln = raw.strip()
+            if not ln:
+                if current_title and (not current_desc or current_desc[-1] != ""):
+                    current_desc.append("")
+                was_blank = True
+                continue
+
+            m_pair = _TITLE_DESC_PAIR.match(ln)
+            if m_pair:
+                if not current_title or was_blank:
+                    if current_title:
+                        push(current_title, current_desc)
+                    current_title = m_pair.group(1)
+                    current_desc = [m_pair.group(2)]
+                else:
+                    current_desc.append(raw)
+                was_blank = False
+                continue
+
+            looks_like_title = (
+                _BULLET_START.match(ln) is not None
+                or _PROJECT_PREFIX.match(ln) is not None
+                or (not current_title and len(ln) >= 25 and len(ln.split()) >= 4)
+                or ("|" in ln and len(ln) >= 12)
+            )
+            # If separated by a blank line, treat Title Case headings as titles
+            if was_blank and _HEADING_LIKE.match(ln):
+                looks_like_title = True
+            if _MONTHS.fullmatch(ln) or self.is_generic_label_line(ln) or (len(ln) < 10 and current_title):
+                looks_like_title = False
+
+            if looks_like_title and (not current_title or was_blank or _BULLET_START.match(ln)):
+                if current_title:
+                    push(current_title, current_desc)
+                current_title = _TITLE_MARKERS.sub("", ln).strip()
+                current_desc = []
+            else:
+                if current_title:
+                    current_desc.append(raw)
+            was_blank = False
+
+        if current_title:
+            push(current_title, current_desc)
+        return projects
+
+    def extract_projects(self, text: str, sections: Optional[SectionMap] = None) -> List[dict]:
+        """Projects from resume text with newlines preserved, reusing its SectionMap if given."""
+        sections = sections or self.segment(text)
+        body: List[str] = []
+        if sections.projects != -1:
+            section = next(sec for sec in sections.sections if sec.heading == sections.projects)
+            body = sections.body(section)
+        projects = self.split_projects(body) if body else []
+
+        # Filter out hackathon-related entries if present
+        projects = [
+            pr for pr in projects
+            if not (_HACKATHON.search(pr.get("title") or "") or _HACKATHON.search(pr.get("description") or ""))
+        ]
+
+        # De-duplicate by normalized title to avoid splitting/duplicates
+        seen_titles = set()
+        unique = []
+        for pr in projects:
+            key = _NON_WORD.sub("", (pr.get("title") or "").lower())
+            if key and key not in seen_titles:
+                seen_titles.add(key)
+                unique.append(pr)
+        return unique
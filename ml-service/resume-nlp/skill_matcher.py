@@ -0,0 +1,392 @@
+"""Single-pass skill matcher for the resume NLP service.
+
+Builds an Aho-Corasick automaton over the lowercased skill corpus once, then
+finds every skill in a resume with one scan of the text. Matching follows the
+same rules as the per-skill regexes it replaces:
+
+- case-insensitive
+- a match may not touch another ASCII alphanumeric on either side
+- skills shorter than two characters are dropped unless whitelisted
+- alias variants (below) also may not follow a dotted name: "JS" is not
+  found in "Node.js"
+
+Whitespace is built into the automaton: a run of any whitespace in the resume
+matches the single space in a multi-word skill, so resumes are scanned as-is
+instead of through a whitespace-normalised copy.
+
+An optional alias table (canonical skill -> variant spellings) is compiled
+into the same automaton. Every pattern carries the dense integer id of its
+canonical skill, so "JS", "Javascript" and "javascript" all resolve to the id
+of "JavaScript" in the one scan. Ids number canonical skills in corpus order,
+then canonicals only the alias table names, in table order.
+
+`to_sections` flattens a compiled automaton into uint32 arrays (edges sorted
+per state, failure links, outputs) for a snapshot file shared by worker
+processes; `MappedSkillMatcher` matches straight from those arrays. It turns
+a state into a dict the first time a scan reaches it, so each worker only
+holds the states its resumes actually visit, and whitespace edges are not
+stored: a whitespace character is read as a space, and the states right
+after a space skip further whitespace.
+"""
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Characters that `[A-Za-z0-9]` matches under re.IGNORECASE
+_WORD_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    "İıſK"
+)
+
+# Fold the few characters re.IGNORECASE equates with ASCII letters but
+# str.lower() does not (and keep 'İ' from expanding to two characters)
+_FOLD = str.maketrans({"İ": "i", "ı": "i", "ſ": "s", "K": "k"})
+_FOLD_CHARS = tuple(map(chr, _FOLD))
+
+
+def fold(text: str) -> str:
+    """Lowercase text for matching without changing its length."""
+    # translate() with a dict walks non-ASCII text char by char; skip it when there is nothing to fold
+    if any(c in text for c in _FOLD_CHARS):
+        text = text.translate(_FOLD)
+    return text.lower()
+
+
+# What re's \s (and str.split()) treats as whitespace; all of it is below U+3001
+_SPACES = frozenset(chr(c) for c in range(0x3000 + 1) if chr(c).isspace())
+
+
+class SkillMatcher:
+    """Aho-Corasick automaton over a skill corpus.
+
+    Patterns are ranked like the old regex list (longest first, corpus order
+    for ties) so results are ordered exactly as before. Alias variants and
+    canonicals missing from the corpus rank after corpus entries of the same
+    length.
+    """
+
+    def __init__(self, skills: Iterable[str], short_whitelist: Iterable[str] = (),
+                 aliases: Optional[Mapping[str, Iterable[str]]] = None):
+        whitelist = {s.lower() for s in short_whitelist}
+        skills = list(skills)
+        self.patterns: List[str] = []
+        lengths: List[int] = []
+        by_key: Dict[str, int] = {}
+        canon: List[int] = []
+        # Only skills with a space can span a whitespace run in the resume
+        spaced = set()
+        # Patterns that came from the alias table rather than the corpus
+        from_aliases = set()
+        corpus_keys = {fold(s.strip()) for s in skills}
+
+        # goto[node] maps char -> child node; out[node] lists pattern ids
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        # Canonical display names, indexed by id; folded spelling -> canonical name
+        self.canonical: List[str] = []
+        self._canonical_ids: Dict[str, int] = {}
+        canonical_of: Dict[str, str] = {}
+        extra: List[str] = []
+        for name, variants in (aliases or {}).items():
+            for v in (name, *variants):
+                # The first canonical to list a spelling keeps it
+                if v.strip() and canonical_of.setdefault(fold(v.strip()), name.strip()) == name.strip():
+                    extra.append(v.strip())
+        for s in skills + list((aliases or {}).keys()):
+            name = canonical_of.get(fold(s.strip()), s.strip())
+            if name and fold(name) not in self._canonical_ids:
+                self._canonical_ids[fold(name)] = len(self.canonical)
+                self.canonical.append(name)
+
+        for s in sorted(skills + extra, key=lambda x: len(x), reverse=True):
+            sl = s.strip()
+            if not sl:
+                continue
+            if len(sl) < 2 and sl.lower() not in whitelist:
+                continue
+            key = fold(sl)
+            if key != " ".join(key.split()):
+                # Tabs or double spaces inside a skill can never match (whitespace runs scan as one space)
+                continue
+            if key in by_key:
+                # Same text as a higher-ranked pattern; it can never win
+                continue
+            pid = len(self.patterns)
+            by_key[key] = pid
+            self.patterns.append(s)
+            canon.append(self._canonical_ids[fold(canonical_of.get(key, sl))])
+            lengths.append(len(key))
+            if " " in key:
+                spaced.add(pid)
+            if key not in corpus_keys:
+                from_aliases.add(pid)
+            self._insert(key, pid)
+
+        self._lengths: Tuple[int, ...] = tuple(lengths)
+        self._canon: Tuple[int, ...] = tuple(canon)
+        self._by_key = by_key
+        self._spaced = frozenset(spaced)
+        self._from_aliases = frozenset(from_aliases)
+        self._build_links()
+        self._add_space_edges()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def canonical_id(self, skill: str) -> Optional[int]:
+        """Canonical id of a corpus entry or alias (any casing), or None."""
+        pid = self._by_key.get(" ".join(fold(skill).split()))
+        return self._canon[pid] if pid is not None else None
+
+    def _insert(self, key: str, pid: int) -> None:
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = nxt
+        self._out[node] = (pid,)
+
+    def _build_links(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in goto[node].items():
+                queue.append(child)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[child] = target if target != child else 0
+                if out[fail[child]]:
+                    out[child] = out[child] + out[fail[child]]
+
+    def _add_space_edges(self) -> None:
+        # After the failure links, so the BFS above saw each child exactly once
+        spaced = []
+        for edges in self._goto:
+            child = edges.get(" ")
+            if child is not None:
+                spaced.append(child)
+                for v in _SPACES:
+                    edges.setdefault(v, child)
+        # Right after a space, further whitespace is part of the same run: stay put
+        for node in spaced:
+            edges = self._goto[node]
+            for v in _SPACES:
+                edges[v] = node
+
+    def to_sections(self, prefix: str = "matcher.") -> Dict[str, Any]:
+        """The automaton as flat arrays, for a snapshot file read by MappedSkillMatcher."""
+        n = len(self._goto)
+        edge_offsets, chars, targets = array("I", [0]), array("I"), array("I")
+        after_space = bytearray(n)
+        for node, edges in enumerate(self._goto):
+            # Whitespace other than " " and the self-loops of whitespace runs are left implicit
+            for ch, child in sorted(edges.items()):
+                if child == node or (ch != " " and ch in _SPACES):
+                    continue
+                chars.append(ord(ch))
+                targets.append(child)
+                if ch == " ":
+                    after_space[child] = 1
+            edge_offsets.append(len(targets))
+        out_offsets, outs = array("I", [0]), array("I")
+        for found in self._out:
+            outs.extend(found)
+            out_offsets.append(len(outs))
+        flags = bytes((pid in self._spaced) | (pid in self._from_aliases) << 1 for pid in range(len(self.patterns)))
+        sections = {
+            "patterns": self.patterns, "canonical": self.canonical,
+            "lengths": array("I", self._lengths), "canon": array("I", self._canon), "flags": flags,
+            "edge_offsets": edge_offsets, "edge_chars": chars, "edge_targets": targets,
+            "fail": array("I", self._fail), "out_offsets": out_offsets, "outs": outs, "after_space": bytes(after_space),
+        }
+        return {prefix + name: value for name, value in sections.items()}
+
+    def find_first(self, text: str, start: int = 0,
+                   claimed: Optional[List[Tuple[int, int]]] = None) -> Dict[int, Tuple[int, int]]:
+        """Return {pattern id: (start, end) of its first bounded occurrence in text[start:]}.
+
+        If `claimed` is given, the (start, end) of every bounded occurrence is appended to it.
+        """
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        spaced, from_aliases = self._spaced, self._from_aliases
+        words = _WORD_CHARS
+        n = len(text)
+        first: Dict[int, Tuple[int, int]] = {}
+        node = 0
+        for i, ch in enumerate(islice(fold(text), start, None), start):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            if i + 1 < n and text[i + 1] in words:
+                continue
+            for pid in out[node]:
+                if pid in first and claimed is None:
+                    continue
+                s = i + 1 - lengths[pid]
+                if pid in spaced:
+                    s = self._match_start(text, i, lengths[pid], start)
+                if s and text[s - 1] in words:
+                    continue
+                if pid in from_aliases and s > 1 and text[s - 1] == "." and text[s - 2] in words:
+                    continue
+                if claimed is not None:
+                    claimed.append((s, i + 1))
+                    if pid in first:
+                        continue
+                first[pid] = (s, i + 1)
+        return first
+
+    @staticmethod
+    def _match_start(text: str, end: int, length: int, lo: int) -> int:
+        """Offset of a multi-word match ending at text[end] whose folded skill is `length` long."""
+        # A whitespace run may stand in for a single space; walk back counting runs as one
+        i = end
+        while length > 1:
+            i -= 1
+            if not (i > lo and text[i] in _SPACES and text[i - 1] in _SPACES):
+                length -= 1
+        return i
+
+    def match(self, text: str, start: int = 0,
+              claimed: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, str]]:
+        """Return (position, resume casing) per skill in text[start:], ordered by position.
+
+        The casing has whitespace runs reduced to one space, as in the skill.
+        `claimed` collects the span of every occurrence, as in find_first.
+        """
+        return [(s, resume_case) for s, resume_case, _ in self.match_ids(text, start, claimed)]
+
+    def match_ids(self, text: str, start: int = 0,
+                  claimed: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, str, int]]:
+        """As match, with the canonical id of each skill: (position, resume casing, id)."""
+        return [(s, resume_case, cid) for s, resume_case, cid, _ in self.match_terms(text, start, claimed)]
+
+    def match_terms(self, text: str, start: int = 0,
+                    claimed: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, str, int, bool]]:
+        """As match_ids, plus whether each match is a corpus entry (False for a variant only the alias table lists)."""
+        # find_first reports each pattern once, and patterns are distinct folded
+        # spellings, so no lowercased copy of each match is needed to dedupe
+        found: List[Tuple[int, int, str]] = []
+        for pid, (s, e) in self.find_first(text, start, claimed).items():
+            resume_case = text[s:e]
+            # Spaces only ever print as " "; anything else (\n, \t, runs) is whitespace to collapse
+            if e - s != self._lengths[pid] or not resume_case.isprintable():
+                resume_case = " ".join(resume_case.split())
+            found.append((s, pid, resume_case))
+        found.sort()
+        canon, alias_only = self._canon, self._alias_only
+        return [(s, resume_case, canon[pid], not alias_only(pid)) for s, pid, resume_case in found]
+
+    def _alias_only(self, pid: int) -> bool:
+        return pid in self._from_aliases
+
+
+class MappedSkillMatcher(SkillMatcher):
+    """A SkillMatcher read from the arrays of `to_sections` in a mapped snapshot file.
+
+    Matches exactly like the matcher it was flattened from. States are
+    unpacked into (edges, outputs, failure link, after a space) on first use
+    and kept for the life of the object.
+    """
+
+    def __init__(self, snapshot, prefix: str = "matcher."):
+        # Keeps the mapping alive for as long as the views below are in use
+        self.snapshot = snapshot
+        self.patterns = snapshot.strings(prefix + "patterns")
+        self.canonical = snapshot.strings(prefix + "canonical")
+        self._lengths = snapshot.array(prefix + "lengths")
+        self._canon = snapshot.array(prefix + "canon")
+        self._flags = snapshot.buffer(prefix + "flags")
+        self._edge_offsets = snapshot.array(prefix + "edge_offsets")
+        self._edge_chars = snapshot.array(prefix + "edge_chars")
+        self._edge_targets = snapshot.array(prefix + "edge_targets")
+        self._fail = snapshot.array(prefix + "fail")
+        self._out_offsets = snapshot.array(prefix + "out_offsets")
+        self._outs = snapshot.array(prefix + "outs")
+        self._after_space = snapshot.buffer(prefix + "after_space")
+        self._states: List[Optional[tuple]] = [None] * len(self._fail)
+
+    def _alias_only(self, pid: int) -> bool:
+        return bool(self._flags[pid] & 2)
+
+    @property
+    def loaded_states(self) -> int:
+        return sum(st is not None for st in self._states)
+
+    def _state(self, node: int) -> tuple:
+        lo, hi = self._edge_offsets[node], self._edge_offsets[node + 1]
+        st = self._states[node] = (
+            dict(zip(map(chr, self._edge_chars[lo:hi]), self._edge_targets[lo:hi])),
+            tuple(self._outs[self._out_offsets[node]:self._out_offsets[node + 1]]),
+            self._fail[node],
+            self._after_space[node],
+        )
+        return st
+
+    def canonical_id(self, skill: str) -> Optional[int]:
+        key = " ".join(fold(skill).split())
+        node = 0
+        for ch in key:
+            node = (self._states[node] or self._state(node))[0].get(ch)
+            if node is None:
+                return None
+        st = self._states[node] or self._state(node)
+        # A pattern ending here comes first in the state's outputs
+        if st[1] and self._lengths[st[1][0]] == len(key):
+            return self._canon[st[1][0]]
+        return None
+
+    def find_first(self, text: str, start: int = 0,
+                   claimed: Optional[List[Tuple[int, int]]] = None) -> Dict[int, Tuple[int, int]]:
+        states, load, lengths, flags = self._states, self._state, self._lengths, self._flags
+        words, spaces = _WORD_CHARS, _SPACES
+        n = len(text)
+        first: Dict[int, Tuple[int, int]] = {}
+        node = 0
+        st = states[0] or load(0)
+        for i, ch in enumerate(islice(fold(text), start, None), start):
+            if ch in spaces:
+                if st[3]:
+                    # Still in the whitespace run that matched a space; no output can end here
+                    continue
+                ch = " "
+            while node and ch not in st[0]:
+                node = st[2]
+                st = states[node] or load(node)
+            node = st[0].get(ch, 0)
+            st = states[node] or load(node)
+            if not st[1]:
+                continue
+            if i + 1 < n and text[i + 1] in words:
+                continue
+            for pid in st[1]:
+                if pid in first and claimed is None:
+                    continue
+                s = i + 1 - lengths[pid]
+                flag = flags[pid]
+                if flag & 1:
+                    s = self._match_start(text, i, lengths[pid], start)
+                if s and text[s - 1] in words:
+                    continue
+                if flag & 2 and s > 1 and text[s - 1] == "." and text[s - 2] in words:
+                    continue
+                if claimed is not None:
+                    claimed.append((s, i + 1))
+                    if pid in first:
+                        continue
+                first[pid] = (s, i + 1)
+        return first
@@ -0,0 +1,75 @@
+"""Lazy component registry and the /ready endpoint."""
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from components import ComponentRegistry, ComponentUnavailable  # noqa: E402
+
+
+def test_loader_runs_once_on_first_get():
+    calls = []
+    registry = ComponentRegistry()
+    registry.register("thing", lambda: calls.append(1) or "value", modules=("json",))
+    assert registry.status()["thing"]["state"] == "not_loaded"
+    assert registry.available("thing") and not calls
+    assert registry.get("thing") == registry.get("thing") == "value"
+    assert calls == [1]
+    assert registry.loaded("thing")
+
+
+def test_failed_load_is_remembered_and_reported():
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ImportError("No module named 'nope'")
+
+    registry = ComponentRegistry()
+    registry.register("nope", broken, modules=("nope_not_installed",))
+    assert not registry.available("nope")
+    for _ in range(2):
+        with pytest.raises(ComponentUnavailable):
+            registry.get("nope")
+    assert calls == [1]
+    assert registry.warm(["nope"]) == {"nope": "unavailable"}
+    assert "nope" in registry.status()["nope"]["error"]
+
+
+def test_import_does_not_load_optional_components():
+    # Fresh interpreter: other tests in this process may already have loaded things
+    probe = (
+        "import sys, json, main; "
+        "print(json.dumps([sorted(m for m in ('pypdf', 'pdfminer', 'docx', 'PIL', 'spacy') if m in sys.modules), "
+        "main.corpus_store.current is None]))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", probe], cwd=SERVICE_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "LOG_LEVEL": "WARNING"},
+    ).stdout
+    assert json.loads(out.strip().splitlines()[-1]) == [[], True]
+
+
+def test_ready_reports_after_warmup():
+    with TestClient(main.app) as client:
+        assert client.get("/health").json() == {"status": "ok"}
+        deadline = time.monotonic() + 10
+        resp = client.get("/ready")
+        while resp.status_code == 503 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            resp = client.get("/ready")
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["ready"] is True
+        for name in body["warmup"]:
+            assert body["components"][name]["state"] in ("loaded", "unavailable")
+        assert body["components"]["corpus"]["state"] == "loaded"
@@ -0,0 +1,147 @@
+"""Corpus snapshots: atomic swap, mtime watcher, /reload-corpus and sharing between workers."""
+import asyncio
+import os
+import sys
+import threading
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "..", "shared"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from corpus_snapshot import CorpusStore, CorpusWatcher, file_stamp  # noqa: E402
+from mmap_snapshot import SnapshotChannel  # noqa: E402
+from skill_matcher import MappedSkillMatcher, SkillMatcher  # noqa: E402
+
+RESUME = "Skills\nPython, Docker, Kubernetes\n"
+
+
+def write_corpus(path, skills, mtime_ns=None):
+    path.write_text("\n".join(skills) + "\n", encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_publish_bumps_version_and_keeps_old_snapshot_intact():
+    store = CorpusStore()
+    old = store.publish(["python"], "a.txt")
+    new = store.publish(["python", "docker"], "a.txt")
+    assert (old.version, new.version) == (1, 2)
+    assert store.current is new
+    assert [s for _, s in old.matcher.match(RESUME)] == ["Python"]
+    assert old.digest != new.digest
+
+
+def test_readers_never_see_a_partial_corpus_during_reloads():
+    store = CorpusStore()
+    small, large = ["python"], ["python", "docker", "kubernetes"]
+    store.publish(small, "a.txt")
+    seen, stop = set(), threading.Event()
+
+    def read():
+        while not stop.is_set():
+            seen.add(tuple(s for _, s in store.current.matcher.match(RESUME)))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for t in readers:
+        t.start()
+    for i in range(50):
+        store.publish(large if i % 2 else small, "a.txt")
+    stop.set()
+    for t in readers:
+        t.join()
+    assert seen <= {("Python",), ("Python", "Docker", "Kubernetes")}
+
+
+def test_watcher_reloads_once_change_has_settled(tmp_path):
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, ["python"], mtime_ns=1_000_000_000)
+    store = CorpusStore()
+    store.publish(["python"], str(path), file_stamp(str(path)))
+
+    def reload(p):
+        return store.publish(main.read_corpus(p), p, file_stamp(p))
+
+    watcher = CorpusWatcher(store, reload, interval=0.01)
+    write_corpus(path, ["python", "docker"], mtime_ns=2_000_000_000)
+
+    async def run():
+        first = await watcher.poll()
+        second = await watcher.poll()
+        third = await watcher.poll()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first is None  # change seen, waiting for it to settle
+    assert second is store.current and second.version == 2
+    assert second.corpus == ("python", "docker")
+    assert third is None
+    assert watcher.stats()["reloads"] == 1
+
+
+def test_watcher_keeps_snapshot_when_reload_fails(tmp_path):
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, ["python"], mtime_ns=1_000_000_000)
+    store = CorpusStore()
+    store.publish(["python"], str(path), file_stamp(str(path)))
+
+    def reload(p):
+        raise ValueError("corpus file is empty")
+
+    watcher = CorpusWatcher(store, reload, interval=0.01)
+    path.write_text("", encoding="utf-8")
+
+    async def run():
+        for _ in range(4):
+            await watcher.poll()
+
+    asyncio.run(run())
+    assert store.current.version == 1
+    assert watcher.stats()["failures"] == 1  # not retried until the file changes again
+
+
+def test_reload_endpoint_swaps_snapshot_and_rejects_empty_file(tmp_path, monkeypatch):
+    before = main.current_corpus()
+    path = tmp_path / "corpus.txt"
+    write_corpus(path, ["python", "kubernetes"])
+    monkeypatch.setenv("SKILL_CORPUS_PATH", str(path))
+    try:
+        with TestClient(main.app) as client:
+            body = client.post("/reload-corpus").json()
+            assert body["corpus_size"] == 2 and body["version"] == before.version + 1
+            assert main.parse_text(RESUME)["skills"] == ["Python", "Kubernetes"]
+
+            path.write_text("", encoding="utf-8")
+            resp = client.post("/reload-corpus")
+            assert resp.status_code == 500
+            assert main.current_corpus().version == body["version"]
+            assert client.get("/diagnostics").json()["corpus_snapshot"]["version"] == body["version"]
+    finally:
+        main.corpus_store.publish(before.corpus, before.path, before.stamp, before.aliases)
+
+
+def test_workers_share_one_mapped_snapshot_and_follow_reloads(tmp_path):
+    # Two stores on one channel directory stand in for two worker processes
+    workers = [CorpusStore(main.SHORT_SKILL_WHITELIST, channel=SnapshotChannel(str(tmp_path), "corpus")) for _ in range(2)]
+    aliases = {"JavaScript": ("JS",)}
+    first = workers[0].publish(["python", "docker", "JavaScript"], "a.txt", (1, 2), aliases)
+    assert isinstance(first.matcher, MappedSkillMatcher) and first.version == 1
+    # Same corpus, aliases and stamp: adopted, not compiled again
+    second = workers[1].publish(["python", "docker", "JavaScript"], "a.txt", (1, 2), aliases)
+    assert second.matcher.snapshot.path == first.matcher.snapshot.path and second.version == 1
+    assert second.corpus[:] == ["python", "docker", "JavaScript"] and second.aliases == aliases
+
+    text = "Skills\nPython,  Docker\tJS and node.js\n"
+    plain = SkillMatcher(["python", "docker", "JavaScript"], main.SHORT_SKILL_WHITELIST, aliases)
+    assert second.matcher.match_ids(text) == plain.match_ids(text)
+    assert second.matcher.canonical_id("js") == plain.canonical_id("js") == 2
+
+    # A reload in one worker is what the other serves from its next read on
+    reloaded = workers[0].publish(["python", "kubernetes"], "a.txt", (3, 4))
+    assert reloaded.version == 2 and workers[0].current is reloaded
+    assert workers[1].current.version == 2
+    assert [s for _, s in workers[1].current.matcher.match(RESUME)] == ["Python", "Kubernetes"]
+    # The old snapshot object keeps working from its own mapping
+    assert [s for _, s in second.matcher.match(RESUME)] == ["Python", "Docker"]
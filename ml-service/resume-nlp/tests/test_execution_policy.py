@@ -0,0 +1,89 @@
+"""/parse under an execution policy: tail latency of small uploads next to large ones, and backpressure."""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+import main  # noqa: E402
+from executor_policy import ExecutionPolicy  # noqa: E402
+
+LINE = "Built data pipelines in Python and SQL with Docker, Kubernetes and React dashboards.\n"
+SMALL = ("Skills\n" + LINE * 5).encode()
+LARGE = ("Experience\n" + LINE * 10000).encode()  # ~850 KB, a few hundred ms to parse
+
+
+async def mixed_uploads(n_large: int = 2, n_small: int = 20) -> tuple:
+    """Start the large uploads, then one small upload every 20 ms; latencies in seconds."""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+
+        async def upload(body: bytes, name: str) -> tuple:
+            t0 = time.perf_counter()
+            # A distinct file each time, so the parse cache never answers
+            r = await client.post("/parse", files={"file": (f"{name}.txt", body + name.encode(), "text/plain")})
+            return r, time.perf_counter() - t0
+
+        async def small(i: int) -> tuple:
+            await asyncio.sleep(0.02 * i)
+            return await upload(SMALL, f"small-{i}-{time.time_ns()}")
+
+        large = [asyncio.create_task(upload(LARGE, f"large-{k}-{time.time_ns()}")) for k in range(n_large)]
+        await asyncio.sleep(0)
+        smalls = await asyncio.gather(*(small(i) for i in range(n_small)))
+        larges = await asyncio.gather(*large)
+    return smalls, larges
+
+
+def p95(latencies) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def run_with(monkeypatch, policy: ExecutionPolicy) -> tuple:
+    monkeypatch.setattr(main, "parse_policy", policy)
+    monkeypatch.setattr(main, "PARSE_LARGE_UPLOAD_BYTES", 64 * 1024)
+    try:
+        return asyncio.run(mixed_uploads())
+    finally:
+        policy.shutdown()
+
+
+def test_small_uploads_are_not_stuck_behind_large_ones(monkeypatch):
+    main.current_corpus()
+    inline_small, inline_large = run_with(monkeypatch, ExecutionPolicy("parse", "inline"))
+    pooled_small, pooled_large = run_with(monkeypatch, ExecutionPolicy("parse", "thread", workers=2, large_workers=1))
+    for r, _ in inline_small + inline_large + pooled_small + pooled_large:
+        assert r.status_code == 200 and r.json()["skills"]
+
+    large_parse = min(t for _, t in pooled_large)
+    inline_p95 = p95(t for _, t in inline_small)
+    pooled_p95 = p95(t for _, t in pooled_small)
+    # Inline, small uploads wait out whole large parses on the event loop; pooled, they
+    # only share the CPU with the one large parse running in the large lane
+    assert inline_p95 > 0.5 * large_parse
+    assert pooled_p95 < inline_p95 / 3, (pooled_p95, inline_p95)
+
+
+def test_a_full_lane_answers_503_with_retry_after(monkeypatch):
+    main.current_corpus()
+    policy = ExecutionPolicy("parse", "thread", workers=1, queue=0, large_workers=1, retry_after=2)
+    monkeypatch.setattr(main, "parse_policy", policy)
+    monkeypatch.setattr(main, "PARSE_LARGE_UPLOAD_BYTES", 64 * 1024)
+    try:
+        smalls, larges = asyncio.run(mixed_uploads(n_large=2, n_small=1))
+    finally:
+        policy.shutdown()
+
+    # One large upload runs, the second finds the large lane full; small uploads have their own
+    assert sorted(r.status_code for r, _ in larges) == [200, 503]
+    rejected = next(r for r, _ in larges if r.status_code == 503)
+    assert rejected.headers["retry-after"] == "2" and "saturated" in rejected.json()["detail"]
+    assert smalls[0][0].status_code == 200
+    stats = policy.stats()
+    assert stats["large"]["rejected"] == 1 and stats["large"]["in_flight"] == 0
+    assert stats["small"]["completed"] == 1
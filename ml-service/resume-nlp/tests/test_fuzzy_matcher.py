@@ -0,0 +1,100 @@
+"""Fuzzy skill pass: variants, claimed spans, and the candidate index against a full scan."""
+import os
+import random
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+pytest.importorskip("rapidfuzz")
+from rapidfuzz import fuzz, process  # noqa: E402
+
+import main  # noqa: E402
+from corpus_snapshot import CorpusStore  # noqa: E402
+from fuzzy_matcher import FuzzySkillIndex, compact  # noqa: E402
+
+CORPUS = main.read_corpus(main.DEFAULT_CORPUS_FULL)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FuzzySkillIndex(CORPUS)
+
+
+def names(hits):
+    return [(skill, matched) for _, skill, matched, _ in hits]
+
+
+def test_spelling_variants_and_ocr_damage(index):
+    text = "Reactjs, Node JS, Postgre SQL and Tensorfiow\nKuberentes on AWS"
+    assert names(index.match(text)) == [
+        ("React", "Reactjs"),
+        ("Node.js", "Node JS"),
+        ("PostgreSQL", "Postgre SQL"),
+        ("TensorFlow", "Tensorfiow"),
+        ("Kubernetes", "Kuberentes"),
+    ]
+
+
+def test_claimed_tokens_only_count_inside_longer_runs(index):
+    text = "Python, Postgre SQL, React Nativ"
+    claimed = []
+    main.current_corpus().matcher.match(text, 0, claimed)
+    assert names(index.match(text, 0, claimed)) == [
+        ("PostgreSQL", "Postgre SQL"),
+        ("React Native", "React Nativ"),
+    ]
+
+
+def test_runs_stop_at_line_breaks_and_punctuation(index):
+    assert names(index.match("Node\nJS, Postgre, SQL")) == []
+
+
+def test_everyday_words_do_not_match(index):
+    assert index.match("OBJECTIVE: testing and design of 2024 systems") == []
+    assert FuzzySkillIndex(CORPUS, ignore=()).lookup("testing") is not None
+
+
+@pytest.mark.parametrize("cutoff", [70.0, 90.0])
+def test_candidate_index_agrees_with_a_full_scan(cutoff):
+    index = FuzzySkillIndex(CORPUS, cutoff=cutoff, ignore=())
+    keys = index._keys
+    rng = random.Random(3)
+    queries = []
+    for key in rng.sample(keys, 150):
+        chars = list(key)
+        for _ in range(rng.randint(1, 2)):
+            at = rng.randrange(len(chars))
+            op = rng.random()
+            if op < 0.4:
+                chars[at] = rng.choice("abcdefghijklmnopqrstuvwxyz0")
+            elif op < 0.7:
+                del chars[at]
+            else:
+                chars.insert(at, rng.choice("aeiou"))
+        queries.append("".join(chars))
+    for query in queries:
+        if len(query) < index.min_length or index.exact(query):
+            continue
+        full = process.extractOne(query, keys, scorer=fuzz.ratio, score_cutoff=cutoff)
+        got = index.lookup(query)
+        assert (got and got[1]) == (full and full[1]), query
+
+
+def test_parse_text_merges_fuzzy_hits_in_resume_order():
+    store = CorpusStore(main.SHORT_SKILL_WHITELIST, lambda corpus: FuzzySkillIndex(corpus))
+    snapshot = store.publish(CORPUS, "test")
+    result = main.parse_text("SKILLS\nDocker, Reactjs, Python\nKubemetes, Kuberentes\n", snapshot)
+    assert result["skills"] == ["Docker", "React", "Python", "Kubernetes"]
+    assert result["fuzzy_skills"] == [
+        {"skill": "React", "text": "Reactjs", "score": 100.0},
+        {"skill": "Kubernetes", "text": "Kuberentes", "score": 90.0},
+    ]
+    assert "fuzzy_skills" not in main.parse_text("SKILLS\nReactjs\n", snapshot._replace(fuzzy=None))
+
+
+def test_compact_keys():
+    assert compact("Node.js") == compact("Node JS") == compact("NODEJS") == "nodejs"
+    assert compact("C++") == "c++" and compact("C#") == "c#"
@@ -0,0 +1,51 @@
+"""Golden-file regression suite for resume parsing.
+
+Each tests/golden/<name>.txt resume has a <name>.json holding the exact
+parse_text output (skills and projects). Refactors of the parser must keep
+these byte-for-byte; regenerate deliberately with
+
+    python tests/test_golden.py --update
+"""
+import glob
+import json
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(SERVICE_DIR, "tests", "golden")
+sys.path.insert(0, SERVICE_DIR)
+
+import main  # noqa: E402
+
+CASES = sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.txt")))
+
+
+def read_resume(path: str) -> str:
+    # Bytes in, so \r\n fixtures reach the parser untouched
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+def expected_path(path: str) -> str:
+    return path[:-len(".txt")] + ".json"
+
+
+@pytest.mark.parametrize("path", CASES, ids=[os.path.basename(p) for p in CASES])
+def test_parse_text_matches_golden(path):
+    with open(expected_path(path), "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    assert main.parse_text(read_resume(path)) == expected
+
+
+def test_golden_suite_present():
+    assert len(CASES) >= 10
+
+
+if __name__ == "__main__" and "--update" in sys.argv:
+    for path in CASES:
+        with open(expected_path(path), "w", encoding="utf-8") as f:
+            json.dump(main.parse_text(read_resume(path)), f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print("updated", os.path.basename(expected_path(path)))
@@ -0,0 +1,87 @@
+"""Page-level OCR pipeline: preprocessing, page order, timeouts and PDF splicing.
+
+Tesseract itself is not needed: the pipeline takes the per-page OCR function
+as a parameter and these tests hand it one that reports what it was given.
+"""
+import io
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+import main  # noqa: E402
+from ocr_pipeline import OcrPipeline, PageImage, prepare, skew_angle  # noqa: E402
+
+
+def describe_page(page: PageImage, lang, config, timeout, deskew_pages) -> str:
+    if page.index == 1 and timeout < 1:
+        raise RuntimeError("Tesseract process timeout")
+    return f"page {page.index} {page.mode} {max(page.size)}"
+
+
+def text_like_page(width=1000, height=1300, lines=25):
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for n in range(lines):
+        y = 80 + n * 45
+        x = 80
+        for word in range(8):
+            w = 40 + (n * 7 + word * 13) % 60
+            draw.rectangle([x, y, x + w, y + 14], fill=0)
+            x += w + 18
+    return img
+
+
+def scanned_pdf(pages) -> bytes:
+    buf = io.BytesIO()
+    pages[0].save(buf, "PDF", save_all=True, append_images=pages[1:], resolution=150)
+    return buf.getvalue()
+
+
+def test_prepare_grayscales_and_caps_longest_side():
+    img = prepare(Image.new("RGB", (3000, 1500), "white"), 1200)
+    assert img.mode == "L" and img.size == (1200, 600)
+    assert prepare(Image.new("L", (500, 400)), 1200).size == (500, 400)
+
+
+def test_skew_angle_undoes_rotation():
+    skewed = text_like_page().rotate(3, expand=True, fillcolor=255)
+    assert abs(skew_angle(skewed) + 3) <= 0.5
+    assert skew_angle(text_like_page()) == 0
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_run_keeps_page_order_and_reports_timeouts(workers):
+    pipeline = OcrPipeline(workers=workers, page_timeout=0.5, max_side=400, page_fn=describe_page)
+    pages = [pipeline._page(i, text_like_page()) for i in range(4)]
+    try:
+        texts, meta = pipeline.run(pages)
+    finally:
+        pipeline.shutdown()
+    assert texts == ["page 0 L 400", "", "page 2 L 400", "page 3 L 400"]
+    assert meta["ocr_pages"] == 4 and meta["ocr_timeouts"] == [1] and meta["ocr_errors"] == 0
+    assert meta["ocr_workers"] == min(workers, 4)
+
+
+def test_rasterize_pdf_renders_requested_pages():
+    pipeline = OcrPipeline(workers=1, max_side=500)
+    data = scanned_pdf([text_like_page(), text_like_page(), text_like_page()])
+    pages = pipeline.rasterize_pdf(io.BytesIO(data), [0, 2, 7], max_pages=30)
+    assert [p.index for p in pages] == [0, 2]
+    assert all(p.mode == "L" and max(p.size) <= 500 for p in pages)
+    assert [p.index for p in pipeline._embedded_pdf_images(io.BytesIO(data), None, max_pages=2)] == [0, 1]
+
+
+def test_scanned_pdf_goes_through_ocr_in_page_order(monkeypatch):
+    monkeypatch.setattr(main.ocr, "page_fn", describe_page)
+    monkeypatch.setattr(main.ocr, "max_side", 300)
+    text, meta = main.extract_pdf(scanned_pdf([text_like_page(), text_like_page()]), mode="pypdf")
+    assert text.splitlines() == ["page 0 L 300", "page 1 L 300"]
+    assert meta["extractor"] == "ocr" and "ocr" in meta["extractors_run"]
+    assert meta["ocr_pages"] == 2
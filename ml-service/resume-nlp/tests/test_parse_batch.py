@@ -0,0 +1,126 @@
+"""/parse-batch: input order, zip expansion, per-file errors and admission to the parse policy's large lane."""
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from executor_policy import ExecutionPolicy  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    policy = ExecutionPolicy("parse", "thread", workers=1, queue=0, large_workers=2)
+    monkeypatch.setattr(main, "parse_policy", policy)
+    # Every file is parsed, not answered from results of earlier tests
+    monkeypatch.setattr(main, "parse_cache", ParseCache(max_bytes=0))
+    yield TestClient(main.app)
+    policy.shutdown()
+
+
+def resume(*skills: str) -> bytes:
+    return ("Skills\n" + ", ".join(skills) + "\n").encode()
+
+
+def archive(members) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_results_follow_input_order_with_zip_members_in_place(client):
+    zipped = archive([
+        ("batch/c.txt", resume("Docker")),
+        ("__MACOSX/batch/._c.txt", b"\x00\x05"),
+        ("batch/.hidden.txt", resume("Rust")),
+        ("batch/d.txt", resume("Kubernetes")),
+    ])
+    files = [
+        ("files", ("a.txt", resume("Python"), "text/plain")),
+        ("files", ("b.zip", zipped, "application/zip")),
+        ("files", ("e.txt", resume("SQL"), "text/plain")),
+    ]
+    body = client.post("/parse-batch", files=files).json()
+    assert body["count"] == 4 and body["failed"] == 0
+    assert [r["filename"] for r in body["results"]] == ["a.txt", "batch/c.txt", "batch/d.txt", "e.txt"]
+    assert [r["skills"] for r in body["results"]] == [["Python"], ["Docker"], ["Kubernetes"], ["SQL"]]
+
+
+def test_a_failing_file_carries_an_error_and_the_rest_still_parse(client, monkeypatch):
+    parse_document = main.parse_document
+
+    def fail_on_boom(filename, data, snapshot=None):
+        if filename == "boom.txt":
+            raise RuntimeError("parser crashed")
+        return parse_document(filename, data, snapshot)
+
+    monkeypatch.setattr(main, "parse_document", fail_on_boom)
+    monkeypatch.setattr(main, "PARSE_MAX_FILE_BYTES", 1024)
+    files = [
+        ("files", ("boom.txt", resume("Go"), "text/plain")),
+        ("files", ("ok.txt", resume("Python"), "text/plain")),
+        ("files", ("huge.txt", resume("Java") * 100, "text/plain")),
+        ("files", ("notazip.zip", b"PK but not really", "application/zip")),
+        ("files", ("big-member.zip", archive([("m.txt", b"x" * 2048)]), "application/zip")),
+    ]
+    body = client.post("/parse-batch", files=files).json()
+    results = body["results"]
+    assert body["count"] == 5 and body["failed"] == 4
+    assert [r["filename"] for r in results] == ["boom.txt", "ok.txt", "huge.txt", "notazip.zip", "m.txt"]
+    assert results[0]["error"] == "RuntimeError: parser crashed" and "skills" not in results[0]
+    assert results[1]["skills"] == ["Python"] and "error" not in results[1]
+    assert "1024" in results[2]["error"] and results[3]["error"].startswith("BadZipFile")
+    assert results[4]["error"] == "file exceeds 1024 bytes"
+
+    # An unreadable document is not an error, just an empty result
+    broken = client.post("/parse-batch", files=[("files", ("broken.docx", b"not a docx", "application/octet-stream"))])
+    assert broken.json()["failed"] == 0 and broken.json()["results"][0]["skills"] == []
+
+
+def test_a_batch_waits_its_turn_in_the_large_lane_or_gets_503(client):
+    policy = main.parse_policy
+    files = [("files", ("a.txt", resume("Python"), "text/plain"))]
+    held = [policy.admit(large=True), policy.admit(large=True)]
+    try:
+        rejected = client.post("/parse-batch", files=files)
+        assert rejected.status_code == 503 and rejected.headers["retry-after"] == "1"
+        # Single uploads have their own lane
+        assert client.post("/parse", files={"file": ("s.txt", resume("Go"), "text/plain")}).status_code == 200
+    finally:
+        for admission in held:
+            admission.release()
+    assert client.post("/parse-batch", files=files).json()["results"][0]["skills"] == ["Python"]
+    assert policy.stats()["large"]["rejected"] == 1 and policy.stats()["large"]["in_flight"] == 0
+
+
+def test_a_corpus_reload_mid_batch_neither_changes_nor_caches_its_results(client, monkeypatch, tmp_path):
+    corpus = tmp_path / "skills.txt"
+    corpus.write_text("python\n", encoding="utf-8")
+    monkeypatch.setattr(main, "parse_cache", ParseCache(max_bytes=1 << 20))
+    monkeypatch.setattr(main, "corpus_store", main.CorpusStore(main.SHORT_SKILL_WHITELIST))
+    main.install_corpus(str(corpus))
+    parse_document = main.parse_document
+
+    def reload_first(filename, data, snapshot=None):
+        # The reload lands after the batch took its snapshot and keys
+        corpus.write_text("python\ndocker\n", encoding="utf-8")
+        main.install_corpus(str(corpus))
+        monkeypatch.setattr(main, "parse_document", parse_document)
+        return parse_document(filename, data, snapshot)
+
+    monkeypatch.setattr(main, "parse_document", reload_first)
+    files = [("files", ("a.txt", resume("Python", "Docker"), "text/plain"))]
+    assert client.post("/parse-batch", files=files).json()["results"][0]["skills"] == ["Python"]
+    again = client.post("/parse-batch", files=files).json()["results"][0]
+    assert again["skills"] == ["Python", "Docker"] and "cache" not in again["meta"]
+    assert main.parse_cache.stats()["hits"] == 0
@@ -0,0 +1,108 @@
+"""Parse result cache: LRU by size, the SQLite tier, degraded results, corpus versioning and counters."""
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from parse_cache import ParseCache, make_key  # noqa: E402
+
+
+def result(skill: str, **meta) -> dict:
+    return {"skills": [skill], "projects": [], "meta": {"extractor": "text", **meta}}
+
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    one = len(b'{"skills":["a"],"projects":[],"meta":{"extractor":"text"}}')
+    cache = ParseCache(max_bytes=2 * one)
+    cache.put("a", result("a"))
+    cache.put("b", result("b"))
+    assert cache.get("a")["skills"] == ["a"]  # a is now the most recent
+    cache.put("c", result("c"))
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * one, 1)
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (3, 1, 0.75)
+    # Larger than the whole budget: not stored, nothing evicted for it
+    cache.put("huge", result("x" * 10 * one))
+    assert cache.get("huge") is None and cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_survives_restarts_and_is_trimmed(tmp_path):
+    path = str(tmp_path / "cache" / "parse.sqlite")
+    first = ParseCache(max_bytes=0, disk_path=path, disk_max_entries=10)
+    first.put("k", result("Python"))
+    hit = ParseCache(max_bytes=1 << 20, disk_path=path).get("k")
+    assert hit["skills"] == ["Python"] and hit["meta"]["cache"] == "disk"
+
+    restarted = ParseCache(max_bytes=1 << 20, disk_path=path, disk_max_entries=10)
+    assert restarted.get("k")["meta"]["cache"] == "disk"
+    assert restarted.get("k")["meta"]["cache"] == "memory"  # promoted on the first disk hit
+    assert restarted.stats()["disk_hits"] == 1 and restarted.stats()["hits"] == 2
+    # Trimmed to the row limit every 256 writes, oldest access first
+    for i in range(257):
+        restarted.put(f"n{i}", result(str(i)))
+    rows = restarted._db.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+    assert rows == 10 and restarted.stats()["disk_evictions"] > 0
+
+
+def test_degraded_results_are_not_cached(tmp_path):
+    cache = ParseCache(max_bytes=1 << 20, disk_path=str(tmp_path / "parse.sqlite"))
+    cache.put("cut", result("Python", truncated=True))
+    cache.put("ocr-timeout", result("Python", ocr_pages=3, ocr_timeouts=1, ocr_errors=0))
+    cache.put("ocr-error", result("Python", ocr_pages=1, ocr_timeouts=0, ocr_errors=1))
+    cache.put("ok", result("Python", truncated=False, ocr_pages=2, ocr_timeouts=0, ocr_errors=0))
+    assert [cache.get(k) is not None for k in ("cut", "ocr-timeout", "ocr-error", "ok")] == [False, False, False, True]
+    assert cache._db.execute("SELECT key FROM parse_cache").fetchall() == [("ok",)]
+    assert cache.stats()["skipped_degraded"] == 3
+
+
+def test_keys_change_with_content_extension_corpus_and_extraction_settings(monkeypatch):
+    snapshot = main.current_corpus()
+    key = main.cache_key("d1", "CV.PDF", snapshot)
+    assert key == main.cache_key("d1", "cv.pdf", snapshot) and key.startswith("d1:.pdf:" + snapshot.digest)
+    assert len({key, main.cache_key("d2", "cv.pdf", snapshot), main.cache_key("d1", "cv.docx", snapshot),
+                make_key("d1", ".pdf", "other-corpus")}) == 4
+
+    # PDF and image keys follow the extraction settings; text and DOCX keys do not
+    txt = main.cache_key("d1", "cv.txt", snapshot)
+    changed = []
+    for name, value in (("PDF_MAX_PAGES", 5), ("PDF_TIMEOUT_SECONDS", 1.0), ("PDF_OCR_ENABLED", False)):
+        with monkeypatch.context() as m:
+            m.setattr(main, name, value)
+            changed.append(main.cache_key("d1", "cv.pdf", snapshot))
+            assert main.cache_key("d1", "cv.txt", snapshot) == txt
+    with monkeypatch.context() as m:
+        m.setenv("PDF_EXTRACTOR", "pdfminer")
+        changed.append(main.cache_key("d1", "cv.pdf", snapshot))
+    with monkeypatch.context() as m:
+        # Installing (or losing) OCR
+        m.setattr(main.components, "available", lambda name: name != "ocr")
+        changed.append(main.cache_key("d1", "cv.pdf", snapshot))
+        changed.append(main.cache_key("d1", "scan.png", snapshot))
+    assert len({key, main.cache_key("d1", "scan.png", snapshot), *changed}) == 8
+
+
+def test_parse_misses_after_a_corpus_reload(tmp_path, monkeypatch):
+    corpus = tmp_path / "skills.txt"
+    corpus.write_text("python\n", encoding="utf-8")
+    monkeypatch.setattr(main, "parse_cache", ParseCache(max_bytes=1 << 20))
+    monkeypatch.setattr(main, "corpus_store", main.CorpusStore(main.SHORT_SKILL_WHITELIST))
+    main.install_corpus(str(corpus))
+    client = TestClient(main.app)
+    upload = {"file": ("cv.txt", b"Skills\nPython, Docker\n", "text/plain")}
+
+    first = client.post("/parse", files=upload).json()
+    again = client.post("/parse", files=upload).json()
+    assert first["skills"] == ["Python"] and "cache" not in first["meta"]
+    assert again["skills"] == ["Python"] and again["meta"]["cache"] == "memory"
+
+    corpus.write_text("python\ndocker\n", encoding="utf-8")
+    main.install_corpus(str(corpus))
+    reloaded = client.post("/parse", files=upload).json()
+    assert reloaded["skills"] == ["Python", "Docker"] and "cache" not in reloaded["meta"]
+    stats = client.get("/diagnostics").json()["parse_cache"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
@@ -0,0 +1,63 @@
+"""Adaptive PDF extraction: when pdfminer is consulted, the page cap, the soft deadline and meta."""
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.join(SERVICE_DIR, "..", "..", "benchmarks"))
+
+import main  # noqa: E402
+from synth import text_pdf  # noqa: E402
+
+# Enough 'u's that the glyph-dropout check passes, and none at all
+HEALTHY = ["Summary", "Built numerous useful tools in Python, Docker and Kubernetes for our users."]
+NO_U = ["Skills", "Python, Docker, Kotlin, Java and SQL for data pipelines with the web team."]
+
+
+@pytest.fixture(autouse=True)
+def no_ocr(monkeypatch):
+    monkeypatch.setattr(main, "PDF_OCR_ENABLED", False)
+
+
+def test_adaptive_keeps_pypdf_when_the_sample_looks_healthy():
+    text, meta = main.extract_pdf(text_pdf(HEALTHY * 3, lines_per_page=2), "adaptive")
+    assert "Kubernetes" in text
+    assert meta["extractor"] == "pypdf" and meta["extractors_run"] == ["pypdf"]
+    assert meta["truncated"] is False and meta["extract_ms"] >= 0
+
+
+def test_adaptive_asks_pdfminer_when_glyphs_look_dropped():
+    text, meta = main.extract_pdf(text_pdf(NO_U * 2, lines_per_page=2), "adaptive")
+    assert meta["extractors_run"] == ["pypdf", "pdfminer"]
+    assert meta["extractor"] in ("pypdf", "pdfminer") and "Kotlin" in text
+
+
+def test_adaptive_samples_only_the_first_pages(monkeypatch):
+    # Page 1 is healthy; later pages without 'u' are outside the sample
+    monkeypatch.setattr(main, "PDF_SAMPLE_PAGES", 1)
+    _, meta = main.extract_pdf(text_pdf(HEALTHY + NO_U * 4, lines_per_page=2), "adaptive")
+    assert meta["extractors_run"] == ["pypdf"]
+    monkeypatch.setattr(main, "PDF_SAMPLE_PAGES", 0)
+    _, meta = main.extract_pdf(text_pdf(HEALTHY + NO_U * 100, lines_per_page=50), "adaptive")
+    assert meta["extractors_run"] == ["pypdf", "pdfminer"]
+
+
+def test_page_cap_and_deadline_mark_the_result_truncated(monkeypatch):
+    pdf = text_pdf([f"Page {i} lists Python" for i in range(5)], lines_per_page=1)
+    monkeypatch.setattr(main, "PDF_MAX_PAGES", 2)
+    text, meta = main.extract_pdf(pdf, "pypdf")
+    assert meta["truncated"] is True and "Page 1" in text and "Page 2" not in text
+
+    # A deadline already passed stops before the first page, and adaptive mode does not fall back
+    monkeypatch.setattr(main, "PDF_MAX_PAGES", 30)
+    monkeypatch.setattr(main, "PDF_TIMEOUT_SECONDS", 0.0)
+    text, meta = main.extract_pdf(pdf, "adaptive")
+    assert text == "" and meta == {**meta, "extractor": "none", "extractors_run": ["pypdf"], "truncated": True}
+
+
+def test_parse_reports_extraction_meta():
+    result = main.parse_document("resume.pdf", text_pdf(HEALTHY))
+    assert result["skills"] == ["Python", "Docker", "Kubernetes"]
+    assert set(result["meta"]) >= {"extractor", "extractors_run", "extract_ms", "truncated"}
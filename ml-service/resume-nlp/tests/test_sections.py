@@ -0,0 +1,51 @@
+"""SectionMap produced by ResumeSectionParser.segment."""
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from section_parser import ResumeSectionParser  # noqa: E402
+
+parser = ResumeSectionParser()
+
+RESUME = (
+    "Jane Doe\r\n"
+    "SUMMARY\r\n"
+    "Backend developer.\r\n"
+    "Technical Skills\r\n"
+    "Python, Machine\r\n   Learning\r\n"
+    "Project Work\r\n"
+    "Realtime Chat Application - websocket chat with presence\r\n"
+    "EDUCATION\r\n"
+    "B.Tech, 2024\r\n"
+)
+
+
+def test_sections_in_document_order_with_spans():
+    sections = parser.segment(RESUME)
+    assert [(s.name, s.heading, s.end) for s in sections.sections] == [
+        ("summary", 1, 3),
+        ("skills", 3, 6),
+        ("projects", 6, 8),
+        ("education", 8, 9),
+        ("education", 9, 10),
+    ]
+    skills = sections.find("skills")
+    start, end = sections.span(skills)
+    assert RESUME[start:end] == "Technical Skills\r\nPython, Machine\r\n   Learning\r\n"
+    assert sections.body(sections.find("projects")) == ["Realtime Chat Application - websocket chat with presence"]
+
+
+def test_skills_from_points_at_first_mention():
+    sections = parser.segment(RESUME)
+    assert RESUME[sections.skills_from:].startswith("Skills\r\n")
+    assert parser.segment("no such heading here").skills_from == 0
+
+
+def test_projects_fallback_heading_opens_section():
+    sections = parser.segment(RESUME)
+    assert sections.projects == 6
+    assert parser.extract_projects(RESUME, sections) == [
+        {"title": "Realtime Chat Application", "description": "websocket chat with presence"}
+    ]
@@ -0,0 +1,86 @@
+"""Alias table: variants resolve to one canonical id inside the single-pass matcher."""
+import os
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from corpus_snapshot import CorpusStore, corpus_digest  # noqa: E402
+from mmap_snapshot import SnapshotChannel  # noqa: E402
+from skill_matcher import SkillMatcher  # noqa: E402
+
+CORPUS = ["Python", "JavaScript", "Node.js", "Docker"]
+ALIASES = {"JavaScript": ("JS", "ECMAScript"), "Kubernetes": ("K8s",), "Node.js": ("NodeJS",)}
+
+
+def test_variants_share_the_canonical_id():
+    matcher = SkillMatcher(CORPUS, aliases=ALIASES)
+    assert matcher.canonical == ["Python", "JavaScript", "Node.js", "Docker", "Kubernetes"]
+    found = matcher.match_ids("JS, Javascript, ECMAScript and K8s on docker")
+    assert found == [(0, "JS", 1), (4, "Javascript", 1), (16, "ECMAScript", 1), (31, "K8s", 4), (38, "docker", 3)]
+    assert [matcher.canonical_id(s) for s in ("js", "JAVASCRIPT", "k8s", "Go")] == [1, 1, 4, None]
+
+
+def test_variants_do_not_match_inside_dotted_names():
+    matcher = SkillMatcher(CORPUS, aliases=ALIASES)
+    assert matcher.match_ids("Node.js, NodeJS") == [(0, "Node.js", 2), (9, "NodeJS", 2)]
+
+
+def test_a_spelling_listed_twice_belongs_to_the_first_canonical():
+    matcher = SkillMatcher(["Go"], aliases={"Go": ("Golang",), "Golang Tools": ("golang",)})
+    assert matcher.canonical == ["Go", "Golang Tools"]
+    assert matcher.match_ids("golang") == [(0, "golang", 0)]
+
+
+def test_parse_text_reports_canonical_ids_in_first_mention_order():
+    store = CorpusStore(main.SHORT_SKILL_WHITELIST)
+    snapshot = store.publish(CORPUS, "test", aliases=ALIASES)
+    result = main.parse_text("SKILLS\nK8s, JS, Python, Javascript\n", snapshot)
+    # Alias-only variants reach the canonical fields, not skills
+    assert result["skills"] == ["Python", "Javascript"]
+    assert result["skill_ids"] == [4, 1, 0]
+    assert result["canonical_skills"] == ["Kubernetes", "JavaScript", "Python"]
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_skills_are_the_same_with_or_without_aliases(tmp_path, shared):
+    # shared: the matcher is read back from a snapshot file, as in multi-worker mode
+    channel = SnapshotChannel(str(tmp_path), "corpus") if shared else None
+    store = CorpusStore(main.SHORT_SKILL_WHITELIST, channel=channel)
+    corpus = CORPUS + ["Google Cloud", "SQL Server", "SQL"]
+    aliases = {**ALIASES, "Google Cloud": ("GCP", "Google Cloud Platform"), "SQL Server": ("MSSQL",)}
+    text = "Skills\nGCP, Google Cloud Platform, JS, NodeJS, Node.js, MSSQL, SQL Server, Javascript, K8s\n"
+    plain = main.parse_text(text, store.publish(corpus, "plain"))
+    aliased = main.parse_text(text, store.publish(corpus, "aliased", aliases=aliases))
+    assert aliased["skills"] == plain["skills"] == ["Google Cloud", "Node.js", "SQL Server", "SQL", "Javascript"]
+    assert aliased["canonical_skills"] == ["Google Cloud", "JavaScript", "Node.js", "SQL Server", "SQL", "Kubernetes"]
+    assert plain["canonical_skills"] == ["Google Cloud", "Node.js", "SQL Server", "SQL", "JavaScript"]
+    assert SkillMatcher(corpus, aliases=aliases).match_terms("JS or Javascript") == [(0, "JS", 1, False), (6, "Javascript", 1, True)]
+
+
+def test_digest_covers_aliases_only_when_present():
+    assert corpus_digest(CORPUS, {}) == corpus_digest(CORPUS)
+    assert corpus_digest(CORPUS, ALIASES) != corpus_digest(CORPUS)
+
+
+def test_read_aliases(tmp_path):
+    path = tmp_path / "aliases.txt"
+    path.write_text("# comment\nJavaScript = JS, ECMAScript\n\nC# = CSharp\nJavaScript = ES6\n", encoding="utf-8")
+    assert main.read_aliases(str(path)) == {"JavaScript": ("JS", "ECMAScript", "ES6"), "C#": ("CSharp",)}
+    assert main.read_aliases("") == {}
+    path.write_text("JavaScript JS\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        main.read_aliases(str(path))
+
+
+def test_vocabulary_endpoint_names_every_id():
+    snapshot = main.current_corpus()
+    with TestClient(main.app) as client:
+        body = client.get("/skills/vocabulary").json()
+    assert body["version"] == snapshot.digest
+    assert body["skills"][snapshot.matcher.canonical_id("ecmascript")] == "JavaScript"
@@ -0,0 +1,92 @@
+"""Upload spool: size limit, spill to disk, digest of the streamed bytes and what crosses a process boundary."""
+import asyncio
+import hashlib
+import io
+import mmap
+import os
+import pickle
+import sys
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from starlette.datastructures import UploadFile  # noqa: E402
+
+import main  # noqa: E402
+import upload_spool  # noqa: E402
+from executor_policy import ExecutionPolicy  # noqa: E402
+from upload_spool import UploadTooLarge, map_file, spool_upload  # noqa: E402
+
+DATA = b"".join(b"line %05d Python Docker\n" % i for i in range(400))  # ~10 KB
+
+
+def spool(data: bytes, max_bytes: int, memory_bytes: int, spool_dir: str, declared: bool = False):
+    upload = UploadFile(io.BytesIO(data), filename="cv.txt", size=len(data) if declared else None)
+    return asyncio.run(spool_upload(upload, max_bytes, memory_bytes, spool_dir))
+
+
+def test_small_uploads_stay_in_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_spool, "CHUNK_SIZE", 1000)
+    up = spool(DATA, max_bytes=1 << 20, memory_bytes=1 << 20, spool_dir=str(tmp_path))
+    assert up.path is None and os.listdir(tmp_path) == []
+    assert up.view() == DATA and up.source() == DATA and up.size == len(DATA)
+    assert up.sha256 == hashlib.sha256(DATA).hexdigest()
+    up.close()
+
+
+def test_large_uploads_spill_to_a_mapped_temp_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_spool, "CHUNK_SIZE", 1000)
+    up = spool(DATA, max_bytes=1 << 20, memory_bytes=4096, spool_dir=str(tmp_path))
+    assert up.path is not None and os.path.dirname(up.path) == str(tmp_path)
+    view = up.view()
+    assert isinstance(view, mmap.mmap) and view[:] == DATA
+    # The digest covers the bytes kept in memory before the spill and those written after it
+    assert up.sha256 == hashlib.sha256(DATA).hexdigest() and up.size == len(DATA)
+
+    # Only the path crosses a process boundary; the receiver maps the file itself
+    with pytest.raises(TypeError):
+        pickle.dumps(view)
+    source = pickle.loads(pickle.dumps(up.source()))
+    assert source == up.path and map_file(source)[:] == DATA
+    up.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_size_limit_is_enforced_while_streaming_and_leaves_nothing_behind(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_spool, "CHUNK_SIZE", 1000)
+    with pytest.raises(UploadTooLarge) as e:
+        spool(DATA, max_bytes=5000, memory_bytes=2000, spool_dir=str(tmp_path))
+    assert e.value.limit == 5000 and os.listdir(tmp_path) == []
+    # A declared size over the limit is refused before anything is read
+    with pytest.raises(UploadTooLarge):
+        spool(DATA, max_bytes=5000, memory_bytes=2000, spool_dir=str(tmp_path), declared=True)
+    # Exactly at the limit is accepted
+    spool(DATA, max_bytes=len(DATA), memory_bytes=2000, spool_dir=str(tmp_path)).close()
+
+
+def test_parse_answers_413_and_parses_spilled_uploads_like_small_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "parse_cache", main.ParseCache(max_bytes=0))
+    monkeypatch.setattr(main, "UPLOAD_SPOOL_DIR", str(tmp_path))
+    client = TestClient(main.app)
+    upload = {"file": ("cv.txt", DATA, "text/plain")}
+    in_memory = client.post("/parse", files=upload).json()
+
+    monkeypatch.setattr(main, "UPLOAD_SPOOL_MEMORY_BYTES", 1024)
+    assert client.post("/parse", files=upload).json()["skills"] == in_memory["skills"] == ["Python", "Docker"]
+    assert os.listdir(tmp_path) == []
+    # Process workers get the same result whichever way the upload was held
+    policy = ExecutionPolicy("parse", "process", workers=1)
+    monkeypatch.setattr(main, "parse_policy", policy)
+    try:
+        for memory_bytes in (1024, 1 << 20):
+            monkeypatch.setattr(main, "UPLOAD_SPOOL_MEMORY_BYTES", memory_bytes)
+            assert client.post("/parse", files=upload).json()["skills"] == ["Python", "Docker"]
+    finally:
+        policy.shutdown()
+
+    monkeypatch.setattr(main, "PARSE_MAX_FILE_BYTES", 4096)
+    too_large = client.post("/parse", files=upload)
+    assert too_large.status_code == 413 and "4096" in too_large.json()["detail"]
@@ -0,0 +1,180 @@
+"""Bounded, hashing spool for uploaded resumes.
+
+Uploads are read in chunks, hashed as they stream and kept in memory only
+while small; larger files go to a temp file (written off the event loop) and
+are handed to extractors as a read-only mmap instead of one big bytes copy.
+
+`view()` is for extractors in this process; its type depends on whether the
+upload spilled (bytes or mmap), and an mmap cannot be pickled. Anything sent
+to another process (a process-pool executor) takes `source()` instead: the
+bytes, or the temp file path that the receiver maps itself with `map_file`.
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 1024 * 1024
+
+# What extractors accept: raw bytes or a read-only mmap of a spooled file
+Blob = Union[bytes, mmap.mmap]
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit: int):
+        super().__init__(f"file exceeds {limit} bytes")
+        self.limit = limit
+
+
+class _MappedStream(io.RawIOBase):
+    """File-like view over an mmap (mmap itself lacks seekable() before 3.13)."""
+
+    def __init__(self, mm: mmap.mmap):
+        self._mm = mm
+        self._mm.seek(0)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def tell(self) -> int:
+        return self._mm.tell()
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        return self._mm.read(None if size is None or size < 0 else size)
+
+    def readinto(self, b) -> int:
+        chunk = self._mm.read(len(b))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def as_stream(data: Blob) -> BinaryIO:
+    """Seekable binary stream over a blob without copying an mmap."""
+    if isinstance(data, mmap.mmap):
+        return _MappedStream(data)  # type: ignore[return-value]
+    return BytesIO(data)
+
+
+def map_file(path: str) -> Blob:
+    """Read-only mmap of a spooled file (b"" for an empty file)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class SpooledUpload:
+    def __init__(self, filename: str, max_bytes: int, memory_bytes: int, spool_dir: Optional[str] = None):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self.spool_dir = spool_dir
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._buf = bytearray()
+        self._file = None
+        self._view: Optional[mmap.mmap] = None
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def path(self) -> Optional[str]:
+        """Temp file path once the upload spilled to disk, else None."""
+        return self._file.name if self._file is not None else None
+
+    def _check(self, n: int) -> None:
+        if self.size + n > self.max_bytes:
+            raise UploadTooLarge(self.max_bytes)
+
+    def _write_disk(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def _spill(self) -> None:
+        self._file = tempfile.NamedTemporaryFile(prefix="resume-", dir=self.spool_dir, delete=False)
+        self._file.write(self._buf)
+        self._buf = bytearray()
+
+    async def write(self, chunk: bytes) -> None:
+        self._check(len(chunk))
+        if self._file is None and len(self._buf) + len(chunk) <= self.memory_bytes:
+            self._hash.update(chunk)
+            self._buf += chunk
+        else:
+            if self._file is None:
+                await run_in_threadpool(self._spill)
+            await run_in_threadpool(self._write_disk, chunk)
+        self.size += len(chunk)
+
+    def finish(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            self._file.close()
+
+    def view(self) -> Blob:
+        """bytes for in-memory uploads, a read-only mmap for spooled ones. In-process only."""
+        if self._file is None:
+            return bytes(self._buf)
+        if self._view is None:
+            mapped = map_file(self._file.name)
+            if isinstance(mapped, bytes):
+                return mapped
+            self._view = mapped
+        return self._view
+
+    def source(self) -> Union[bytes, str]:
+        """Picklable handle for another process: the temp file path once spooled, else the bytes."""
+        return self._file.name if self._file is not None else bytes(self._buf)
+
+    def close(self) -> None:
+        if self._view is not None:
+            try:
+                self._view.close()
+            except BufferError:
+                # Still referenced by an extractor; the mapping goes away with it
+                pass
+            self._view = None
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._file.name)
+            except OSError:
+                pass
+            self._file = None
+        self._buf = bytearray()
+
+
+async def spool_upload(upload, max_bytes: int, memory_bytes: int, spool_dir: Optional[str] = None) -> SpooledUpload:
+    """Stream a Starlette UploadFile into a SpooledUpload, enforcing max_bytes as it goes.
+
+    Raises UploadTooLarge as soon as the limit is crossed; nothing is left on disk.
+    """
+    spool = SpooledUpload(upload.filename or "", max_bytes, memory_bytes, spool_dir)
+    # Starlette may already know the size; reject before reading anything
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    try:
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            await spool.write(chunk)
+        spool.finish()
+    except BaseException:
+        spool.close()
+        raise
+    return spool
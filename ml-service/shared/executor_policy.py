@@ -0,0 +1,219 @@
+"""Where a service runs its CPU-heavy stages, and how much of it may queue up.
+
+`ExecutionPolicy(name, mode, workers, queue, large_workers)` runs a function
+for a request:
+
+- inline: on the calling thread (the event loop for async endpoints); one
+  slow call delays every other request the process is serving
+- thread: on a private thread pool; the event loop keeps accepting and
+  answering requests, though pure-Python work still shares the GIL
+- process: on a private process pool; parallel on multiple cores, arguments
+  and results are pickled, and workers hold a copy of module state taken when
+  they start (`reset()` after reloading it)
+
+Calls flagged `large` (big uploads, big batches) run in a separate lane with
+its own `large_workers` pool, so a burst of large work queues behind itself
+and never occupies the workers that small requests need.
+
+Admission is bounded per lane: at most workers + queue calls may be running
+or waiting. The next one raises `Saturated` immediately instead of queueing
+without limit; `install(app)` answers it with 503 and a Retry-After header,
+so clients back off and load balancers try another replica while the
+requests already admitted finish in time. A call counts against its lane
+until the work itself finishes, even if the client has gone away.
+"""
+import asyncio
+import contextvars
+import functools
+import math
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+MODES = ("inline", "thread", "process")
+
+
+class Saturated(Exception):
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is saturated; retry in {retry_after:g}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, workers: int, queue: int):
+        self.workers = workers
+        self.queue = queue
+        self.executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.peak = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers, "queue": self.queue, "in_flight": self.in_flight, "peak": self.peak,
+            "completed": self.completed, "rejected": self.rejected,
+        }
+
+
+class Admission:
+    """One admitted call; `release()` (or leaving the with block) frees its place once."""
+
+    def __init__(self, policy: "ExecutionPolicy", lane: _Lane):
+        self.policy = policy
+        self.lane = lane
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.policy._leave(self.lane)
+
+    def __enter__(self) -> "Admission":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ExecutionPolicy:
+    """Bounded execution of blocking calls for one service; see the module docstring."""
+
+    def __init__(self, name: str, mode: str = "thread", workers: Optional[int] = None, queue: Optional[int] = None,
+                 large_workers: Optional[int] = None, retry_after: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"unknown execution mode {mode!r}; expected one of {', '.join(MODES)}")
+        workers = max(1, workers or os.cpu_count() or 1)
+        queue = 4 * workers if queue is None else max(0, queue)
+        self.name = name
+        self.mode = mode
+        self.retry_after = retry_after
+        self._lanes = {
+            False: _Lane(workers, queue),
+            True: _Lane(max(1, large_workers or workers // 2), queue),
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str, mode: str = "thread", **defaults: Any) -> "ExecutionPolicy":
+        """Policy configured by <prefix>_EXECUTOR (inline|thread|process), <prefix>_EXECUTOR_WORKERS,
+        <prefix>_EXECUTOR_QUEUE, <prefix>_LARGE_WORKERS and EXECUTOR_RETRY_AFTER_SECONDS."""
+
+        def number(key: str, default: Optional[int]) -> Optional[int]:
+            value = os.getenv(key, "")
+            return int(value) if value.strip() else default
+
+        return cls(
+            prefix.lower(),
+            mode=os.getenv(f"{prefix}_EXECUTOR", mode).strip().lower(),
+            workers=number(f"{prefix}_EXECUTOR_WORKERS", defaults.get("workers")),
+            queue=number(f"{prefix}_EXECUTOR_QUEUE", defaults.get("queue")),
+            large_workers=number(f"{prefix}_LARGE_WORKERS", defaults.get("large_workers")),
+            retry_after=float(os.getenv("EXECUTOR_RETRY_AFTER_SECONDS", "1")),
+        )
+
+    @property
+    def workers(self) -> int:
+        return self._lanes[False].workers
+
+    @property
+    def large_workers(self) -> int:
+        return self._lanes[True].workers
+
+    def admit(self, large: bool = False) -> Admission:
+        """Count one call against its lane until the admission is released, or raise Saturated.
+
+        For work that reaches the executor some other way: a micro-batch that
+        `call`s it once for many waiting requests, or a streamed response.
+        """
+        lane = self._lanes[bool(large)]
+        with self._lock:
+            if lane.in_flight >= lane.workers + lane.queue:
+                lane.rejected += 1
+                raise Saturated(self.name, self.retry_after)
+            lane.in_flight += 1
+            lane.peak = max(lane.peak, lane.in_flight)
+        return Admission(self, lane)
+
+    def _leave(self, lane: _Lane) -> None:
+        with self._lock:
+            lane.in_flight -= 1
+            lane.completed += 1
+
+    def _executor(self, lane: _Lane) -> Executor:
+        with self._lock:
+            if lane.executor is None:
+                if self.mode == "process":
+                    lane.executor = ProcessPoolExecutor(max_workers=lane.workers)
+                else:
+                    prefix = f"{self.name}-{'large' if lane is self._lanes[True] else 'exec'}"
+                    lane.executor = ThreadPoolExecutor(max_workers=lane.workers, thread_name_prefix=prefix)
+            return lane.executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any, large: bool = False) -> Any:
+        """Admit, then run fn(*args) as the mode says and return its result. Raises Saturated."""
+        admission = self.admit(large)
+        if self.mode == "inline":
+            with admission:
+                return fn(*args)
+        try:
+            future = self._submit(admission.lane, fn, args)
+        except BaseException:
+            admission.release()
+            raise
+        # Released when the work is done, not when the awaiting request is cancelled
+        future.add_done_callback(lambda _: admission.release())
+        return await asyncio.wrap_future(future)
+
+    async def call(self, fn: Callable[..., Any], *args: Any, large: bool = False) -> Any:
+        """Run fn(*args) like `run` but without admission; the caller holds `admit`."""
+        if self.mode == "inline":
+            return fn(*args)
+        return await asyncio.wrap_future(self._submit(self._lanes[bool(large)], fn, args))
+
+    def _submit(self, lane: _Lane, fn: Callable[..., Any], args: tuple):
+        if self.mode == "process":
+            return self._executor(lane).submit(fn, *args)
+        # Threads run in a copy of the request's context, like run_in_threadpool (Server-Timing stages)
+        return self._executor(lane).submit(functools.partial(contextvars.copy_context().run, fn, *args))
+
+    def reset(self) -> None:
+        """Retire the process pools so new workers start from the current module state."""
+        if self.mode != "process":
+            return
+        for lane in self._lanes.values():
+            with self._lock:
+                executor, lane.executor = lane.executor, None
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=False)
+
+    def shutdown(self) -> None:
+        for lane in self._lanes.values():
+            with self._lock:
+                executor, lane.executor = lane.executor, None
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "retry_after": self.retry_after,
+                "small": self._lanes[False].stats(),
+                "large": self._lanes[True].stats(),
+            }
+
+
+def install(app) -> None:
+    """Answer Saturated from any endpoint with 503 and Retry-After (whole seconds)."""
+    from fastapi.responses import JSONResponse
+
+    @app.exception_handler(Saturated)
+    async def saturated(request, exc: Saturated):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
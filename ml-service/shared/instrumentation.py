@@ -0,0 +1,227 @@
+"""Latency instrumentation shared by the ML services.
+
+`Metrics(service)` records, in Prometheus text format on GET /metrics:
+
+- http_requests_total{service,method,route,status}: counter
+- http_request_duration_seconds{service,method,route}: histogram
+- stage_duration_seconds{service,stage}: histogram for named stages timed
+  with `metrics.stage("skill_match")` (or `metrics.observe(stage, seconds)`)
+- any further histogram a service registers with `metrics.histogram(...)`
+
+With server_timing on, every response also carries a `Server-Timing` header
+listing the stages that ran while handling it plus the total (`app`). Stage
+timings reach the header through a context variable, which run_in_threadpool
+copies into worker threads.
+
+Disabled (METRICS_ENABLED=0), no middleware is installed, /metrics returns
+404 and `stage()` hands back one shared no-op context manager, so timed code
+pays a method call and nothing else.
+
+No third-party dependency: labels are tuples in dicts, one lock per family.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond matching up to multi-second OCR
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+# Stage timings of the request being handled: list of (stage, seconds), or None outside a request
+_request_stages: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        out.extend(f"{self.name}{_labels(self.labelnames, k)} {_num(v)}" for k, v in items)
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def snapshot(self, labels: tuple) -> Dict[str, Any]:
+        """One series as cumulative buckets, sum and count (all zero if never observed)."""
+        with self._lock:
+            series = list(self._series.get(labels) or [0] * (len(self.buckets) + 1) + [0.0])
+        buckets, running = {}, 0
+        for le, n in zip([*map(_num, self.buckets), "+Inf"], series[:-1]):
+            running += n
+            buckets[le] = running
+        return {"buckets": buckets, "sum": round(series[-1], 6), "count": running}
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            running = 0
+            for le, n in zip([*map(_num, self.buckets), "+Inf"], series[:-1]):
+                running += n
+                bucket = 'le="' + le + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bucket)} {running}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]!r}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return out
+
+
+class Metrics:
+    def __init__(self, service: str, enabled: bool = True, server_timing: bool = False,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.service = service
+        self.enabled = enabled
+        self.server_timing = enabled and server_timing
+        self.requests = Counter("http_requests_total", "HTTP requests handled", ("service", "method", "route", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("service", "method", "route"), buckets
+        )
+        self.stages = Histogram("stage_duration_seconds", "Time spent in a named processing stage", ("service", "stage"), buckets)
+        self._extra: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = ("service",),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """A histogram family rendered on /metrics next to the built-in ones; one per name."""
+        family = self._extra.get(name)
+        if family is None:
+            family = self._extra[name] = Histogram(name, help, labelnames, buckets)
+        return family
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self.stages.observe((self.service, stage), seconds)
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((stage, seconds))
+
+    def stage(self, name: str):
+        """Context manager timing one stage (no-op when disabled)."""
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self, name)
+
+    def render(self) -> str:
+        lines = self.requests.render() + self.latency.render() + self.stages.render()
+        for family in list(self._extra.values()):
+            lines += family.render()
+        return "\n".join(lines) + "\n"
+
+    def install(self, app) -> None:
+        """Add the timing middleware and GET /metrics to a FastAPI app."""
+        from fastapi.responses import PlainTextResponse
+
+        metrics = self
+
+        @app.get("/metrics", include_in_schema=False)
+        def prometheus_metrics():
+            if not metrics.enabled:
+                return PlainTextResponse("metrics disabled\n", status_code=404)
+            return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+        if self.enabled:
+            app.add_middleware(_TimingMiddleware, metrics=self)
+
+
+class _StageTimer:
+    # A plain class: @contextmanager's generator costs several times more per stage
+    __slots__ = ("metrics", "name", "t0")
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.t0)
+
+
+def server_timing_header(stages: Sequence[Tuple[str, float]], total: float) -> str:
+    parts = [f"{name};dur={seconds * 1000.0:.2f}" for name, seconds in stages]
+    parts.append(f"app;dur={total * 1000.0:.2f}")
+    return ", ".join(parts)
+
+
+class _TimingMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware), so streaming responses pass straight through."""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self.metrics
+        stages: List[Tuple[str, float]] = []
+        token = _request_stages.set(stages)
+        status = [500]
+        t0 = time.perf_counter()
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if metrics.server_timing:
+                    header = server_timing_header(stages, time.perf_counter() - t0)
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _request_stages.reset(token)
+            elapsed = time.perf_counter() - t0
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            if path != "/metrics":
+                method = scope.get("method", "")
+                metrics.latency.observe((metrics.service, method, path), elapsed)
+                metrics.requests.inc((metrics.service, method, path, str(status[0])))
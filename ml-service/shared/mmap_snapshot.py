@@ -0,0 +1,218 @@
+"""Read-only data published once and memory-mapped by every worker process.
+
+A snapshot file holds named sections: uint32 id arrays, raw buffers (NumPy
+arrays are stored with their dtype) and string tables, plus a small JSON
+`meta` dict. `load` maps the file and hands out views into the mapping, so N
+workers serving the same snapshot share one copy of its pages instead of
+holding N private copies. Layout (little-endian):
+
+    magic "MMSNAP01", uint32 toc_bytes, toc (JSON), sections (8-byte aligned)
+
+The table of contents maps each section name to [type, offset, bytes,
+count]; type is "I" (uint32), "str" (count + 1 uint32 offsets followed by
+the utf-8 text) or a NumPy dtype string.
+
+`SnapshotChannel` publishes snapshots for a group of processes through a
+directory: each publish writes a new file, then atomically replaces the
+small `<name>.current` pointer file naming it. A reader stats the pointer
+(one system call) to learn whether a newer snapshot exists, and switches to
+it between requests, so every request sees one whole snapshot, old or new.
+Superseded files are unlinked after `keep` newer ones; on POSIX a process
+still mapping one keeps its pages until it lets go.
+"""
+import contextlib
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from skill_vocab import IdArray, StringTable, _le, _view
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builders are not serialized, the last publish wins
+    fcntl = None
+
+_MAGIC = b"MMSNAP01"
+_HEADER = struct.Struct("<8sI")
+_ALIGN = 8
+
+
+def _section(value: Any) -> Tuple[str, int, bytes]:
+    """(type, count, little-endian bytes) of a section value."""
+    if isinstance(value, StringTable):
+        offsets = array("I", value.offsets)
+        return "str", len(offsets) - 1, _le(offsets) + bytes(value.blob)
+    if isinstance(value, (list, tuple)):
+        return _section(StringTable.pack(value))
+    if isinstance(value, array):
+        if value.typecode != "I":
+            raise TypeError(f"only uint32 arrays are stored, got array('{value.typecode}')")
+        return "I", len(value), _le(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "|u1", len(value), bytes(value)
+    if hasattr(value, "dtype") and hasattr(value, "tobytes"):
+        dtype = value.dtype.newbyteorder("<") if value.dtype.byteorder == ">" else value.dtype
+        return dtype.str, len(value), value.astype(dtype, copy=False).tobytes()
+    raise TypeError(f"cannot store {type(value).__name__} in a snapshot")
+
+
+def write(path: str, sections: Mapping[str, Any], meta: Optional[Dict[str, Any]] = None) -> int:
+    """Write sections (and meta) to path atomically; returns the file size."""
+    toc: Dict[str, list] = {}
+    parts = []
+    pos = 0
+    for name, value in sections.items():
+        kind, count, data = _section(value)
+        parts.append(data + bytes(-len(data) % _ALIGN))
+        toc[name] = [kind, pos, len(data), count]
+        pos += len(parts[-1])
+    head = json.dumps({"meta": meta or {}, "sections": toc}).encode("utf-8")
+    head += b" " * (-(len(head) + _HEADER.size) % _ALIGN)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(head)))
+        f.write(head)
+        for part in parts:
+            f.write(part)
+    os.replace(tmp, path)
+    return _HEADER.size + len(head) + pos
+
+
+class Snapshot:
+    """A mapped snapshot file; section accessors return views, not copies."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        buf = memoryview(self._mm)
+        if len(buf) < _HEADER.size:
+            raise ValueError(f"{path} is not a snapshot file")
+        magic, toc_bytes = _HEADER.unpack_from(buf)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a snapshot file")
+        head = json.loads(bytes(buf[_HEADER.size:_HEADER.size + toc_bytes]))
+        self.path = path
+        self.meta: Dict[str, Any] = head["meta"]
+        self._sections: Dict[str, list] = head["sections"]
+        self._data = buf[_HEADER.size + toc_bytes:]
+        last = max((off + size for _, off, size, _ in self._sections.values()), default=0)
+        if last > len(self._data):
+            raise ValueError(f"{path} is truncated")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._mm)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def _raw(self, name: str, kind: Optional[str] = None) -> Tuple[memoryview, list]:
+        entry = self._sections[name]
+        if kind is not None and (entry[0] == "str") != (kind == "str"):
+            raise TypeError(f"section {name!r} holds {entry[0]}, not {kind}")
+        return self._data[entry[1]:entry[1] + entry[2]], entry
+
+    def array(self, name: str) -> IdArray:
+        """A uint32 section as memoryview('I') (a copy on big-endian hosts)."""
+        buf, entry = self._raw(name)
+        if entry[0] != "I":
+            raise TypeError(f"section {name!r} holds {entry[0]}, not uint32")
+        return _view(buf, 0, entry[3])
+
+    def buffer(self, name: str) -> memoryview:
+        """Raw little-endian bytes of a section; with `dtype`, what np.frombuffer needs."""
+        return self._raw(name)[0]
+
+    def dtype(self, name: str) -> str:
+        return self._sections[name][0]
+
+    def strings(self, name: str) -> StringTable:
+        buf, entry = self._raw(name, "str")
+        n = entry[3]
+        return StringTable(_view(buf, 0, n + 1), buf[4 * (n + 1):])
+
+
+def load(path: str) -> Snapshot:
+    return Snapshot(path)
+
+
+class SnapshotChannel:
+    """Snapshots named `name` shared by the processes that use `directory`."""
+
+    def __init__(self, directory: str, name: str, keep: int = 2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.name = name
+        self.keep = keep
+        self.pointer = os.path.join(directory, f"{name}.current")
+        self._seen: Optional[Tuple[int, int, int]] = None
+
+    def _stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.pointer)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def changed(self) -> bool:
+        """True when the pointer differs from what current() last read (one stat)."""
+        return self._stamp() != self._seen
+
+    def current(self) -> Optional[Snapshot]:
+        """The published snapshot, or None if nothing was published yet."""
+        for _ in range(3):
+            stamp = self._stamp()
+            try:
+                with open(self.pointer, "r", encoding="utf-8") as f:
+                    filename = f.read().strip()
+                snapshot = load(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                if stamp is None:
+                    self._seen = None
+                    return None
+                # Pruned between reading the pointer and opening the file: a newer one is current
+                continue
+            self._seen = stamp
+            return snapshot
+        raise RuntimeError(f"{self.pointer} keeps changing; cannot load a snapshot")
+
+    def publish(self, sections: Mapping[str, Any], meta: Optional[Dict[str, Any]] = None) -> Snapshot:
+        """Write a new snapshot file, point the channel at it and return it mapped."""
+        filename = f"{self.name}.{time.time_ns()}-{os.getpid()}.snap"
+        path = os.path.join(self.directory, filename)
+        write(path, sections, meta)
+        tmp = f"{self.pointer}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(filename)
+        os.replace(tmp, self.pointer)
+        snapshot = load(path)
+        self._seen = self._stamp()
+        self._prune(filename)
+        return snapshot
+
+    def _prune(self, current: str) -> None:
+        prefix = f"{self.name}."
+        files = sorted(
+            f for f in os.listdir(self.directory) if f.startswith(prefix) and f.endswith(".snap") and f != current
+        )
+        for f in files[:max(0, len(files) - self.keep)]:
+            with contextlib.suppress(OSError):
+                os.unlink(os.path.join(self.directory, f))
+
+    @contextlib.contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold the channel's lock file, so only one process builds a snapshot at a time."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, f"{self.name}.lock"), "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
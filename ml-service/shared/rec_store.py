@@ -0,0 +1,263 @@
+"""Precomputed recommendations and placement predictions in the app database.
+
+The materialization jobs (`collaborative-filter/materialize.py`,
+`placement-predict/materialize.py`) read every student's latest resume in
+bulk, score whole batches in one vectorized call and write the results back
+here; `/recommendations` and `/predict-placement` then answer requests that
+carry a `student_id` from the store instead of recomputing. The ALS trainer
+(`collaborative-filter/train_als.py`) reads `student_job_interactions` through
+the same connection handling.
+
+Each stored row records `inputs_hash`, a digest of everything the result
+depends on (the service's model/catalog version plus the request's skills or
+feature row), and `computed_at`. A lookup only hits when the hash matches the
+request and the row is younger than the staleness bound, so an edited skill
+list or a reloaded catalog falls through to live scoring instead of serving
+an outdated answer.
+
+Works on SQLite (`sqlite:///path` or a bare path; resume skills stored as a
+JSON array) and on PostgreSQL (`postgresql://...`, needs psycopg2; skills as
+TEXT[]). Writes use executemany on SQLite and COPY on PostgreSQL.
+"""
+import csv
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+RECOMMENDATIONS_TABLE = "student_job_recommendations"
+PREDICTIONS_TABLE = "placement_predictions"
+
+_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {RECOMMENDATIONS_TABLE} (
+        student_id INTEGER NOT NULL,
+        scoring VARCHAR(16) NOT NULL,
+        rank INTEGER NOT NULL,
+        job_title VARCHAR(255) NOT NULL,
+        inputs_hash VARCHAR(32) NOT NULL,
+        computed_at DOUBLE PRECISION NOT NULL
+    )""",
+    f"CREATE INDEX IF NOT EXISTS {RECOMMENDATIONS_TABLE}_student ON {RECOMMENDATIONS_TABLE} (student_id, scoring)",
+]
+# init.sql creates placement_predictions without the store's columns
+_PREDICTION_COLUMNS = {"inputs_hash": "VARCHAR(32)", "computed_at": "DOUBLE PRECISION"}
+
+# Latest resume per student, with the student's model features
+_STUDENTS_SQL = """
+    SELECT r.student_id, r.skills, s.cgpa, s.department
+    FROM resumes r JOIN students s ON s.id = r.student_id
+    WHERE r.id IN (SELECT MAX(id) FROM resumes WHERE student_id IS NOT NULL GROUP BY student_id)
+    ORDER BY r.student_id
+"""
+
+_INTERACTIONS_SQL = """
+    SELECT i.student_id, j.title, i.score
+    FROM student_job_interactions i JOIN jobs j ON j.id = i.job_id
+    WHERE i.student_id IS NOT NULL AND j.title IS NOT NULL
+"""
+
+
+def inputs_hash(version: str, values: Any) -> str:
+    """Digest of a result's inputs: the scoring version plus the request values."""
+    raw = json.dumps([version, values], separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def parse_skills(value: Any) -> List[str]:
+    """resumes.skills as a list: TEXT[] from psycopg2, a JSON array from SQLite, or a comma list."""
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [s for s in value if isinstance(s, str)]
+    text = str(value).strip()
+    if text.startswith("["):
+        try:
+            return [s for s in json.loads(text) if isinstance(s, str)]
+        except ValueError:
+            pass
+    if text.startswith("{") and text.endswith("}"):
+        # PostgreSQL array literal read as text
+        text = text[1:-1]
+        return [s.strip().strip('"') for s in next(csv.reader([text])) if s.strip()] if text else []
+    return [s.strip() for s in text.split(",") if s.strip()]
+
+
+class RecStore:
+    def __init__(self, url: str):
+        self.url = url
+        self.postgres = url.startswith(("postgresql://", "postgres://"))
+        if self.postgres:
+            try:
+                import psycopg2
+            except ImportError as e:
+                raise RuntimeError("psycopg2 is required for a postgresql:// store URL") from e
+            self._conn = psycopg2.connect(url)
+            self._param = "%s"
+        else:
+            path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._param = "?"
+        self._lock = threading.Lock()
+        # Lookups run on threadpool workers; counted apart from the connection lock
+        self._counts_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.ensure_schema()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def ensure_schema(self) -> None:
+        with self._lock:
+            cur = self._conn.cursor()
+            for stmt in _SCHEMA:
+                cur.execute(stmt)
+            if self.postgres:
+                for name, kind in _PREDICTION_COLUMNS.items():
+                    cur.execute(f"ALTER TABLE IF EXISTS {PREDICTIONS_TABLE} ADD COLUMN IF NOT EXISTS {name} {kind}")
+            else:
+                cur.execute(
+                    f"CREATE TABLE IF NOT EXISTS {PREDICTIONS_TABLE} "
+                    "(id INTEGER PRIMARY KEY, student_id INTEGER, probability FLOAT)"
+                )
+                have = {row[1] for row in cur.execute(f"PRAGMA table_info({PREDICTIONS_TABLE})")}
+                for name, kind in _PREDICTION_COLUMNS.items():
+                    if name not in have:
+                        cur.execute(f"ALTER TABLE {PREDICTIONS_TABLE} ADD COLUMN {name} {kind}")
+            cur.execute(f"CREATE INDEX IF NOT EXISTS {PREDICTIONS_TABLE}_student ON {PREDICTIONS_TABLE} (student_id)")
+            self._conn.commit()
+
+    def iter_students(self, batch_size: int = 1024) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of {student_id, skills, cgpa, department}, read with one query."""
+        # A named cursor streams from the server; withhold keeps it open across the writers' commits
+        cur = self._conn.cursor("rec_store_students", withhold=True) if self.postgres else self._conn.cursor()
+        if self.postgres:
+            cur.itersize = batch_size
+        cur.execute(_STUDENTS_SQL)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [
+                    {"student_id": sid, "skills": parse_skills(skills), "cgpa": cgpa, "department": department}
+                    for sid, skills, cgpa, department in rows
+                ]
+        finally:
+            cur.close()
+            if self.postgres:
+                # The named cursor's transaction would otherwise stay open
+                self._conn.commit()
+
+    def iter_interactions(self, batch_size: int = 65536) -> Iterator[List[Tuple[int, str, Optional[float]]]]:
+        """Batches of (student_id, job title, score) from student_job_interactions."""
+        cur = self._conn.cursor("rec_store_interactions", withhold=True) if self.postgres else self._conn.cursor()
+        if self.postgres:
+            cur.itersize = batch_size
+        cur.execute(_INTERACTIONS_SQL)
+        try:
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield [tuple(row) for row in rows]
+        finally:
+            cur.close()
+            if self.postgres:
+                self._conn.commit()
+
+    def _replace(self, table: str, where: str, keys: Sequence[tuple], columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        """Delete the rows matching `where` for each key, then bulk insert rows, in one transaction."""
+        rows = list(rows)
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                cur.executemany(f"DELETE FROM {table} WHERE {where}", keys)
+                if self.postgres:
+                    buf = io.StringIO()
+                    csv.writer(buf).writerows(rows)
+                    buf.seek(0)
+                    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+                else:
+                    marks = ", ".join([self._param] * len(columns))
+                    cur.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", rows)
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return len(rows)
+
+    def write_recommendations(
+        self, scoring: str, results: Sequence[Tuple[int, str, Sequence[str]]], computed_at: Optional[float] = None,
+    ) -> int:
+        """Replace the stored ranking of each (student_id, inputs_hash, [job titles]) in results."""
+        at = time.time() if computed_at is None else computed_at
+        p = self._param
+        rows = (
+            (sid, scoring, rank, job, digest, at)
+            for sid, digest, jobs in results for rank, job in enumerate(jobs)
+        )
+        return self._replace(
+            RECOMMENDATIONS_TABLE, f"student_id = {p} AND scoring = {p}", [(sid, scoring) for sid, _, _ in results],
+            ("student_id", "scoring", "rank", "job_title", "inputs_hash", "computed_at"), rows,
+        )
+
+    def write_predictions(self, results: Sequence[Tuple[int, str, float]], computed_at: Optional[float] = None) -> int:
+        """Replace the stored prediction of each (student_id, inputs_hash, probability) in results."""
+        at = time.time() if computed_at is None else computed_at
+        return self._replace(
+            PREDICTIONS_TABLE, f"student_id = {self._param}", [(sid,) for sid, _, _ in results],
+            ("student_id", "probability", "inputs_hash", "computed_at"),
+            ((sid, prob, digest, at) for sid, digest, prob in results),
+        )
+
+    def _fetch(self, sql: str, args: tuple) -> List[tuple]:
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                cur.execute(sql, args)
+                return cur.fetchall()
+            finally:
+                cur.close()
+                if self.postgres:
+                    self._conn.rollback()
+
+    def _fresh(self, rows: List[tuple], digest: str, max_age: float) -> bool:
+        """rows are (inputs_hash, computed_at, ...); count the lookup as a hit, miss or stale."""
+        if not rows or any(r[0] != digest for r in rows):
+            with self._counts_lock:
+                self.misses += 1
+            return False
+        if max_age > 0 and time.time() - min(r[1] for r in rows) > max_age:
+            with self._counts_lock:
+                self.stale += 1
+            return False
+        with self._counts_lock:
+            self.hits += 1
+        return True
+
+    def recommendations(self, student_id: int, scoring: str, digest: str, max_age: float) -> Optional[List[str]]:
+        """Stored ranking (best first), or None when missing, computed from other inputs or too old."""
+        p = self._param
+        rows = self._fetch(
+            f"SELECT inputs_hash, computed_at, job_title FROM {RECOMMENDATIONS_TABLE} "
+            f"WHERE student_id = {p} AND scoring = {p} ORDER BY rank",
+            (student_id, scoring),
+        )
+        return [r[2] for r in rows] if self._fresh(rows, digest, max_age) else None
+
+    def prediction(self, student_id: int, digest: str, max_age: float) -> Optional[float]:
+        rows = self._fetch(
+            f"SELECT inputs_hash, computed_at, probability FROM {PREDICTIONS_TABLE} WHERE student_id = {self._param}",
+            (student_id,),
+        )
+        return float(rows[0][2]) if self._fresh(rows, digest, max_age) else None
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return {"backend": "postgresql" if self.postgres else "sqlite", "hits": self.hits, "misses": self.misses, "stale": self.stale}
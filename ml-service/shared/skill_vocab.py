@@ -0,0 +1,283 @@
+"""Interned skill vocabulary and compact skill sets shared by the ML services.
+
+`SkillVocab` maps skill names to dense integer ids (0..n-1) by their
+normalised form (stripped, lowercased), so a request's skills are normalised
+and hashed once and everything after that is integer work. A skill set is a
+sorted, de-duplicated `array('I')` of ids (4 bytes per skill). `TagSets`
+stores many of them back to back, CSR style: set k is
+ids[offsets[k]:offsets[k + 1]]. Inverting it gives the postings (skill id ->
+sorted set numbers) of an inverted index in the same layout.
+
+Overlap of two sets is a merge (`overlap`) or, for sets held as bitsets
+(`bitset`, a Python int with bit i set for id i), a `popcount` of their AND.
+`members` turns a bitset back into sorted ids.
+
+`save` writes a vocabulary, its tag sets and a table of labels (job names)
+into one little-endian binary file; `load` memory-maps it and views the id
+arrays and string tables in place, so only the name -> id dict is built in
+memory. Layout, all uint32 after the magic:
+
+    magic "SKVOCAB1", n_names, n_labels, n_sets, n_ids, names_bytes, labels_bytes
+    name offsets [n_names + 1], label offsets [n_labels + 1],
+    set offsets [n_sets + 1], ids [n_ids], names (utf-8), labels (utf-8)
+"""
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+_MAGIC = b"SKVOCAB1"
+_HEADER = struct.Struct("<8s6I")
+_LITTLE = sys.byteorder == "little"
+
+# The file format and memoryview.cast("I") both assume 4-byte unsigned ints
+assert array("I").itemsize == 4
+
+IdArray = Union[array, memoryview]
+
+
+def normalize(skill: str) -> str:
+    return skill.strip().lower()
+
+
+class SkillVocab:
+    """Skill name <-> dense id. `names` keeps the first spelling interned for each id."""
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, skill: str) -> Optional[int]:
+        return self._ids.get(normalize(skill))
+
+    def intern(self, skill: str) -> int:
+        key = normalize(skill)
+        sid = self._ids.get(key)
+        if sid is None:
+            sid = self._ids[key] = len(self.names)
+            self.names.append(skill.strip())
+        return sid
+
+    def encode(self, skills: Optional[Iterable[str]], intern: bool = False) -> array:
+        """Sorted, de-duplicated ids of skills. Non-strings and blanks are skipped;
+        unknown skills are dropped, or added to the vocabulary with intern=True."""
+        ids = set()
+        get = self._ids.get
+        for s in skills or ():
+            if not isinstance(s, str):
+                continue
+            key = s.strip().lower()
+            if not key:
+                continue
+            sid = get(key)
+            if sid is None:
+                if not intern:
+                    continue
+                sid = self.intern(s)
+            ids.add(sid)
+        return array("I", sorted(ids))
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        names = self.names
+        return [names[i] for i in ids]
+
+
+def overlap(a: Sequence[int], b: Sequence[int]) -> int:
+    """Size of the intersection of two sorted id sets, by merging them."""
+    if len(a) > len(b):
+        a, b = b, a
+    i = j = count = 0
+    na, nb = len(a), len(b)
+    while i < na and j < nb:
+        x, y = a[i], b[j]
+        if x == y:
+            count += 1
+            i += 1
+            j += 1
+        elif x < y:
+            i += 1
+        else:
+            j += 1
+    return count
+
+
+def bitset(ids: Sequence[int], size: Optional[int] = None) -> int:
+    """Bitset of ids; size (bits) defaults to max(ids) + 1."""
+    if size is None:
+        size = max(ids, default=-1) + 1
+    # Set bits in a buffer and convert once: OR-ing into an int copies it per id
+    buf = bytearray((size + 7) // 8)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def popcount(bits: int) -> int:
+    return bits.bit_count() if hasattr(bits, "bit_count") else bin(bits).count("1")
+
+
+def members(bits: int) -> List[int]:
+    """Sorted ids of the set bits."""
+    digits = bin(bits)
+    top = len(digits) - 1  # bit k is digits[top - k]
+    out: List[int] = []
+    i = digits.find("1", 2)
+    while i != -1:
+        out.append(top - i)
+        i = digits.find("1", i + 1)
+    out.reverse()
+    return out
+
+
+class TagSets:
+    """Many sorted id sets in two flat uint32 arrays; set k is ids[offsets[k]:offsets[k + 1]]."""
+
+    def __init__(self, offsets: IdArray, ids: IdArray):
+        self.offsets = offsets
+        self.ids = ids
+        # Slices of a memoryview are views, not copies
+        self._ids = ids if isinstance(ids, memoryview) else memoryview(ids)
+
+    @classmethod
+    def from_sets(cls, sets: Iterable[Sequence[int]]) -> "TagSets":
+        """Pack sets that are already sorted and de-duplicated (SkillVocab.encode output)."""
+        offsets, ids = array("I", [0]), array("I")
+        for s in sets:
+            ids.extend(s)
+            offsets.append(len(ids))
+        return cls(offsets, ids)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k: int) -> memoryview:
+        return self._ids[self.offsets[k]:self.offsets[k + 1]]
+
+    def size(self, k: int) -> int:
+        return self.offsets[k + 1] - self.offsets[k]
+
+    def sizes(self) -> array:
+        offsets = self.offsets
+        return array("I", (offsets[k + 1] - offsets[k] for k in range(len(offsets) - 1)))
+
+    @property
+    def nbytes(self) -> int:
+        return 4 * (len(self.offsets) + len(self.ids))
+
+    def invert(self, n_keys: int) -> "TagSets":
+        """Postings: for each id below n_keys, the sorted numbers of the sets holding it."""
+        counts = array("I", bytes(4 * (n_keys + 1)))
+        for i in self.ids:
+            counts[i + 1] += 1
+        for k in range(n_keys):
+            counts[k + 1] += counts[k]
+        fill = array("I", counts)
+        postings = array("I", bytes(4 * len(self.ids)))
+        offsets, ids = self.offsets, self.ids
+        # Sets are visited in order, so every posting list comes out sorted
+        for k in range(len(offsets) - 1):
+            for i in ids[offsets[k]:offsets[k + 1]]:
+                postings[fill[i]] = k
+                fill[i] += 1
+        return TagSets(counts, postings)
+
+
+class StringTable:
+    """Read-only list of strings stored as utf-8 with uint32 offsets; decoded on access."""
+
+    def __init__(self, offsets: IdArray, blob: Union[bytes, memoryview]):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def pack(cls, strings: Iterable[str]) -> "StringTable":
+        offsets, blob = array("I", [0]), bytearray()
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(offsets, bytes(blob))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, k: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(k, slice):
+            return [self[i] for i in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        return bytes(self.blob[self.offsets[k]:self.offsets[k + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+
+class VocabSnapshot(NamedTuple):
+    vocab: SkillVocab
+    labels: StringTable
+    sets: TagSets
+
+
+def _le(values: array) -> bytes:
+    if _LITTLE:
+        return values.tobytes()
+    swapped = array("I", values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def save(path: str, vocab: SkillVocab, sets: Optional[TagSets] = None, labels: Iterable[str] = ()) -> int:
+    """Write vocab (plus tag sets and labels) to path; returns the file size."""
+    sets = sets if sets is not None else TagSets.from_sets(())
+    names = StringTable.pack(vocab.names)
+    label_table = StringTable.pack(labels)
+    header = _HEADER.pack(
+        _MAGIC, len(names), len(label_table), len(sets), len(sets.ids), len(names.blob), len(label_table.blob),
+    )
+    parts = [
+        header, _le(names.offsets), _le(label_table.offsets),
+        _le(array("I", sets.offsets)), _le(array("I", sets.ids)), names.blob, label_table.blob,
+    ]
+    with open(path, "wb") as f:
+        for part in parts:
+            f.write(part)
+    return sum(map(len, parts))
+
+
+def _view(buf: memoryview, start: int, count: int) -> IdArray:
+    view = buf[start:start + 4 * count]
+    if _LITTLE:
+        return view.cast("I")
+    values = array("I", view.tobytes())
+    values.byteswap()
+    return values
+
+
+def load(path: str) -> VocabSnapshot:
+    """Memory-map a file written by save. Id arrays and strings stay in the mapping."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mm)
+    magic, n_names, n_labels, n_sets, n_ids, names_bytes, labels_bytes = _HEADER.unpack_from(buf)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a skill vocabulary file")
+    if _HEADER.size + 4 * (n_names + n_labels + n_sets + 3 + n_ids) + names_bytes + labels_bytes != len(buf):
+        raise ValueError(f"{path} is truncated or has trailing data")
+    pos = _HEADER.size
+    name_offsets = _view(buf, pos, n_names + 1)
+    pos += 4 * (n_names + 1)
+    label_offsets = _view(buf, pos, n_labels + 1)
+    pos += 4 * (n_labels + 1)
+    set_offsets = _view(buf, pos, n_sets + 1)
+    pos += 4 * (n_sets + 1)
+    ids = _view(buf, pos, n_ids)
+    pos += 4 * n_ids
+    names = StringTable(name_offsets, buf[pos:pos + names_bytes])
+    pos += names_bytes
+    labels = StringTable(label_offsets, buf[pos:pos + labels_bytes])
+    return VocabSnapshot(SkillVocab(names), labels, TagSets(set_offsets, ids))
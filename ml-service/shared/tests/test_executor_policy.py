@@ -0,0 +1,62 @@
+"""Execution policies: bounded lanes, release when the work (not the caller) finishes, configuration."""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SHARED_DIR)
+
+from executor_policy import ExecutionPolicy, Saturated  # noqa: E402
+
+
+def test_lanes_are_bounded_separately_and_freed_when_work_ends():
+    policy = ExecutionPolicy("test", "thread", workers=1, queue=1, large_workers=1, retry_after=3)
+    gate = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(policy.run(gate.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        # One running plus one queued fills the lane; the large lane is untouched
+        with pytest.raises(Saturated) as e:
+            await policy.run(gate.wait, 5)
+        assert e.value.retry_after == 3
+        assert await policy.run(sum, [1, 2], large=True) == 3
+
+        # A cancelled caller keeps its place until its call has actually finished
+        running[0].cancel()
+        await asyncio.sleep(0.05)
+        with pytest.raises(Saturated):
+            policy.admit()
+        gate.set()
+        assert await running[1] is True
+        await asyncio.sleep(0.05)
+        with policy.admit():
+            assert await policy.call(len, "abc") == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        policy.shutdown()
+    stats = policy.stats()
+    assert stats["small"] == {"workers": 1, "queue": 1, "in_flight": 0, "peak": 2, "completed": 3, "rejected": 2}
+    assert stats["large"]["completed"] == 1 and stats["large"]["rejected"] == 0
+
+
+def test_inline_runs_on_the_caller_and_env_configures_the_policy(monkeypatch):
+    policy = ExecutionPolicy("test", "inline")
+    caller = threading.get_ident()
+    assert asyncio.run(policy.run(threading.get_ident)) == caller
+
+    monkeypatch.setenv("PARSE_EXECUTOR", "Process")
+    monkeypatch.setenv("PARSE_EXECUTOR_WORKERS", "3")
+    monkeypatch.setenv("PARSE_EXECUTOR_QUEUE", "0")
+    monkeypatch.setenv("EXECUTOR_RETRY_AFTER_SECONDS", "0.5")
+    policy = ExecutionPolicy.from_env("PARSE", large_workers=2)
+    assert (policy.mode, policy.workers, policy.large_workers, policy.retry_after) == ("process", 3, 2, 0.5)
+    assert policy.stats()["small"]["queue"] == 0
+    monkeypatch.setenv("PARSE_EXECUTOR", "fibers")
+    with pytest.raises(ValueError):
+        ExecutionPolicy.from_env("PARSE")
@@ -0,0 +1,94 @@
+"""Shared instrumentation: Prometheus text output, middleware and Server-Timing."""
+import os
+import sys
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SHARED_DIR)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import StreamingResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from instrumentation import Histogram, Metrics  # noqa: E402
+
+
+def make_app(**kwargs):
+    app = FastAPI()
+    metrics = Metrics("svc", **kwargs)
+    metrics.install(app)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        with metrics.stage("lookup"):
+            pass
+        metrics.observe("score", 0.002)
+        return {"id": item_id}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter(["a\n", "b\n"]), media_type="text/plain")
+
+    return app, metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.5, 3.0):
+        h.observe(("parse",), v)
+    assert h.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="parse",le="0.1"} 1',
+        'latency_seconds_bucket{stage="parse",le="1"} 3',
+        'latency_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'latency_seconds_sum{stage="parse"} 4.05',
+        'latency_seconds_count{stage="parse"} 4',
+    ]
+
+    assert h.snapshot(("parse",)) == {"buckets": {"0.1": 1, "1": 3, "+Inf": 4}, "sum": 4.05, "count": 4}
+    assert h.snapshot(("ocr",)) == {"buckets": {"0.1": 0, "1": 0, "+Inf": 0}, "sum": 0.0, "count": 0}
+
+
+def test_registered_histograms_are_served_with_the_built_in_families():
+    app, metrics = make_app()
+    sizes = metrics.histogram("batch_size", "Items per batch", buckets=(1, 8))
+    assert metrics.histogram("batch_size", "Items per batch") is sizes
+    sizes.observe(("svc",), 3)
+    with TestClient(app) as client:
+        body = client.get("/metrics").text
+    assert "# TYPE batch_size histogram" in body
+    assert 'batch_size_bucket{service="svc",le="8"} 1' in body and 'batch_size_sum{service="svc"} 3.0' in body
+
+
+def test_requests_are_labelled_by_route_template_and_status():
+    app, _ = make_app()
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/items/nope")
+        assert client.get("/stream").text == "a\nb\n"
+        body = client.get("/metrics").text
+    assert 'http_requests_total{service="svc",method="GET",route="/items/{item_id}",status="200"} 2' in body
+    assert 'http_requests_total{service="svc",method="GET",route="/items/{item_id}",status="422"} 1' in body
+    assert 'http_requests_total{service="svc",method="GET",route="/stream",status="200"} 1' in body
+    assert 'stage_duration_seconds_count{service="svc",stage="lookup"} 2' in body
+    assert 'route="/metrics"' not in body
+
+
+def test_server_timing_lists_stages_of_the_request():
+    app, _ = make_app(server_timing=True)
+    with TestClient(app) as client:
+        header = client.get("/items/7").headers["server-timing"]
+    names = [part.split(";")[0] for part in header.split(", ")]
+    assert names == ["lookup", "score", "app"]
+    assert "score;dur=2.00" in header
+
+
+def test_disabled_metrics_are_inert():
+    app, metrics = make_app(enabled=False, server_timing=True)
+    with TestClient(app) as client:
+        resp = client.get("/items/1")
+        assert "server-timing" not in resp.headers
+        assert client.get("/metrics").status_code == 404
+    assert metrics.stage("a") is metrics.stage("b")
+    assert metrics.render().count("\n") == 6  # HELP/TYPE lines only
@@ -0,0 +1,55 @@
+"""Snapshot files: typed sections read in place, and publishing through a channel."""
+import os
+import sys
+from array import array
+
+import numpy as np
+import pytest
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SHARED_DIR)
+
+from mmap_snapshot import SnapshotChannel, load, write  # noqa: E402
+from skill_vocab import StringTable  # noqa: E402
+
+
+def test_sections_round_trip_as_views(tmp_path):
+    path = str(tmp_path / "a.snap")
+    weights = np.array([0.5, 1.25, -2.0], dtype=np.float32)
+    write(path, {
+        "ids": array("I", [3, 1, 4, 1, 5]),
+        "names": ["Python", "Node.js", "", "C++"],
+        "labels": StringTable.pack(["Data Analyst"]),
+        "flags": b"\x01\x00\x03",
+        "weights": weights,
+    }, meta={"version": "abc"})
+    snap = load(path)
+    assert snap.meta == {"version": "abc"} and "ids" in snap and "missing" not in snap
+    assert isinstance(snap.array("ids"), memoryview) and list(snap.array("ids")) == [3, 1, 4, 1, 5]
+    names = snap.strings("names")
+    assert list(names) == ["Python", "Node.js", "", "C++"] and names[-1] == "C++" and names[1:3] == ["Node.js", ""]
+    assert snap.strings("labels")[0] == "Data Analyst" and bytes(snap.buffer("flags")) == b"\x01\x00\x03"
+    view = np.frombuffer(snap.buffer("weights"), dtype=snap.dtype("weights"))
+    assert view.tolist() == weights.tolist() and not view.flags.writeable
+    with pytest.raises(TypeError):
+        snap.array("weights")
+    write(str(tmp_path / "b.snap"), {})
+    with open(str(tmp_path / "b.snap"), "r+b") as f:
+        f.write(b"NOTASNAP")
+    with pytest.raises(ValueError):
+        load(str(tmp_path / "b.snap"))
+
+
+def test_channel_readers_see_each_publish_once(tmp_path):
+    writer, reader = SnapshotChannel(str(tmp_path), "catalog", keep=1), SnapshotChannel(str(tmp_path), "catalog")
+    assert reader.current() is None and not reader.changed()
+    first = writer.publish({"ids": array("I", [1])}, {"version": 1})
+    assert not writer.changed() and reader.changed()
+    assert reader.current().meta["version"] == 1 and not reader.changed()
+
+    for version in (2, 3, 4):
+        writer.publish({"ids": array("I", [version])}, {"version": version})
+    assert reader.changed() and list(reader.current().array("ids")) == [4]
+    # Superseded files beyond `keep` are gone; a snapshot already mapped still reads
+    assert len([f for f in os.listdir(tmp_path) if f.endswith(".snap")]) == 2
+    assert not os.path.exists(first.path) and list(first.array("ids")) == [1]
@@ -0,0 +1,109 @@
+"""Recommendation store on SQLite: bulk writes, hash/staleness lookups and the materialization jobs."""
+import importlib.util
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ML_DIR = os.path.dirname(SHARED_DIR)
+sys.path.insert(0, SHARED_DIR)
+
+from rec_store import RecStore, inputs_hash, parse_skills  # noqa: E402
+
+STUDENTS = [
+    (1, "Asha", 8.9, "CSE", ["Python", "SQL", "Pandas", "Excel"]),
+    (2, "Ravi", 6.1, "Mech", ["Node.js", "Express", "SQL", "Docker"]),
+    (3, "Mei", None, None, []),
+]
+
+
+def make_db(path):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, cgpa FLOAT, department TEXT)")
+    db.execute("CREATE TABLE resumes (id INTEGER PRIMARY KEY, student_id INT, file_path TEXT, skills TEXT)")
+    for sid, name, cgpa, dept, skills in STUDENTS:
+        db.execute("INSERT INTO students VALUES (?, ?, ?, ?)", (sid, name, cgpa, dept))
+        # An older resume first: only the latest one per student is scored
+        db.execute("INSERT INTO resumes (student_id, skills) VALUES (?, ?)", (sid, json.dumps(["COBOL"])))
+        db.execute("INSERT INTO resumes (student_id, skills) VALUES (?, ?)", (sid, json.dumps(skills)))
+    db.commit()
+    db.close()
+    return f"sqlite:///{path}"
+
+
+def test_parse_skills_accepts_every_column_encoding():
+    assert parse_skills(["Python", 3, "SQL"]) == ["Python", "SQL"]
+    assert parse_skills('["C++", "Go"]') == ["C++", "Go"]
+    assert parse_skills('{python,"machine learning"}') == ["python", "machine learning"]
+    assert parse_skills("python, sql") == ["python", "sql"]
+    assert parse_skills(None) == [] and parse_skills("{}") == []
+
+
+def test_lookups_only_hit_matching_fresh_rows(tmp_path):
+    store = RecStore(make_db(str(tmp_path / "app.db")))
+    assert [[st["student_id"] for st in batch] for batch in store.iter_students(batch_size=2)] == [[1, 2], [3]]
+    digest = inputs_hash("v1", ["python", "sql"])
+    assert store.write_recommendations("overlap", [(1, digest, ["Data Analyst", "ML Engineer"]), (2, digest, [])], computed_at=1000.0) == 2
+    assert store.write_predictions([(1, digest, 0.81)]) == 1
+
+    assert store.recommendations(1, "overlap", digest, max_age=0) == ["Data Analyst", "ML Engineer"]
+    assert store.recommendations(1, "overlap", digest, max_age=60) is None  # written at t=1000
+    assert store.recommendations(1, "tfidf", digest, max_age=0) is None
+    assert store.recommendations(1, "overlap", inputs_hash("v2", ["python", "sql"]), max_age=0) is None
+    assert store.prediction(1, digest, max_age=60) == 0.81
+    assert store.stats() == {"backend": "sqlite", "hits": 2, "misses": 2, "stale": 1}
+
+    # Lookups from many threads are all counted
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda i: store.prediction(1 + i % 2, digest, max_age=0), range(800)))
+    assert store.stats() == {"backend": "sqlite", "hits": 402, "misses": 402, "stale": 1}
+
+    # A rewrite replaces the old ranking instead of appending to it
+    store.write_recommendations("overlap", [(1, digest, ["Backend Developer"])])
+    assert store.recommendations(1, "overlap", digest, max_age=60) == ["Backend Developer"]
+    store.close()
+
+
+def load_service(name):
+    service_dir = os.path.join(ML_DIR, name)
+    if service_dir not in sys.path:
+        sys.path.insert(0, service_dir)
+    spec = importlib.util.spec_from_file_location(f"store_test_{name.replace('-', '_')}", os.path.join(service_dir, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_materialized_results_match_live_scoring(tmp_path, monkeypatch):
+    url = make_db(str(tmp_path / "app.db"))
+    env = {k: v for k, v in os.environ.items() if k != "REC_STORE_URL"}
+    for service in ("collaborative-filter", "placement-predict"):
+        subprocess.run(
+            [sys.executable, "materialize.py", "--db", url], cwd=os.path.join(ML_DIR, service), env=env, check=True,
+        )
+
+    monkeypatch.setenv("REC_STORE_URL", url)
+    cf, placement = load_service("collaborative-filter"), load_service("placement-predict")
+    cf_client, placement_client = TestClient(cf.app), TestClient(placement.app)
+    for sid, _, cgpa, dept, skills in STUDENTS:
+        live = cf_client.post("/recommendations", json={"skills": skills}).json()
+        stored = cf_client.post("/recommendations", json={"student_id": sid, "skills": skills}).json()
+        assert stored == live
+        payload = {"skills": skills, "cgpa": cgpa, "department": dept}
+        live = placement_client.post("/predict-placement", json=payload).json()
+        assert placement_client.post("/predict-placement", json={"student_id": sid, **payload}).json() == live
+    # Student 3 has no ranking to store; the other two are served from it
+    assert cf.REC_STORE.stats()["hits"] == 2
+    assert placement.REC_STORE.stats()["hits"] == 3
+
+    # Edited skills no longer match the stored inputs and are scored live
+    edited = {"student_id": 1, "skills": ["Node.js", "Express", "SQL", "Docker"]}
+    assert cf_client.post("/recommendations", json=edited).json() == cf_client.post(
+        "/recommendations", json={"skills": edited["skills"]}
+    ).json()
+    assert cf.REC_STORE.stats()["misses"] == 2
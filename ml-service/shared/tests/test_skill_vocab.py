@@ -0,0 +1,59 @@
+"""Shared skill vocabulary: interning, set overlap, postings and the mmap file."""
+import os
+import random
+import sys
+from array import array
+
+import pytest
+
+SHARED_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SHARED_DIR)
+
+from skill_vocab import SkillVocab, TagSets, bitset, load, members, overlap, popcount, save  # noqa: E402
+
+
+def test_encode_normalises_once_and_drops_unknown_skills():
+    vocab = SkillVocab(["Python", "SQL", "Node.js"])
+    assert vocab.encode([" sql", "PYTHON", "python", "Rust", 7, ""]) == array("I", [0, 1])
+    assert vocab.encode(None) == array("I")
+    assert vocab.encode(["Rust", "sql"], intern=True) == array("I", [1, 3])
+    assert vocab.names == ["Python", "SQL", "Node.js", "Rust"]
+    assert vocab.id("node.JS") == 2 and vocab.id("go") is None
+
+
+def test_overlap_by_merge_and_popcount_agree():
+    rng = random.Random(5)
+    for _ in range(200):
+        a = sorted(rng.sample(range(300), rng.randint(0, 30)))
+        b = sorted(rng.sample(range(300), rng.randint(0, 30)))
+        expected = len(set(a) & set(b))
+        assert overlap(array("I", a), array("I", b)) == expected
+        assert popcount(bitset(a) & bitset(b, 300)) == expected
+        assert members(bitset(a) | bitset(b)) == sorted(set(a) | set(b))
+
+
+def test_invert_gives_sorted_postings():
+    sets = TagSets.from_sets([[0, 2], [1, 2], [], [0, 1, 2]])
+    assert [list(sets[k]) for k in range(len(sets))] == [[0, 2], [1, 2], [], [0, 1, 2]]
+    assert list(sets.sizes()) == [2, 2, 0, 3]
+    postings = sets.invert(4)
+    assert [list(postings[s]) for s in range(4)] == [[0, 3], [1, 3], [0, 1, 3], []]
+
+
+def test_snapshot_round_trips_through_an_mmap(tmp_path):
+    vocab = SkillVocab(["Python", "C#", "Machine Learning", "Café"])
+    sets = TagSets.from_sets([[0, 1], [2, 3], [0]])
+    path = str(tmp_path / "vocab.bin")
+    size = save(path, vocab, sets, ["Job A", "Job B", "Jöb C"])
+    assert size == os.path.getsize(path)
+
+    snap = load(path)
+    assert snap.vocab.names == vocab.names and snap.vocab.id("machine learning") == 2
+    assert list(snap.labels) == ["Job A", "Job B", "Jöb C"]
+    assert isinstance(snap.sets.ids, memoryview)
+    assert [list(snap.sets[k]) for k in range(len(snap.sets))] == [[0, 1], [2, 3], [0]]
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        load(path)